@@ -3,14 +3,16 @@ import argparse
 from rapids.core.config_loader import load_config
 from rapids.core.logger import setup_logger, log_event
 from rapids.evaluation.benchmarking import build_report
-from rapids.streaming.run_streaming_ids import main as run_streaming
+from rapids.streaming.run_streaming_ids import main as run_streaming, replay as run_replay, train as run_train
 from rapids.main import main as run_offline
 
 
 def run_benchmark(args):
     config = load_config()
     logger = setup_logger(config)
-    report = build_report(args.dataset, args.max_rows, args.batch_size)
+    report = build_report(
+        args.dataset, args.max_rows, args.batch_size, args.model, cache_dir=(config.get("dataset") or {}).get("cache_dir")
+    )
     log_event(logger, "benchmark.complete", rows=report["rows_used"])
 
     with open(args.output, "w") as f:
@@ -24,20 +26,75 @@ def main():
     subparsers = parser.add_subparsers(dest="command")
 
     subparsers.add_parser("offline", help="Run offline feature impact pipeline")
-    subparsers.add_parser("stream", help="Run streaming IDS")
+    stream = subparsers.add_parser("stream", help="Run streaming IDS")
+    stream.add_argument(
+        "--consumers",
+        type=int,
+        default=None,
+        help="Number of consumer processes sharing the stream via a consumer group",
+    )
+    stream.add_argument(
+        "--asyncio",
+        action="store_true",
+        help="Run producer and consumer on one asyncio event loop (redis.asyncio)",
+    )
+    stream.add_argument(
+        "--load-profile",
+        default=None,
+        help="YAML rate profile; replaces the producer with an open-loop load generator",
+    )
+
+    replay = subparsers.add_parser("replay", help="Replay a CSV through the IDS at full speed, without Redis")
+    replay.add_argument("--csv", default=None, help="Flow CSV to replay (default: dataset.path)")
+    replay.add_argument("--transport", choices=["file", "memory"], default="file")
+    replay.add_argument("--wire-format", choices=["json", "binary"], default="json", help="Memory transport encoding")
+    replay.add_argument("--max-rows", type=int, default=None)
+    replay.add_argument("--alerts", default=None, help="Write every alert to this JSONL file")
+
+    train = subparsers.add_parser("train", help="Train the detector and save it as a model artifact")
+    train.add_argument("--output", default=None, help="Artifact root (default: model.artifact_dir)")
+    train.add_argument(
+        "--fuse-scaler",
+        action="store_true",
+        default=None,
+        help="Fold the scaler into the saved scorer so it takes raw features (default: model.fuse_scaler)",
+    )
+    train.add_argument(
+        "--sample-size",
+        type=int,
+        default=None,
+        help="Train on a reservoir sample of this many flows, streamed in one pass (default: model.train_sample_size)",
+    )
+    train.add_argument(
+        "--cascade",
+        action="store_true",
+        default=None,
+        help="Save a first-stage filter that clears plainly normal flows with a few trees (default: model.cascade)",
+    )
 
     bench = subparsers.add_parser("benchmark", help="Run Phase 6 benchmarks")
     bench.add_argument("--dataset", default="datasets/sample.csv")
     bench.add_argument("--max-rows", type=int, default=5000)
     bench.add_argument("--batch-size", type=int, default=256)
     bench.add_argument("--output", default="evaluation/benchmark_report.json")
+    bench.add_argument("--model", default=None, help="Benchmark this model artifact instead of training one")
 
     args = parser.parse_args()
 
     if args.command == "offline":
         run_offline()
     elif args.command == "stream":
-        run_streaming()
+        run_streaming(consumers=args.consumers, use_asyncio=args.asyncio, load_profile=args.load_profile)
+    elif args.command == "replay":
+        run_replay(
+            csv_path=args.csv,
+            transport=args.transport,
+            alerts_path=args.alerts,
+            max_rows=args.max_rows,
+            wire_format=args.wire_format,
+        )
+    elif args.command == "train":
+        run_train(output=args.output, fuse_scaler=args.fuse_scaler, sample_size=args.sample_size, cascade=args.cascade)
     elif args.command == "benchmark":
         run_benchmark(args)
     else:
@@ -1,5 +1,7 @@
+import asyncio
 import time
 import redis
+import redis.asyncio
 from typing import Optional
 import logging
 
@@ -12,6 +14,7 @@ def connect_redis(
     retries: int = 5,
     delay_sec: float = 0.5,
     timeout_sec: int = 5,
+    decode_responses: bool = True,
 ) -> redis.Redis:
     """
     Connect to Redis with exponential backoff retry logic.
@@ -22,6 +25,7 @@ def connect_redis(
         retries: Number of connection attempts.
         delay_sec: Initial delay between retries (exponential backoff).
         timeout_sec: Socket timeout per attempt.
+        decode_responses: Decode replies to str; disable to read binary payloads.
         
     Returns:
         Connected Redis client.
@@ -37,7 +41,7 @@ def connect_redis(
             client = redis.Redis(
                 host=host,
                 port=port,
-                decode_responses=True,
+                decode_responses=decode_responses,
                 socket_timeout=timeout_sec,
                 socket_connect_timeout=timeout_sec,
             )
@@ -56,3 +60,47 @@ def connect_redis(
         f"Redis connection failed after {retries} retries "
         f"(host={host}, port={port}): {last_error}"
     )
+
+
+async def connect_redis_async(
+    host: str = "localhost",
+    port: int = 6379,
+    retries: int = 5,
+    delay_sec: float = 0.5,
+    timeout_sec: int = 5,
+    decode_responses: bool = True,
+) -> "redis.asyncio.Redis":
+    """
+    Connect to Redis from asyncio code with the same retry policy as ``connect_redis``.
+
+    Returns:
+        Connected ``redis.asyncio.Redis`` client.
+
+    Raises:
+        RuntimeError: If all connection attempts fail.
+    """
+    last_error: Optional[Exception] = None
+
+    for attempt in range(max(retries, 1)):
+        client = redis.asyncio.Redis(
+            host=host,
+            port=port,
+            decode_responses=decode_responses,
+            socket_timeout=timeout_sec,
+            socket_connect_timeout=timeout_sec,
+        )
+        try:
+            await client.ping()
+            logger.info(f"Connected to Redis at {host}:{port}")
+            return client
+        except (redis.RedisError, ConnectionError, OSError) as exc:
+            last_error = exc
+            await client.aclose()
+            logger.warning(f"Redis connection failed (attempt {attempt + 1}/{retries}): {exc}")
+            if attempt < retries - 1:
+                await asyncio.sleep(delay_sec * (2 ** attempt))
+
+    raise RuntimeError(
+        f"Redis connection failed after {retries} retries "
+        f"(host={host}, port={port}): {last_error}"
+    )
@@ -0,0 +1,9 @@
+"""Ids of ordered column lists, shared by model artifacts and the wire format."""
+import hashlib
+from typing import Sequence
+
+
+def schema_id(columns: Sequence[str]) -> str:
+    """Return a short, stable id for an ordered list of column names."""
+    digest = hashlib.sha1("\x1f".join(columns).encode("utf-8"))
+    return digest.hexdigest()[:16]
@@ -1,17 +1,21 @@
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 import numpy as np
 from sklearn.ensemble import IsolationForest
 from sklearn.metrics import precision_score, recall_score, f1_score, confusion_matrix
 from sklearn.model_selection import train_test_split
 
 
-def train_isolation_forest(features: np.ndarray, contamination: float = 0.05) -> IsolationForest:
+def train_isolation_forest(
+    features: np.ndarray, contamination: float = 0.05, n_jobs: int = -1, random_state: int = 42
+) -> IsolationForest:
     """
     Train an Isolation Forest model for anomaly detection.
     
     Args:
         features: Input feature array (n_samples, n_features).
         contamination: Expected proportion of anomalies.
+        n_jobs: Cores used to build the trees (-1 for all).
+        random_state: Seed of the tree construction.
         
     Returns:
         Trained IsolationForest model.
@@ -19,40 +23,59 @@ def train_isolation_forest(features: np.ndarray, contamination: float = 0.05) ->
     model = IsolationForest(
         n_estimators=100,
         contamination=contamination,
-        random_state=42,
-        n_jobs=-1
+        random_state=random_state,
+        n_jobs=n_jobs
     )
     model.fit(features)
     return model
 
 
-def train_test_evaluation(
-    features: np.ndarray,
-    labels: np.ndarray,
-    contamination: float = 0.20,
-) -> Dict[str, float]:
+def stratified_split(
+    labels: np.ndarray, test_size: float = 0.3, random_state: int = 42
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
     """
-    Train and evaluate Isolation Forest on test set.
-    
+    Split rows into train and test sets, stratified on attack vs benign.
+
     Args:
-        features: Input feature array (n_samples, n_features).
         labels: Labels (BENIGN or ATTACK).
-        contamination: Expected proportion of anomalies.
-        
+        test_size: Share of rows in the test set.
+        random_state: Seed of the split.
+
     Returns:
-        Dictionary with precision, recall, f1_score, false_positive_rate.
+        Tuple of (train_rows, test_rows, y_train, y_test): row indices and
+        binary labels (1 for attacks) of each set.
     """
     labels_binary = np.where(labels != "BENIGN", 1, 0)
-
-    X_train, X_test, y_train, y_test = train_test_split(
-        features,
-        labels_binary,
-        test_size=0.3,
-        random_state=42,
+    train_rows, test_rows = train_test_split(
+        np.arange(len(labels_binary)),
+        test_size=test_size,
+        random_state=random_state,
         stratify=labels_binary
     )
+    return train_rows, test_rows, labels_binary[train_rows], labels_binary[test_rows]
+
 
-    model = train_isolation_forest(X_train, contamination=contamination)
+def evaluate_split(
+    X_train: np.ndarray,
+    X_test: np.ndarray,
+    y_test: np.ndarray,
+    contamination: float = 0.20,
+    n_jobs: int = -1,
+) -> Dict[str, float]:
+    """
+    Train Isolation Forest on a train set and evaluate it on a test set.
+
+    Args:
+        X_train: Training feature rows.
+        X_test: Test feature rows.
+        y_test: Binary test labels (1 for attacks).
+        contamination: Expected proportion of anomalies.
+        n_jobs: Cores used to build the trees (-1 for all).
+
+    Returns:
+        Dictionary with precision, recall, f1_score, false_positive_rate.
+    """
+    model = train_isolation_forest(X_train, contamination=contamination, n_jobs=n_jobs)
 
     preds = model.predict(X_test)
     preds_binary = np.where(preds == -1, 1, 0)
@@ -72,10 +95,32 @@ def train_test_evaluation(
     }
 
 
+def train_test_evaluation(
+    features: np.ndarray,
+    labels: np.ndarray,
+    contamination: float = 0.20,
+) -> Dict[str, float]:
+    """
+    Train and evaluate Isolation Forest on test set.
+    
+    Args:
+        features: Input feature array (n_samples, n_features).
+        labels: Labels (BENIGN or ATTACK).
+        contamination: Expected proportion of anomalies.
+        
+    Returns:
+        Dictionary with precision, recall, f1_score, false_positive_rate.
+    """
+    train_rows, test_rows, _, y_test = stratified_split(labels)
+    return evaluate_split(features[train_rows], features[test_rows], y_test, contamination=contamination)
+
+
 def contamination_experiment(
     features: np.ndarray,
     labels: np.ndarray,
     levels: List[float],
+    workers: int = 1,
+    threads_per_worker: Optional[int] = None,
 ) -> List[Dict[str, float]]:
     """
     Run contamination parameter sweep.
@@ -84,15 +129,16 @@ def contamination_experiment(
         features: Input feature array.
         labels: Input labels.
         levels: List of contamination levels to sweep.
+        workers: Processes evaluating levels concurrently (see
+            ``rapids.evaluation.sweep.run_sweep``); 1 runs them in turn.
+        threads_per_worker: Tree-building threads per level.
         
     Returns:
         List of evaluation results for each contamination level.
     """
-    results = []
+    # Imported here: the sweep executor is built on this module
+    from rapids.evaluation.sweep import contamination_tasks, run_sweep
 
-    for c in levels:
-        metrics = train_test_evaluation(features, labels, contamination=c)
-        metrics["contamination"] = c
-        results.append(metrics)
-
-    return results
+    return run_sweep(
+        features, labels, contamination_tasks(levels), workers=workers, threads_per_worker=threads_per_worker
+    )
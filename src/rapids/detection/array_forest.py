@@ -0,0 +1,309 @@
+"""IsolationForest scoring from flat node arrays, all trees at once.
+
+``IsolationForest.predict`` walks its trees one ``tree.apply`` call at a
+time, which for the consumer's batches of a few hundred flows is mostly
+per-call overhead. :class:`ArrayIsolationForest` copies the fitted trees into
+contiguous arrays indexed by a global node id::
+
+    feature[n]        input column tested at node n (after the tree's feature subset)
+    threshold[n]      split threshold; go left when x <= threshold
+    children[2n + r]  left (r=0) and right (r=1) child; leaves point at themselves
+    missing_left[n]   where a NaN goes at node n
+    value[n]          path length contributed by ending at leaf n
+    roots[t]          root node of tree t
+
+and walks every tree for a whole batch together, one level per step: a
+``(rows, trees)`` matrix of current nodes advances with a few gathers, for
+at most ``max_depth`` steps. Inputs are compared as float32, as scikit-learn
+does, so scores match ``decision_function`` up to float summation order.
+
+A fitted ``StandardScaler`` can be folded into the thresholds with
+:meth:`ArrayIsolationForest.fuse_scaler`. The fused scorer takes raw flow
+features, so the hot path skips the scaling pass entirely. Each threshold
+becomes the largest raw value that scaling would still send left, so
+float64 inputs get exactly the labels of ``scaler.transform`` followed by
+the unfused scorer.
+
+The arrays can be saved next to a model artifact and memory-mapped back, so
+consumer processes scoring with the same version share one copy.
+"""
+import json
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+import numpy as np
+from sklearn.preprocessing import StandardScaler
+
+ARRAYS = ("feature", "threshold", "children", "missing_left", "value", "roots")
+PARAMS_FILE = "forest.json"
+
+
+def _average_path_length(n: float) -> float:
+    """Average path length of an unsuccessful search in a BST of ``n`` nodes (as in scikit-learn)."""
+    if n <= 1:
+        return 0.0
+    if n == 2:
+        return 1.0
+    return 2.0 * (np.log(n - 1.0) + np.euler_gamma) - 2.0 * (n - 1.0) / n
+
+
+_SIGN = np.uint64(1 << 63)
+
+
+def _ordered_keys(values: np.ndarray) -> np.ndarray:
+    """Map float64 values to uint64 keys that sort in the same order."""
+    bits = values.view(np.uint64)
+    return np.where(bits & _SIGN, ~bits, bits | _SIGN)
+
+
+def _from_keys(keys: np.ndarray) -> np.ndarray:
+    return np.where(keys & _SIGN, keys & ~_SIGN, ~keys).view(np.float64)
+
+
+def _raw_thresholds(threshold: np.ndarray, mean: np.ndarray, scale: np.ndarray) -> np.ndarray:
+    """
+    Largest raw value ``x`` per node with ``float32((x - mean) / scale) <= threshold``.
+
+    Scaling and rounding are monotonic in ``x``, so the values sent left form
+    a half-line; its end is found by bisecting over the float64 values in key
+    order, all nodes at once.
+    """
+
+    def goes_left(keys):
+        with np.errstate(over="ignore", invalid="ignore"):
+            scaled = ((_from_keys(keys) - mean) / scale).astype(np.float32)
+        return scaled <= threshold
+
+    finite = np.finfo(np.float64).max
+    lo = np.full(len(threshold), _ordered_keys(np.array([-finite]))[0])
+    hi = np.full(len(threshold), _ordered_keys(np.array([finite]))[0])
+    always, never = goes_left(hi), ~goes_left(lo)
+    # Invariant for the rest: lo goes left, hi goes right
+    while True:
+        open_ = hi - lo > 1
+        if not open_.any():
+            break
+        mid = lo + (hi - lo) // np.uint64(2)
+        left = goes_left(mid)
+        lo = np.where(open_ & left, mid, lo)
+        hi = np.where(open_ & ~left, mid, hi)
+    return np.where(always, np.inf, np.where(never, -np.inf, _from_keys(lo)))
+
+
+class ArrayIsolationForest:
+    """
+    Drop-in scorer for a fitted IsolationForest: ``predict``,
+    ``decision_function`` and ``score_samples`` over flat node arrays.
+
+    Build one with :meth:`from_sklearn`, or :meth:`load` arrays written by
+    :meth:`save`. When loaded memory-mapped, pickling keeps only the
+    directory, and the arrays are mapped again in the receiving process.
+
+    ``raw_input`` is True for scorers returned by :meth:`fuse_scaler`,
+    which expect unscaled features and must be used without the scaler.
+    """
+
+    def __init__(
+        self,
+        arrays: Dict[str, np.ndarray],
+        offset: float,
+        denominator: float,
+        max_depth: int,
+        n_features: int,
+        chunk_rows: int = 4096,
+        path: Optional[Path] = None,
+        raw_input: bool = False,
+    ) -> None:
+        self.feature = arrays["feature"]
+        self.threshold = arrays["threshold"]
+        self.children = arrays["children"]
+        self.missing_left = arrays["missing_left"]
+        self.value = arrays["value"]
+        self.roots = arrays["roots"]
+        self.offset_ = offset
+        self.denominator = denominator
+        self.max_depth = max_depth
+        self.n_features_in_ = n_features
+        self.chunk_rows = chunk_rows
+        self.path = path
+        self.raw_input = raw_input
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    @property
+    def arrays(self) -> Dict[str, np.ndarray]:
+        return {name: getattr(self, name) for name in ARRAYS}
+
+    @classmethod
+    def from_sklearn(cls, model, chunk_rows: int = 4096) -> "ArrayIsolationForest":
+        """Flatten the trees of a fitted ``sklearn.ensemble.IsolationForest``."""
+        subsample = model._max_features != model.n_features_in_
+        feature, threshold, children, missing_left, value, roots = [], [], [], [], [], []
+        start = 0
+        for i, (estimator, features) in enumerate(zip(model.estimators_, model.estimators_features_)):
+            tree = estimator.tree_
+            ids = np.arange(tree.node_count, dtype=np.int64) + start
+            leaf = tree.children_left == -1
+
+            tree_feature = np.where(leaf, 0, tree.feature).astype(np.int64)
+            if subsample:
+                tree_feature = np.asarray(features, dtype=np.int64)[tree_feature]
+            left = np.where(leaf, ids, tree.children_left + start)
+            right = np.where(leaf, ids, tree.children_right + start)
+
+            feature.append(tree_feature)
+            threshold.append(np.where(leaf, np.inf, tree.threshold))
+            children.append(np.stack([left, right], axis=1).ravel())
+            missing_left.append(np.asarray(tree.missing_go_to_left, dtype=bool))
+            value.append(model._decision_path_lengths[i] + model._average_path_length_per_tree[i] - 1.0)
+            roots.append(start)
+            start += tree.node_count
+
+        arrays = {
+            "feature": np.concatenate(feature),
+            "threshold": np.concatenate(threshold).astype(np.float64),
+            "children": np.concatenate(children).astype(np.int64),
+            "missing_left": np.concatenate(missing_left),
+            "value": np.concatenate(value).astype(np.float64),
+            "roots": np.asarray(roots, dtype=np.int64),
+        }
+        return cls(
+            arrays,
+            offset=float(model.offset_),
+            denominator=len(model.estimators_) * _average_path_length(model._max_samples),
+            max_depth=max(estimator.tree_.max_depth for estimator in model.estimators_),
+            n_features=model.n_features_in_,
+            chunk_rows=chunk_rows,
+        )
+
+    def fuse_scaler(self, scaler: StandardScaler) -> "ArrayIsolationForest":
+        """
+        Return a scorer for raw features, with ``scaler`` folded into the thresholds.
+
+        Raises:
+            ValueError: If the scorer is already fused or ``scaler`` is not a
+                fitted StandardScaler.
+        """
+        if self.raw_input:
+            raise ValueError("Scaler is already fused into this scorer")
+        if not isinstance(scaler, StandardScaler):
+            raise ValueError(f"Only a StandardScaler can be fused, got {type(scaler).__name__}")
+        mean = scaler.mean_ if scaler.with_mean else np.zeros(self.n_features_in_)
+        scale = scaler.scale_ if scaler.with_std else np.ones(self.n_features_in_)
+        feature = np.asarray(self.feature)
+        arrays = dict(self.arrays)
+        arrays["threshold"] = _raw_thresholds(
+            np.asarray(self.threshold), np.asarray(mean, dtype=np.float64)[feature], np.asarray(scale, dtype=np.float64)[feature]
+        )
+        return ArrayIsolationForest(
+            arrays,
+            offset=self.offset_,
+            denominator=self.denominator,
+            max_depth=self.max_depth,
+            n_features=self.n_features_in_,
+            chunk_rows=self.chunk_rows,
+            raw_input=True,
+        )
+
+    def _depths(self, X: np.ndarray, roots: np.ndarray) -> np.ndarray:
+        n_rows, n_cols = X.shape
+        flat = X.ravel()
+        has_nan = np.isnan(flat).any()
+        row_base = (np.arange(n_rows, dtype=np.int64) * n_cols)[:, None]
+        nodes = np.broadcast_to(roots, (n_rows, len(roots)))
+        for _ in range(self.max_depth):
+            values = flat[row_base + self.feature[nodes]]
+            go_right = ~(values <= self.threshold[nodes])
+            if has_nan:
+                go_right &= ~(np.isnan(values) & self.missing_left[nodes])
+            nodes = self.children[2 * nodes + go_right]
+        return self.value[nodes].sum(axis=1)
+
+    def as_input(self, X) -> np.ndarray:
+        """``X`` as the contiguous array the trees compare; no copy if it already is one."""
+        # Trees compare float32 inputs against float64 thresholds, like scikit-learn;
+        # fused thresholds are in raw units and compare the features as given
+        if not self.raw_input:
+            X = np.ascontiguousarray(X, dtype=np.float32)
+        elif X.dtype not in (np.float32, np.float64):
+            X = np.ascontiguousarray(X, dtype=np.float64)
+        else:
+            X = np.ascontiguousarray(X)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"Expected a 2-D array with {self.n_features_in_} columns, got shape {X.shape}")
+        return X
+
+    def path_lengths(self, X, trees: slice = slice(None)) -> np.ndarray:
+        """Path lengths of each row summed over ``trees``, a slice of the forest's trees."""
+        X = self.as_input(X)
+        roots = np.asarray(self.roots[trees])
+        depths = np.empty(len(X))
+        for start in range(0, len(X), self.chunk_rows):
+            depths[start : start + self.chunk_rows] = self._depths(X[start : start + self.chunk_rows], roots)
+        return depths
+
+    def scores_from_path_lengths(self, depths: np.ndarray) -> np.ndarray:
+        """``score_samples`` values for path lengths summed over all trees."""
+        if self.denominator == 0:
+            return -np.ones_like(depths)
+        return -(2.0 ** (-depths / self.denominator))
+
+    def score_samples(self, X) -> np.ndarray:
+        """Opposite of the anomaly score, as ``IsolationForest.score_samples``."""
+        return self.scores_from_path_lengths(self.path_lengths(X))
+
+    def decision_function(self, X) -> np.ndarray:
+        """Scores shifted so that negative values are anomalies."""
+        return self.score_samples(X) - self.offset_
+
+    def predict(self, X) -> np.ndarray:
+        """-1 for anomalies, 1 for normal flows."""
+        return np.where(self.decision_function(X) < 0, -1, 1)
+
+    def save(self, directory: Union[str, Path]) -> Path:
+        """Write the arrays as ``.npy`` files and the parameters as JSON under ``directory``."""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        for name, array in self.arrays.items():
+            np.save(directory / f"{name}.npy", np.ascontiguousarray(array))
+        params = {
+            "offset": self.offset_,
+            "denominator": self.denominator,
+            "max_depth": self.max_depth,
+            "n_features": self.n_features_in_,
+            "n_trees": self.n_trees,
+            "raw_input": self.raw_input,
+        }
+        with open(directory / PARAMS_FILE, "w") as f:
+            json.dump(params, f, indent=2)
+        return directory
+
+    @classmethod
+    def load(cls, directory: Union[str, Path], mmap: bool = True, chunk_rows: int = 4096) -> "ArrayIsolationForest":
+        """Load arrays written by :meth:`save`, memory-mapped unless ``mmap`` is False."""
+        directory = Path(directory)
+        with open(directory / PARAMS_FILE, "r") as f:
+            params = json.load(f)
+        arrays = {name: np.load(directory / f"{name}.npy", mmap_mode="r" if mmap else None) for name in ARRAYS}
+        return cls(
+            arrays,
+            offset=params["offset"],
+            denominator=params["denominator"],
+            max_depth=params["max_depth"],
+            n_features=params["n_features"],
+            chunk_rows=chunk_rows,
+            path=directory if mmap else None,
+            raw_input=params.get("raw_input", False),
+        )
+
+    def __getstate__(self):
+        if self.path is None:
+            return self.__dict__
+        return {"path": self.path, "chunk_rows": self.chunk_rows}
+
+    def __setstate__(self, state):
+        if set(state) == {"path", "chunk_rows"}:
+            state = ArrayIsolationForest.load(state["path"], chunk_rows=state["chunk_rows"]).__dict__
+        self.__dict__.update(state)
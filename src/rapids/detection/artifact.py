@@ -0,0 +1,232 @@
+"""Versioned model artifacts: scaler, model and feature columns saved together.
+
+An artifact root holds one directory per version and a ``LATEST`` pointer::
+
+    artifacts/models/
+        LATEST                          name of the newest version
+        20250101T120000Z-3f2a9c1e/
+            manifest.json               format, schema hash, feature columns, metadata
+            model.joblib                {"scaler": ..., "model": ...}, uncompressed
+            forest/                     flat node arrays for ArrayIsolationForest (.npy)
+
+Versions are named after their UTC creation time and schema hash, and are
+written to a temporary directory that is renamed into place, so a reader
+never sees a half-written artifact. ``model.joblib`` is loaded with
+``mmap_mode="r"``: its numpy arrays (scaler statistics, per-tree feature
+subsets and path lengths) are mapped from the page cache rather than read,
+so loading takes milliseconds and processes loading the same version share
+those pages. scikit-learn copies each tree's node table into its own
+buffer when unpickling, so those few hundred kilobytes are per process;
+the ``forest/`` arrays used by the default ``scorer="array"`` are mapped
+and shared in full. Saved with ``fuse_scaler=True``, those arrays have the
+scaler folded in, and the loaded artifact's ``scaler`` is None: the model
+takes raw features. Saved with ``cascade`` settings (see
+``rapids.detection.cascade``), the array scorer is loaded wrapped in a
+CascadeIsolationForest.
+
+The schema hash is the wire format's schema id of the feature columns
+(``rapids.core.schema.schema_id``), so it can be compared directly with
+the schema of binary stream entries.
+"""
+import json
+import logging
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import joblib
+import numpy as np
+import sklearn
+
+from rapids.core.schema import schema_id
+from rapids.detection.array_forest import ArrayIsolationForest
+from rapids.detection.cascade import CascadeIsolationForest
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_FORMAT = 1
+MANIFEST = "manifest.json"
+MODEL_FILE = "model.joblib"
+FOREST_DIR = "forest"
+SCORERS = ("array", "sklearn")
+LATEST = "LATEST"
+
+
+class ModelArtifact:
+    """A loaded artifact: fitted scaler and model plus the columns they expect."""
+
+    def __init__(
+        self,
+        model,
+        scaler,
+        feature_columns: List[str],
+        manifest: Dict[str, Any],
+        path: Optional[Path] = None,
+    ) -> None:
+        self.model = model
+        self.scaler = scaler
+        self.feature_columns = feature_columns
+        self.manifest = manifest
+        self.path = path
+
+    @property
+    def version(self) -> str:
+        return self.manifest["version"]
+
+    @property
+    def schema_hash(self) -> str:
+        return self.manifest["schema_hash"]
+
+    def check_columns(self, columns: Sequence[str]) -> None:
+        """
+        Check that ``columns`` (e.g. a CSV header) provide every feature column.
+
+        Raises:
+            ValueError: Listing the feature columns that are missing.
+        """
+        missing = [col for col in self.feature_columns if col not in set(columns)]
+        if missing:
+            raise ValueError(
+                f"Model {self.version} expects {len(missing)} columns the data does not have: {missing[:5]}"
+            )
+
+
+def save_artifact(
+    root: Union[str, Path],
+    model,
+    scaler,
+    feature_columns: Sequence[str],
+    metadata: Optional[Dict[str, Any]] = None,
+    fuse_scaler: bool = False,
+    cascade: Optional[Dict[str, Any]] = None,
+) -> Path:
+    """
+    Save a fitted scaler and model as a new artifact version under ``root``.
+
+    Args:
+        root: Artifact root directory (created if missing).
+        model: Fitted anomaly detection model.
+        scaler: Fitted feature scaler.
+        feature_columns: Ordered feature columns the scaler and model were fit on.
+        metadata: Extra JSON-serialisable details (dataset, parameters, ...).
+        fuse_scaler: Fold ``scaler`` into the saved array scorer, so it
+            scores raw features. The scaler itself is still saved.
+        cascade: ``CascadeIsolationForest.params`` to score the array
+            scorer through, as calibrated on the training data.
+
+    Returns:
+        Path of the new version directory, which ``LATEST`` now names.
+    """
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    feature_columns = list(feature_columns)
+    schema = schema_id(feature_columns)
+    version = f"{time.strftime('%Y%m%dT%H%M%SZ', time.gmtime())}-{schema[:8]}"
+    path = root / version
+    suffix = 1
+    while path.exists():
+        path = root / f"{version}.{suffix}"
+        suffix += 1
+
+    manifest = {
+        "format": ARTIFACT_FORMAT,
+        "version": path.name,
+        "created": time.time(),
+        "schema_hash": schema,
+        "feature_columns": feature_columns,
+        "model_type": type(model).__name__,
+        "scaler_type": type(scaler).__name__,
+        "fused_scaler": fuse_scaler,
+        "cascade": cascade,
+        "sklearn_version": sklearn.__version__,
+        "numpy_version": np.__version__,
+        "metadata": metadata or {},
+    }
+
+    tmp_path = root / f".{path.name}.tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    tmp_path.mkdir()
+    joblib.dump({"scaler": scaler, "model": model}, tmp_path / MODEL_FILE)
+    if hasattr(model, "estimators_features_"):
+        forest = ArrayIsolationForest.from_sklearn(model)
+        if fuse_scaler:
+            forest = forest.fuse_scaler(scaler)
+        forest.save(tmp_path / FOREST_DIR)
+    elif fuse_scaler or cascade:
+        raise ValueError(f"Cannot fuse the scaler into or cascade a {type(model).__name__}")
+    with open(tmp_path / MANIFEST, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+    latest_tmp = root / f".{LATEST}.tmp"
+    latest_tmp.write_text(path.name + "\n")
+    os.replace(latest_tmp, root / LATEST)
+    logger.info(f"Saved model artifact {path}")
+    return path
+
+
+def resolve_artifact(path: Union[str, Path]) -> Path:
+    """
+    Return the version directory for ``path``.
+
+    ``path`` may be a version directory or an artifact root, in which case
+    the version named by its ``LATEST`` file is used.
+
+    Raises:
+        FileNotFoundError: If there is no artifact at ``path``.
+    """
+    path = Path(path)
+    if (path / MANIFEST).exists():
+        return path
+    if (path / LATEST).exists():
+        return path / (path / LATEST).read_text().strip()
+    raise FileNotFoundError(f"No model artifact at {path}")
+
+
+def load_artifact(path: Union[str, Path], mmap: bool = True, scorer: str = "array") -> ModelArtifact:
+    """
+    Load an artifact version, or the latest version under an artifact root.
+
+    Args:
+        path: Version directory or artifact root.
+        mmap: Memory-map the model's arrays instead of reading them.
+        scorer: ``"array"`` to score with the artifact's ArrayIsolationForest
+            (when it has one), ``"sklearn"`` for the unpickled model.
+
+    Returns:
+        The loaded ModelArtifact. Its ``scaler`` is None when the array
+        scorer has the scaler fused in, and its ``model`` a
+        CascadeIsolationForest when the artifact was saved with a cascade.
+
+    Raises:
+        FileNotFoundError: If there is no artifact at ``path``.
+        ValueError: If the artifact format is unknown, its columns do not
+            match its schema hash, or ``scorer`` is unknown.
+    """
+    if scorer not in SCORERS:
+        raise ValueError(f"Unknown scorer {scorer!r}; expected one of {SCORERS}")
+    path = resolve_artifact(path)
+    with open(path / MANIFEST, "r") as f:
+        manifest = json.load(f)
+    if manifest.get("format") != ARTIFACT_FORMAT:
+        raise ValueError(f"Unsupported model artifact format {manifest.get('format')!r} in {path}")
+    feature_columns = manifest["feature_columns"]
+    if schema_id(feature_columns) != manifest["schema_hash"]:
+        raise ValueError(f"Feature columns of {path} do not match its schema hash")
+    if manifest.get("sklearn_version") != sklearn.__version__:
+        logger.warning(
+            f"Model artifact {path.name} was saved with scikit-learn {manifest.get('sklearn_version')}, "
+            f"running {sklearn.__version__}"
+        )
+
+    objects = joblib.load(path / MODEL_FILE, mmap_mode="r" if mmap else None)
+    model, scaler = objects["model"], objects["scaler"]
+    if scorer == "array" and (path / FOREST_DIR).is_dir():
+        model = ArrayIsolationForest.load(path / FOREST_DIR, mmap=mmap)
+        if model.raw_input:
+            scaler = None
+        if manifest.get("cascade"):
+            model = CascadeIsolationForest(model, **manifest["cascade"])
+    return ModelArtifact(model, scaler, feature_columns, manifest, path)
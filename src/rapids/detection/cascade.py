@@ -0,0 +1,126 @@
+"""Two-stage detector: a few trees clear plainly normal flows, the rest score fully.
+
+Most traffic is benign, and for a benign flow the first handful of trees
+of an IsolationForest already say so: their summed path length, scaled up
+to the whole forest, estimates the full score. :class:`CascadeIsolationForest`
+scores every flow with the first ``first_trees`` trees of an
+:class:`~rapids.detection.array_forest.ArrayIsolationForest` and clears
+flows whose estimated decision value is above ``margin``. Only the others
+go through the remaining trees, and their path lengths are added to the
+ones already computed, so they get exactly the full model's score.
+
+``margin`` is calibrated on training data by :meth:`CascadeIsolationForest.calibrate`:
+it is set so that a ``max_miss`` share of the rows the full model flags
+would be cleared, which bounds the cascade's recall loss against the full
+model on data like the training set. Cleared flows are reported with their
+estimated score, which is above ``margin`` and so never negative.
+"""
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from rapids.detection.array_forest import ArrayIsolationForest
+
+
+class CascadeIsolationForest:
+    """
+    ``predict``, ``decision_function`` and ``score_samples`` of an
+    ArrayIsolationForest, with a first stage of ``first_trees`` trees.
+
+    Takes the same inputs as the wrapped forest (raw features when it has
+    the scaler fused in) and pickles as it does.
+    """
+
+    def __init__(
+        self,
+        forest: ArrayIsolationForest,
+        first_trees: int = 10,
+        margin: float = 0.0,
+        calibration: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        if not 0 < first_trees < forest.n_trees:
+            raise ValueError(f"first_trees must be between 1 and {forest.n_trees - 1}, got {first_trees}")
+        if margin < 0:
+            raise ValueError("margin cannot be negative: cleared flows must score as normal")
+        self.forest = forest
+        self.first_trees = first_trees
+        self.margin = margin
+        self.calibration = calibration or {}
+
+    @property
+    def raw_input(self) -> bool:
+        return self.forest.raw_input
+
+    @property
+    def n_features_in_(self) -> int:
+        return self.forest.n_features_in_
+
+    @property
+    def offset_(self) -> float:
+        return self.forest.offset_
+
+    @property
+    def params(self) -> Dict[str, Any]:
+        """JSON-serialisable settings, as stored in a model artifact's manifest."""
+        return {"first_trees": self.first_trees, "margin": self.margin, "calibration": self.calibration}
+
+    def first_stage(self, X) -> Tuple[np.ndarray, np.ndarray]:
+        """First-stage path lengths and the decision values estimated from them."""
+        first = self.forest.path_lengths(X, slice(None, self.first_trees))
+        estimate = self.forest.scores_from_path_lengths(first * (self.forest.n_trees / self.first_trees))
+        return first, estimate - self.forest.offset_
+
+    @classmethod
+    def calibrate(
+        cls, forest: ArrayIsolationForest, X, first_trees: int = 10, max_miss: float = 0.01
+    ) -> "CascadeIsolationForest":
+        """
+        Build a cascade whose margin clears at most ``max_miss`` of the flows ``forest`` flags in ``X``.
+
+        Args:
+            forest: Full forest to cascade.
+            X: Training (or other representative) rows, as the forest takes them.
+            first_trees: Trees in the first stage.
+            max_miss: Share of the full model's anomalies in ``X`` the first
+                stage may clear, i.e. the target recall loss.
+
+        Raises:
+            ValueError: If ``max_miss`` is not in [0, 1) or ``first_trees``
+                does not leave trees for the second stage.
+        """
+        if not 0 <= max_miss < 1:
+            raise ValueError(f"max_miss must be in [0, 1), got {max_miss}")
+        cascade = cls(forest, first_trees)
+        first, estimate = cascade.first_stage(X)
+        full = forest.scores_from_path_lengths(first + forest.path_lengths(X, slice(first_trees, None)))
+        flagged = full - forest.offset_ < 0
+        margin = 0.0
+        if flagged.any():
+            margin = max(0.0, float(np.quantile(estimate[flagged], 1.0 - max_miss)))
+        cleared = estimate > margin
+        cascade.margin = margin
+        cascade.calibration = {
+            "rows": int(len(estimate)),
+            "max_miss": max_miss,
+            "cleared_fraction": float(cleared.mean()) if len(cleared) else 0.0,
+            "missed_fraction": float((cleared & flagged).sum() / flagged.sum()) if flagged.any() else 0.0,
+        }
+        return cascade
+
+    def decision_function(self, X) -> np.ndarray:
+        """Full-model decision values, or the first-stage estimate for cleared flows."""
+        X = self.forest.as_input(X)
+        first, scores = self.first_stage(X)
+        rest = np.flatnonzero(scores <= self.margin)
+        if len(rest):
+            depths = first[rest] + self.forest.path_lengths(X[rest], slice(self.first_trees, None))
+            scores[rest] = self.forest.scores_from_path_lengths(depths) - self.forest.offset_
+        return scores
+
+    def score_samples(self, X) -> np.ndarray:
+        """Opposite of the anomaly score, as ``IsolationForest.score_samples``."""
+        return self.decision_function(X) + self.forest.offset_
+
+    def predict(self, X) -> np.ndarray:
+        """-1 for anomalies, 1 for normal flows."""
+        return np.where(self.decision_function(X) < 0, -1, 1)
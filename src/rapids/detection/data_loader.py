@@ -1,6 +1,23 @@
-"""Data loading and preprocessing for flow data."""
-from typing import Tuple, Optional
+"""Data loading and preprocessing for flow data.
+
+The CSV is read ``chunk_rows`` at a time. Each chunk's numeric columns are
+cast to float32 and written straight into one preallocated feature matrix,
+rows with NaN or infinite values are skipped, and the scaler is fitted with
+``partial_fit`` as chunks arrive. Scaling then happens in place, so the peak
+memory is the final matrix plus one chunk, not several float64 copies of
+the whole dataset. The matrix is sized from a newline count, an upper bound
+on the row count; rows never written to are never touched, so they cost no
+memory.
+
+:func:`iter_clean_chunks` is the one cleaning path: the dataset cache
+(``rapids.detection.dataset_cache``) is built from it too, and with
+``cache_dir`` set :func:`load_features` reads that cache instead of the CSV.
+"""
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+import csv
+import io
 import logging
+import os
 import pandas as pd
 import numpy as np
 from sklearn.preprocessing import StandardScaler
@@ -8,85 +25,319 @@ from sklearn.preprocessing import StandardScaler
 logger = logging.getLogger(__name__)
 
 
-def load_and_preprocess(csv_path: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+class CleanChunk(NamedTuple):
+    """The rows of one CSV chunk that survived cleaning."""
+
+    features: np.ndarray
+    labels: Optional[np.ndarray]
+    feature_columns: List[str]
+    label_column: Optional[str]
+    dropped: int
+    integer_columns: Tuple[str, ...] = ()
+    index: Optional[np.ndarray] = None
+
+    def frame(self, index=None) -> pd.DataFrame:
+        """
+        The features as a DataFrame, as the CSV held them.
+
+        Integer columns of the first chunk are int64 again when this
+        chunk's values in them are whole numbers.
+        """
+        df = pd.DataFrame(self.features, columns=self.feature_columns, index=index)
+        whole = [col for col in self.integer_columns if (np.mod(df[col].to_numpy(), 1) == 0).all()]
+        if whole:
+            df = df.astype({col: np.int64 for col in whole})
+        return df
+
+
+def count_lines(csv_path: str, block_size: int = 1 << 20) -> int:
+    count = 0
+    with open(csv_path, "rb") as f:
+        while True:
+            block = f.read(block_size)
+            if not block:
+                return count
+            count += block.count(b"\n")
+
+
+def find_label_column(columns) -> Optional[str]:
+    for col in columns:
+        col_lower = col.lower()
+        if "label" in col_lower or "class" in col_lower:
+            return col
+    return None
+
+
+def shard_range(csv_path, shard, shards):
     """
-    Load CSV and preprocess features for anomaly detection.
-    
-    Args:
-        csv_path: Path to CSV file.
-        
+    Byte range of the rows belonging to one of ``shards`` parts of a CSV.
+
+    The data rows after the header are split into ``shards`` spans of
+    roughly equal size. Each span is extended to whole lines. A row belongs
+    to the shard where its first byte falls. Rows must not contain quoted
+    newlines.
+
     Returns:
-        Tuple of (scaled_features, labels) where labels may be None.
-        
+        Tuple of (column names, start offset, stop offset).
+    """
+    if not 0 <= shard < shards:
+        raise ValueError(f"shard must be in [0, {shards}), got {shard}")
+    size = os.path.getsize(csv_path)
+    with open(csv_path, "rb") as f:
+        header = f.readline()
+        data_start = f.tell()
+
+        def line_start(offset):
+            if offset <= data_start:
+                return data_start
+            if offset >= size:
+                return size
+            f.seek(offset - 1)
+            f.readline()
+            return f.tell()
+
+        span = size - data_start
+        start = line_start(data_start + span * shard // shards)
+        stop = line_start(data_start + span * (shard + 1) // shards)
+
+    names = next(csv.reader([header.decode("utf-8-sig").rstrip("\r\n")]))
+    return names, start, stop
+
+
+class _ByteRange(io.RawIOBase):
+    """Read-only view of ``[start, stop)`` of a file."""
+
+    def __init__(self, path, start, stop):
+        self._file = open(path, "rb")
+        self._file.seek(start)
+        self._remaining = stop - start
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        size = min(len(buffer), self._remaining)
+        if size <= 0:
+            return 0
+        read = self._file.readinto(memoryview(buffer)[:size])
+        self._remaining -= read
+        return read
+
+    def close(self):
+        self._file.close()
+        super().close()
+
+
+def _layout(chunk: pd.DataFrame, index_column: Optional[str]) -> Tuple[Optional[str], List[str], Tuple[str, ...]]:
+    label_col = find_label_column(chunk.columns)
+    excluded = [col for col in (label_col, index_column) if col is not None]
+    numeric = chunk.drop(columns=excluded).select_dtypes(include=[np.number])
+    feature_columns = numeric.columns.tolist()
+    if not feature_columns:
+        raise ValueError("No numeric columns found after filtering")
+    integer_columns = tuple(numeric.select_dtypes(include=[np.integer]).columns)
+    logger.debug(f"Using {len(feature_columns)} numeric features, label column {label_col!r}")
+    return label_col, feature_columns, integer_columns
+
+
+def iter_clean_chunks(
+    csv_path: str,
+    chunk_rows: int = 10000,
+    dtype=np.float32,
+    shard: int = 0,
+    shards: int = 1,
+    index_column: Optional[str] = None,
+) -> Iterator[CleanChunk]:
+    """
+    Yield the cleaned rows of a flow CSV, ``chunk_rows`` input rows at a time.
+
+    The label column is the first whose name contains "label" or "class".
+    The feature columns are the other numeric columns of the file's first
+    chunk, and stay the same for the whole file; stray text in them later
+    on is coerced to NaN. Rows with a NaN or infinite feature, or without a
+    label, are dropped.
+
+    With ``shards > 1`` only this shard's byte range of the file is read
+    (see ``shard_range``), with the columns still taken from the file's
+    first chunk, so every shard yields the same columns. ``index_column`` is
+    left out of the features and its values are passed on as ``index``.
+
     Raises:
         FileNotFoundError: If CSV doesn't exist.
-        ValueError: If no numeric features found or data validation fails.
+        ValueError: If no numeric features found or the CSV can't be parsed.
     """
+    label_col: Optional[str] = None
+    feature_columns: Optional[List[str]] = None
+    integer_columns: Tuple[str, ...] = ()
+    source = None
     try:
-        logger.info(f"Loading data from {csv_path}")
-        df = pd.read_csv(csv_path)
-        logger.debug(f"Loaded {len(df)} rows, {len(df.columns)} columns")
+        if shards > 1:
+            # Every shard uses the columns of the file's first chunk
+            label_col, feature_columns, integer_columns = _layout(pd.read_csv(csv_path, nrows=chunk_rows), index_column)
+            names, start, stop = shard_range(csv_path, shard, shards)
+            if start == stop:
+                return
+            source = io.BufferedReader(_ByteRange(csv_path, start, stop))
+            chunks = pd.read_csv(source, chunksize=chunk_rows, header=None, names=names)
+        else:
+            chunks = pd.read_csv(csv_path, chunksize=chunk_rows)
     except FileNotFoundError as e:
         logger.error(f"CSV file not found: {csv_path}")
         raise FileNotFoundError(f"CSV file not found: {csv_path}") from e
+    except ValueError:
+        raise
     except Exception as e:
         logger.error(f"Error reading CSV: {e}")
         raise ValueError(f"Failed to read CSV: {e}") from e
 
-    # Detect and extract label column
-    label_col: Optional[str] = None
-    for col in df.columns:
-        col_lower = col.lower()
-        if "label" in col_lower or "class" in col_lower:
-            label_col = col
-            logger.debug(f"Found label column: {label_col}")
-            break
+    try:
+        for chunk in chunks:
+            if feature_columns is None:
+                label_col, feature_columns, integer_columns = _layout(chunk, index_column)
 
-    # Extract labels if present
-    labels: Optional[np.ndarray] = None
-    if label_col:
-        labels = df[label_col]
-        df = df.drop(columns=[label_col])
-        logger.debug(f"Extracted labels with {len(np.unique(labels))} unique classes")
-
-    # Keep only numeric columns
-    df = df.select_dtypes(include=[np.number])
-    
-    if df.empty:
+            values = chunk[feature_columns]
+            if not all(pd.api.types.is_numeric_dtype(col_dtype) for col_dtype in values.dtypes):
+                # A later chunk may hold stray text in a numeric column
+                values = values.apply(pd.to_numeric, errors="coerce")
+            values = values.to_numpy(dtype=dtype)
+            keep = np.isfinite(values).all(axis=1)
+            if label_col:
+                keep &= chunk[label_col].notna().to_numpy()
+            yield CleanChunk(
+                np.compress(keep, values, axis=0),
+                chunk[label_col].to_numpy()[keep] if label_col else None,
+                feature_columns,
+                label_col,
+                len(values) - int(keep.sum()),
+                integer_columns,
+                chunk[index_column].to_numpy()[keep] if index_column is not None else None,
+            )
+    except ValueError:
+        raise
+    except Exception as e:
+        logger.error(f"Error reading CSV: {e}")
+        raise ValueError(f"Failed to read CSV: {e}") from e
+    finally:
+        chunks.close()
+        if source is not None:
+            source.close()
+
+    if feature_columns is None:
         raise ValueError("No numeric columns found after filtering")
-    
-    logger.debug(f"Using {len(df.columns)} numeric features")
-
-    # Handle infinity values
-    df = df.replace([np.inf, -np.inf], np.nan)
-    initial_rows = len(df)
-    
-    # Drop NaN values
-    if labels is not None:
-        combined = df.copy()
-        combined["__label__"] = labels
-        combined = combined.dropna()
-        
-        if len(combined) == 0:
-            raise ValueError("All rows dropped after NaN removal")
-
-        labels = combined["__label__"]
-        df = combined.drop(columns=["__label__"])
-        rows_dropped = initial_rows - len(df)
-        logger.info(f"Dropped {rows_dropped} rows with NaN values")
+
+
+def load_features(
+    csv_path: str,
+    chunk_rows: int = 10000,
+    dtype=np.float32,
+    scale: bool = True,
+    cache_dir: Optional[str] = None,
+) -> Tuple[np.ndarray, Optional[np.ndarray], StandardScaler, List[str]]:
+    """
+    Load the numeric features of a flow CSV in chunks, cleaned and scaled.
+
+    Args:
+        csv_path: Path to CSV file.
+        chunk_rows: CSV rows parsed at a time; the parser's buffers for one
+            chunk are most of the memory used beyond the result.
+        dtype: Dtype of the returned feature matrix.
+        scale: Standardize the matrix in place; the scaler is fitted either way.
+        cache_dir: Dataset cache directory; the cleaned rows are copied from
+            its memory-mapped entry for this file, built on first use.
+
+    Returns:
+        Tuple of (features, labels, scaler, feature_columns). Labels are an
+        object array, or None without a label column.
+
+    Raises:
+        FileNotFoundError: If CSV doesn't exist.
+        ValueError: If no numeric features found or data validation fails.
+    """
+    logger.info(f"Loading data from {csv_path}")
+    if cache_dir:
+        # Imported here: the cache is itself built with iter_clean_chunks
+        from rapids.detection.dataset_cache import open_dataset
+
+        dataset = open_dataset(csv_path, cache_dir, chunk_rows=chunk_rows)
+        features = dataset.copy_features(dtype, chunk_rows)
+        labels = dataset.labels()
+        scaler = dataset.scaler()
+        feature_columns = dataset.feature_columns
     else:
-        df = df.dropna()
-        rows_dropped = initial_rows - len(df)
-        logger.info(f"Dropped {rows_dropped} rows with NaN values")
+        try:
+            capacity = count_lines(csv_path) + 1
+        except FileNotFoundError as e:
+            logger.error(f"CSV file not found: {csv_path}")
+            raise FileNotFoundError(f"CSV file not found: {csv_path}") from e
+        features, labels, scaler, feature_columns = _read_features(csv_path, chunk_rows, dtype, capacity)
+    logger.debug(f"Final dataset: {len(features)} samples × {len(feature_columns)} features")
 
-    if len(df) == 0:
-        raise ValueError("No valid data after preprocessing")
+    if scale:
+        np.subtract(features, scaler.mean_.astype(dtype), out=features)
+        np.divide(features, scaler.scale_.astype(dtype), out=features)
+        logger.debug("Features scaled in place using StandardScaler")
+    return features, labels, scaler, feature_columns
 
-    logger.debug(f"Final dataset: {len(df)} samples × {len(df.columns)} features")
 
-    # Scale features
+def _read_features(csv_path, chunk_rows, dtype, capacity):
     scaler = StandardScaler()
-    features = scaler.fit_transform(df)
-    logger.debug(f"Features scaled using StandardScaler")
+    features: Optional[np.ndarray] = None
+    labels: Optional[np.ndarray] = None
+    feature_columns: List[str] = []
+    # One shared string object per distinct label, so each row costs a pointer
+    vocabulary: Dict[object, object] = {}
+    rows = 0
+    dropped = 0
+
+    for chunk in iter_clean_chunks(csv_path, chunk_rows, dtype):
+        if features is None:
+            feature_columns = chunk.feature_columns
+            features = np.empty((capacity, len(feature_columns)), dtype=dtype)
+            if chunk.label_column:
+                labels = np.empty(capacity, dtype=object)
+        dropped += chunk.dropped
+        kept = len(chunk.features)
+        if not kept:
+            continue
+
+        block = features[rows : rows + kept]
+        block[:] = chunk.features
+        scaler.partial_fit(block)
+        if labels is not None:
+            codes, uniques = pd.factorize(chunk.labels)
+            shared = np.array([vocabulary.setdefault(u, u) for u in uniques], dtype=object)
+            labels[rows : rows + kept] = shared[codes]
+        rows += kept
+
+    logger.info(f"Dropped {dropped} rows with NaN values")
+    if rows == 0:
+        raise ValueError("No valid data after preprocessing")
 
+    # Views of the filled rows; the untouched tail was never paged in
+    features = features[:rows]
+    if labels is not None:
+        labels = labels[:rows]
+    return features, labels, scaler, feature_columns
+
+
+def load_and_preprocess(
+    csv_path: str, chunk_rows: int = 10000, cache_dir: Optional[str] = None
+) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Load CSV and preprocess features for anomaly detection.
+
+    Args:
+        csv_path: Path to CSV file.
+        chunk_rows: CSV rows parsed at a time.
+        cache_dir: Dataset cache directory (see :func:`load_features`).
+
+    Returns:
+        Tuple of (scaled_features, labels) where labels may be None; features
+        are float32 (see :func:`load_features`).
+
+    Raises:
+        FileNotFoundError: If CSV doesn't exist.
+        ValueError: If no numeric features found or data validation fails.
+    """
+    features, labels, _, _ = load_features(csv_path, chunk_rows=chunk_rows, cache_dir=cache_dir)
     return features, labels
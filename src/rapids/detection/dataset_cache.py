@@ -0,0 +1,305 @@
+"""On-disk cache of cleaned flow CSVs, shared by every entry point.
+
+Parsing a large flow CSV dominates the start-up of ``rapids offline``,
+``benchmark``, ``train``, ``stream`` and ``replay``. The first run writes the
+cleaned rows (see ``rapids.detection.data_loader.iter_clean_chunks``) to a
+cache entry; later runs memory-map it instead of parsing the CSV::
+
+    <cache_dir>/
+        hashes.json                     content hash per CSV, by size and mtime
+        flows-3f2a9c1e5b7d0a48/
+            features.npy                float64 feature rows, unscaled
+            labels.npy                  int32 codes into meta.json's label vocabulary
+            meta.json                   columns, row count, scaler statistics
+
+An entry is keyed by a hash of the CSV's content and the cleaning
+parameters, so an edited file gets a new entry while renaming or touching
+it does not. The content hash is remembered by file size and modification
+time, so an unchanged file is not hashed again either. Entries are written
+to a temporary directory that is renamed into place, like model artifacts,
+so a reader never sees a half-written entry; stale entries are not removed.
+
+Features are kept as float64, so one entry serves both training (which
+copies them to float32) and the producers, which send the values they
+would have read from the CSV: columns holding only whole numbers are sent
+as integers again. The arrays are sized from the CSV's newline count, like
+``load_features``'s matrix, and the unused tail is never written, so on
+filesystems with sparse files it takes no space.
+"""
+import hashlib
+import json
+import logging
+import os
+import shutil
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import StandardScaler
+
+from rapids.detection.data_loader import count_lines, iter_clean_chunks
+
+logger = logging.getLogger(__name__)
+
+CACHE_FORMAT = 1
+FEATURES_FILE = "features.npy"
+LABELS_FILE = "labels.npy"
+META_FILE = "meta.json"
+HASHES_FILE = "hashes.json"
+# Everything that changes the cached rows; part of every entry's key
+CLEANING = {"format": CACHE_FORMAT, "dtype": "float64", "labels": ["label", "class"], "drop": "non-finite"}
+
+
+def content_hash(csv_path: Union[str, Path], cache_dir: Optional[Union[str, Path]] = None) -> str:
+    """
+    BLAKE2b digest of a file's content.
+
+    With ``cache_dir``, digests are remembered in its ``hashes.json`` by
+    absolute path, size and modification time, and reused while those match.
+    """
+    csv_path = Path(csv_path).resolve()
+    stat = csv_path.stat()
+    stamp = [stat.st_size, stat.st_mtime_ns]
+    index_path = Path(cache_dir) / HASHES_FILE if cache_dir else None
+    index: Dict[str, Any] = {}
+    if index_path is not None and index_path.exists():
+        try:
+            index = json.loads(index_path.read_text())
+        except ValueError:
+            index = {}
+        known = index.get(str(csv_path))
+        if known and known["stamp"] == stamp:
+            return known["hash"]
+
+    digest = hashlib.blake2b(digest_size=16)
+    with open(csv_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    value = digest.hexdigest()
+
+    if index_path is not None:
+        index[str(csv_path)] = {"stamp": stamp, "hash": value}
+        tmp_path = index_path.with_name(f".{HASHES_FILE}.{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(index, indent=2))
+        os.replace(tmp_path, index_path)
+    return value
+
+
+def cache_key(digest: str) -> str:
+    """Entry key for a CSV content digest under the current cleaning parameters."""
+    payload = json.dumps({"content": digest, "cleaning": CLEANING}, sort_keys=True)
+    return hashlib.blake2b(payload.encode(), digest_size=8).hexdigest()
+
+
+class CachedDataset:
+    """
+    A memory-mapped cache entry: cleaned feature rows, labels and metadata.
+
+    ``features`` is a read-only float64 memmap of shape (rows, features);
+    slicing it reads only the pages touched. Pickling keeps just the path,
+    so a dataset can be handed to producer processes, which map it again.
+    """
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        self.path = Path(path)
+        with open(self.path / META_FILE) as f:
+            self.meta: Dict[str, Any] = json.load(f)
+        self.rows: int = self.meta["rows"]
+        self.feature_columns: List[str] = self.meta["feature_columns"]
+        self.label_column: Optional[str] = self.meta["label_column"]
+        self.integer_columns: List[str] = self.meta["integer_columns"]
+        self.features = np.load(self.path / FEATURES_FILE, mmap_mode="r")[: self.rows]
+        self.label_codes = None
+        if self.label_column is not None:
+            self.label_codes = np.load(self.path / LABELS_FILE, mmap_mode="r")[: self.rows]
+
+    def __getstate__(self):
+        return {"path": self.path}
+
+    def __setstate__(self, state):
+        self.__init__(state["path"])
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def labels(self, start: int = 0, stop: Optional[int] = None) -> Optional[np.ndarray]:
+        """Object array of labels for rows ``[start, stop)``; one shared object per distinct label."""
+        if self.label_codes is None:
+            return None
+        vocabulary = np.empty(len(self.meta["labels"]), dtype=object)
+        vocabulary[:] = self.meta["labels"]
+        return vocabulary[self.label_codes[start:stop]]
+
+    def scaler(self) -> StandardScaler:
+        """A StandardScaler fitted on all cached rows, rebuilt from the stored statistics."""
+        stats = self.meta["scaler"]
+        scaler = StandardScaler()
+        scaler.n_features_in_ = len(self.feature_columns)
+        scaler.n_samples_seen_ = stats["n_samples_seen"]
+        scaler.mean_ = np.array(stats["mean"])
+        scaler.var_ = np.array(stats["var"])
+        scaler.scale_ = np.array(stats["scale"])
+        return scaler
+
+    def copy_features(self, dtype=np.float32, chunk_rows: int = 10000) -> np.ndarray:
+        """Writable copy of the features as ``dtype``, converted ``chunk_rows`` at a time."""
+        features = np.empty(self.features.shape, dtype=dtype)
+        for start in range(0, self.rows, chunk_rows):
+            features[start : start + chunk_rows] = self.features[start : start + chunk_rows]
+        return features
+
+    def frame(
+        self, start: int = 0, stop: Optional[int] = None, columns: Optional[List[str]] = None
+    ) -> pd.DataFrame:
+        """Rows ``[start, stop)`` as a DataFrame (only ``columns`` if given), whole-number columns as int64."""
+        values = self.features[start:stop]
+        if columns is None:
+            columns = self.feature_columns
+        else:
+            position = {col: i for i, col in enumerate(self.feature_columns)}
+            missing = [col for col in columns if col not in position]
+            if missing:
+                raise KeyError(f"Columns not in cached dataset: {missing[:5]}")
+            values = values[:, [position[col] for col in columns]]
+        df = pd.DataFrame(values, columns=columns)
+        integer = [col for col in self.integer_columns if col in df.columns]
+        if integer:
+            df = df.astype({col: np.int64 for col in integer})
+        return df
+
+    def iter_frames(
+        self,
+        chunk_rows: int = 100000,
+        max_rows: Optional[int] = None,
+        shard: int = 0,
+        shards: int = 1,
+        columns: Optional[List[str]] = None,
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Yield the rows as DataFrames of at most ``chunk_rows`` rows.
+
+        With ``shards > 1`` only shard ``shard`` of ``shards`` contiguous,
+        near-equal row ranges is read; ``max_rows`` limits this shard.
+        """
+        if not 0 <= shard < shards:
+            raise ValueError(f"shard must be in [0, {shards}), got {shard}")
+        start = self.rows * shard // shards
+        stop = self.rows * (shard + 1) // shards
+        if max_rows:
+            stop = min(stop, start + max_rows)
+        for offset in range(start, stop, chunk_rows):
+            yield self.frame(offset, min(offset + chunk_rows, stop), columns)
+
+
+def build_dataset(csv_path: Union[str, Path], path: Union[str, Path], chunk_rows: int = 10000) -> CachedDataset:
+    """
+    Clean a CSV into a cache entry at ``path``; memory stays bounded by one chunk.
+
+    Raises:
+        FileNotFoundError: If CSV doesn't exist.
+        ValueError: If no numeric features found or no row survives cleaning.
+    """
+    path = Path(path)
+    capacity = count_lines(csv_path) + 1
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    tmp_path.mkdir(parents=True)
+
+    try:
+        scaler = StandardScaler()
+        features = codes = None
+        whole: Optional[np.ndarray] = None
+        vocabulary: Dict[Any, int] = {}
+        rows = dropped = 0
+        for chunk in iter_clean_chunks(csv_path, chunk_rows, dtype=np.float64):
+            if features is None:
+                feature_columns, label_column = chunk.feature_columns, chunk.label_column
+                features = np.lib.format.open_memmap(
+                    tmp_path / FEATURES_FILE, mode="w+", dtype=np.float64, shape=(capacity, len(feature_columns))
+                )
+                if label_column:
+                    codes = np.lib.format.open_memmap(
+                        tmp_path / LABELS_FILE, mode="w+", dtype=np.int32, shape=(capacity,)
+                    )
+                whole = np.ones(len(feature_columns), dtype=bool)
+            dropped += chunk.dropped
+            kept = len(chunk.features)
+            if not kept:
+                continue
+
+            features[rows : rows + kept] = chunk.features
+            scaler.partial_fit(chunk.features)
+            whole &= (np.mod(chunk.features, 1) == 0).all(axis=0)
+            if codes is not None:
+                chunk_codes, uniques = pd.factorize(chunk.labels)
+                mapping = np.array([vocabulary.setdefault(u, len(vocabulary)) for u in uniques], dtype=np.int32)
+                codes[rows : rows + kept] = mapping[chunk_codes]
+            rows += kept
+
+        if rows == 0:
+            raise ValueError("No valid data after preprocessing")
+        features.flush()
+        if codes is not None:
+            codes.flush()
+        del features, codes
+
+        meta = {
+            "format": CACHE_FORMAT,
+            "source": str(Path(csv_path).resolve()),
+            "cleaning": CLEANING,
+            "rows": rows,
+            "dropped": dropped,
+            "feature_columns": feature_columns,
+            "label_column": label_column,
+            "labels": [label.item() if isinstance(label, np.generic) else label for label in vocabulary],
+            "integer_columns": [col for col, is_whole in zip(feature_columns, whole) if is_whole],
+            "scaler": {
+                "n_samples_seen": int(scaler.n_samples_seen_),
+                "mean": scaler.mean_.tolist(),
+                "var": scaler.var_.tolist(),
+                "scale": scaler.scale_.tolist(),
+            },
+        }
+        with open(tmp_path / META_FILE, "w") as f:
+            json.dump(meta, f, indent=2)
+        try:
+            os.replace(tmp_path, path)
+        except OSError:
+            # Another process finished the same entry first
+            if not (path / META_FILE).exists():
+                raise
+            shutil.rmtree(tmp_path, ignore_errors=True)
+    except BaseException:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
+
+    logger.info(f"Cached {rows} rows of {csv_path} at {path} ({dropped} dropped)")
+    return CachedDataset(path)
+
+
+def dataset_path(csv_path: Union[str, Path], cache_dir: Union[str, Path]) -> Path:
+    """Directory of the cache entry for a CSV's current content."""
+    if not Path(csv_path).exists():
+        raise FileNotFoundError(f"CSV file not found: {csv_path}")
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    return cache_dir / f"{Path(csv_path).stem}-{cache_key(content_hash(csv_path, cache_dir))}"
+
+
+def open_dataset(
+    csv_path: Union[str, Path], cache_dir: Union[str, Path], chunk_rows: int = 10000
+) -> CachedDataset:
+    """
+    Map the cache entry for a CSV, building it first if it does not exist yet.
+
+    Raises:
+        FileNotFoundError: If CSV doesn't exist.
+        ValueError: If no numeric features found or no row survives cleaning.
+    """
+    path = dataset_path(csv_path, cache_dir)
+    if (path / META_FILE).exists():
+        logger.info(f"Loading cached dataset {path}")
+        return CachedDataset(path)
+    logger.info(f"Caching {csv_path} at {path}")
+    return build_dataset(csv_path, path, chunk_rows)
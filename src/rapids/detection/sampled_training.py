@@ -0,0 +1,206 @@
+"""Out-of-core training: fit the detector on a reservoir sample of a capture.
+
+IsolationForest only looks at ``max_samples`` rows per tree, so holding a
+multi-GB capture's scaled matrix in memory buys nothing over a large enough
+uniform sample. :class:`TrainingSampler` streams the capture's cleaned
+chunks once, keeps a reservoir sample of the raw rows (one
+:class:`FlowReservoir` per label with ``stratify=True``; the streaming
+retrainer samples live flows with it too) and the running scaler
+statistics of every row. The model is trained on the scaled sample, so training memory depends
+on ``sample_size`` and not on the capture's size; the scaler is still the
+full-data one.
+"""
+import logging
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import StandardScaler
+
+from rapids.detection.anomaly_model import train_isolation_forest
+from rapids.detection.data_loader import iter_clean_chunks
+from rapids.detection.dataset_cache import open_dataset
+
+logger = logging.getLogger(__name__)
+
+
+class FlowReservoir:
+    """
+    Uniform sample of the raw feature rows seen since the last :meth:`rewind`.
+
+    Rows are sampled with Algorithm R, a whole batch at a time. The buffer is
+    allocated on the first batch, so the reservoir needs no column count up
+    front. After :meth:`rewind` new rows first overwrite the previous sample
+    in order, then are sampled again, so the reservoir always holds the most
+    recent window it can and never empties.
+    """
+
+    def __init__(self, capacity: int, seed: Optional[int] = None) -> None:
+        if capacity < 1:
+            raise ValueError("Reservoir capacity must be at least 1")
+        self.capacity = capacity
+        self.size = 0
+        self.seen = 0
+        self._rows: Optional[np.ndarray] = None
+        self._rng = np.random.default_rng(seed)
+
+    def add(self, features: np.ndarray) -> None:
+        """Offer a batch of raw feature rows to the reservoir (rows are copied)."""
+        count = len(features)
+        if count == 0:
+            return
+        if self._rows is None:
+            self._rows = np.empty((self.capacity, features.shape[1]), dtype=np.float64)
+
+        positions = self.seen + np.arange(count)
+        slots = np.where(positions < self.capacity, positions, self._rng.integers(0, positions + 1))
+        keep = slots < self.capacity
+        self._rows[slots[keep]] = features[keep]
+        self.seen += count
+        self.size = max(self.size, min(self.seen, self.capacity))
+
+    def snapshot(self) -> np.ndarray:
+        """Copy of the current sample."""
+        if self._rows is None:
+            return np.empty((0, 0))
+        return self._rows[: self.size].copy()
+
+    def rewind(self) -> None:
+        """Start sampling a new window; the current rows stay until overwritten."""
+        self.seen = 0
+
+
+class SampledModel(NamedTuple):
+    """A detector trained on a reservoir sample, with what the sample covered."""
+
+    model: object
+    scaler: StandardScaler
+    feature_columns: List[str]
+    rows_seen: int
+    sample_rows: int
+    sample: np.ndarray
+
+
+class TrainingSampler:
+    """
+    Reservoir sample and scaler statistics of a stream of raw feature chunks.
+
+    Without ``stratify`` the sample is uniform over all rows. With it, each
+    label gets its own reservoir of ``sample_size`` rows and :meth:`sample`
+    draws from them in proportion to how often each label was seen, so the
+    sample's label mix matches the capture's exactly rather than on average.
+    Memory is then bounded by ``sample_size`` rows per label.
+    """
+
+    def __init__(self, sample_size: int = 100000, stratify: bool = False, seed: Optional[int] = None) -> None:
+        if sample_size < 1:
+            raise ValueError("sample_size must be at least 1")
+        self.sample_size = sample_size
+        self.stratify = stratify
+        self.scaler = StandardScaler()
+        self.rows_seen = 0
+        self._seed = seed
+        self._rng = np.random.default_rng(seed)
+        self._reservoirs: Dict[object, FlowReservoir] = {}
+
+    def _reservoir(self, key) -> FlowReservoir:
+        reservoir = self._reservoirs.get(key)
+        if reservoir is None:
+            seed = None if self._seed is None else self._seed + len(self._reservoirs)
+            reservoir = self._reservoirs[key] = FlowReservoir(self.sample_size, seed=seed)
+        return reservoir
+
+    def add(self, features: np.ndarray, labels: Optional[np.ndarray] = None) -> None:
+        """Offer a chunk of clean raw feature rows, and with ``stratify`` their labels."""
+        if len(features) == 0:
+            return
+        self.scaler.partial_fit(features)
+        self.rows_seen += len(features)
+        if not self.stratify:
+            self._reservoir(None).add(features)
+            return
+        if labels is None:
+            raise ValueError("A stratified sample needs labels")
+        codes, uniques = pd.factorize(labels)
+        for code, label in enumerate(uniques):
+            self._reservoir(label).add(features[codes == code])
+
+    @property
+    def label_counts(self) -> Dict[object, int]:
+        """Rows seen per label (stratified samples only)."""
+        return {label: reservoir.seen for label, reservoir in self._reservoirs.items() if label is not None}
+
+    def sample(self) -> np.ndarray:
+        """The raw sample: up to ``sample_size`` rows, in proportion to each label's share."""
+        if not self.rows_seen:
+            raise ValueError("No valid data after preprocessing")
+        if not self.stratify:
+            return self._reservoirs[None].snapshot()
+
+        parts = []
+        for reservoir in self._reservoirs.values():
+            share = min(reservoir.size, max(1, round(self.sample_size * reservoir.seen / self.rows_seen)))
+            rows = reservoir.snapshot()
+            parts.append(rows[self._rng.choice(len(rows), size=share, replace=False)])
+        return np.concatenate(parts)
+
+
+def iter_raw_chunks(
+    csv_path: str, chunk_rows: int = 10000, cache_dir: Optional[str] = None
+) -> Iterable[Tuple[np.ndarray, Optional[np.ndarray], List[str]]]:
+    """Yield ``(features, labels, feature_columns)`` of a capture's clean float64 rows, a chunk at a time."""
+    if cache_dir:
+        dataset = open_dataset(csv_path, cache_dir, chunk_rows=chunk_rows)
+        for start in range(0, len(dataset), chunk_rows):
+            stop = start + chunk_rows
+            yield dataset.features[start:stop], dataset.labels(start, stop), dataset.feature_columns
+        return
+    for chunk in iter_clean_chunks(csv_path, chunk_rows, dtype=np.float64):
+        yield chunk.features, chunk.labels, chunk.feature_columns
+
+
+def train_sampled(
+    source: Union[str, Path, Iterable[Tuple[np.ndarray, Optional[np.ndarray], List[str]]]],
+    sample_size: int = 100000,
+    stratify: bool = False,
+    contamination: float = 0.20,
+    n_jobs: int = -1,
+    chunk_rows: int = 10000,
+    cache_dir: Optional[str] = None,
+    seed: Optional[int] = 42,
+) -> SampledModel:
+    """
+    Train the scaler and IsolationForest in one pass over a capture of any size.
+
+    Args:
+        source: Flow CSV path, or an iterable of ``(features, labels,
+            feature_columns)`` chunks as from :func:`iter_raw_chunks`.
+        sample_size: Rows the model is trained on; with ``stratify`` each
+            label's reservoir holds up to this many while streaming.
+        stratify: Keep the sample's label mix equal to the capture's.
+        contamination: Expected proportion of anomalies.
+        n_jobs: Cores used to build the trees (-1 for all).
+        chunk_rows: Rows read at a time from a CSV or cache entry.
+        cache_dir: Dataset cache directory for a CSV ``source``.
+        seed: Seed of the reservoir sampling.
+
+    Returns:
+        SampledModel with the model, the full-data scaler, the columns and
+        the raw sample.
+
+    Raises:
+        ValueError: If no row survives cleaning, or ``stratify`` is set
+            for a capture without labels.
+    """
+    if isinstance(source, (str, Path)):
+        source = iter_raw_chunks(source, chunk_rows, cache_dir)
+    sampler = TrainingSampler(sample_size, stratify=stratify, seed=seed)
+    feature_columns: List[str] = []
+    for features, labels, feature_columns in source:
+        sampler.add(features, labels)
+
+    sample = sampler.sample()
+    model = train_isolation_forest(sampler.scaler.transform(sample), contamination=contamination, n_jobs=n_jobs)
+    logger.info(f"Trained on a {len(sample)}-row sample of {sampler.rows_seen} flows")
+    return SampledModel(model, sampler.scaler, feature_columns, sampler.rows_seen, len(sample), sample)
@@ -5,42 +5,41 @@ from typing import Dict, Optional, Tuple
 
 import numpy as np
 import pandas as pd
+from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
 
 from rapids.detection.anomaly_model import train_isolation_forest, train_test_evaluation
+from rapids.detection.array_forest import ArrayIsolationForest
+from rapids.detection.artifact import load_artifact
+from rapids.detection.cascade import CascadeIsolationForest
+from rapids.detection.data_loader import iter_clean_chunks
+from rapids.detection.dataset_cache import open_dataset
+from rapids.detection.sampled_training import train_sampled
 from rapids.evaluation.model_evaluation import AnomalyDetectorEvaluator
 from rapids.reasoning.engine import ReasoningEngine
 
 
-def load_dataset(csv_path: str, max_rows: Optional[int] = None) -> Tuple[pd.DataFrame, Optional[np.ndarray]]:
-    df = pd.read_csv(csv_path)
-    if max_rows:
-        df = df.head(max_rows)
-
-    label_col = None
-    for col in df.columns:
-        col_lower = col.lower()
-        if "label" in col_lower or "class" in col_lower:
-            label_col = col
+def load_dataset(
+    csv_path: str, max_rows: Optional[int] = None, cache_dir: Optional[str] = None
+) -> Tuple[pd.DataFrame, Optional[np.ndarray]]:
+    # max_rows counts clean rows, read from the cache or cleaned by iter_clean_chunks
+    if cache_dir:
+        dataset = open_dataset(csv_path, cache_dir)
+        labels = dataset.labels(0, max_rows or None)
+        return dataset.frame(0, max_rows or None), None if labels is None else pd.Series(labels)
+
+    chunks = []
+    rows = 0
+    for chunk in iter_clean_chunks(csv_path, dtype=np.float64):
+        chunks.append(chunk)
+        rows += len(chunk.features)
+        if max_rows and rows >= max_rows:
             break
-
+    features = np.concatenate([chunk.features for chunk in chunks])[: max_rows or None]
+    df = chunks[0]._replace(features=features).frame()
     labels = None
-    if label_col:
-        labels = df[label_col]
-        df = df.drop(columns=[label_col])
-
-    df = df.select_dtypes(include=[np.number])
-    df = df.replace([np.inf, -np.inf], np.nan)
-
-    if labels is not None:
-        combined = df.copy()
-        combined["__label__"] = labels
-        combined = combined.dropna()
-        labels = combined["__label__"].reset_index(drop=True)
-        df = combined.drop(columns=["__label__"]).reset_index(drop=True)
-    else:
-        df = df.dropna().reset_index(drop=True)
-
+    if chunks[0].label_column:
+        labels = pd.Series(np.concatenate([chunk.labels for chunk in chunks])[: max_rows or None])
     return df, labels
 
 
@@ -55,7 +54,7 @@ def benchmark_detection(model, scaler, df_features, batch_size=256):
     for i in range(0, total, batch_size):
         batch = df_features.iloc[i : i + batch_size].values
         batch_start = time.perf_counter()
-        features = scaler.transform(batch)
+        features = batch if scaler is None else scaler.transform(batch)
         _ = model.predict(features)
         batch_time = time.perf_counter() - batch_start
         per_flow = batch_time / max(len(batch), 1)
@@ -76,6 +75,153 @@ def benchmark_detection(model, scaler, df_features, batch_size=256):
     }
 
 
+def compare_scorers(model, scaler, df_features, batch_size=256):
+    """
+    Benchmark a fitted IsolationForest against its ArrayIsolationForest,
+    with and without ``scaler`` fused into the thresholds.
+
+    Returns:
+        Detection benchmarks for the three scorers, the array scorers'
+        speedups over scikit-learn, and their largest decision_function
+        difference and label agreement with it.
+    """
+    if len(df_features) == 0:
+        return None
+    array_model = ArrayIsolationForest.from_sklearn(model)
+    fused_model = array_model.fuse_scaler(scaler)
+    raw = df_features.values
+    features = scaler.transform(raw)
+    expected = model.decision_function(features)
+    labels = model.predict(features)
+
+    runs = {
+        "sklearn": benchmark_detection(model, scaler, df_features, batch_size=batch_size),
+        "array": benchmark_detection(array_model, scaler, df_features, batch_size=batch_size),
+        "fused": benchmark_detection(fused_model, None, df_features, batch_size=batch_size),
+    }
+    baseline = runs["sklearn"]["throughput_fps"]
+    report = dict(runs)
+    for name, scorer, X in (("array", array_model, features), ("fused", fused_model, raw)):
+        report[f"{name}_speedup"] = runs[name]["throughput_fps"] / baseline if baseline else None
+        report[f"{name}_max_score_diff"] = float(np.max(np.abs(expected - scorer.decision_function(X))))
+        report[f"{name}_label_agreement"] = float(np.mean(labels == scorer.predict(X)))
+    return report
+
+
+def compare_cascade(model, scaler, df_features, labels=None, batch_size=256, first_trees=10, max_miss=0.01):
+    """
+    Benchmark a CascadeIsolationForest against the full array scorer it wraps.
+
+    The cascade is calibrated on 70% of the rows and measured on the other
+    30%, on all holdout rows and on the benign ones alone (the traffic it
+    is meant for).
+
+    Returns:
+        Holdout benchmarks and speedups for all and benign flows, the share
+        of flows the first stage cleared, the share of the full model's
+        anomalies it cleared anyway, and, with labels, both models' recall
+        on attack flows and the cascade's recall loss.
+    """
+    if len(df_features) < 10:
+        return None
+    forest = ArrayIsolationForest.from_sklearn(model)
+    label_values = np.asarray(labels) if labels is not None else np.zeros(len(df_features), dtype=np.int8)
+    train, holdout, _, holdout_labels = train_test_split(
+        df_features, label_values, test_size=0.3, random_state=42
+    )
+    cascade = CascadeIsolationForest.calibrate(forest, scaler.transform(train.values), first_trees, max_miss)
+
+    features = scaler.transform(holdout.values)
+    full_preds = forest.predict(features)
+    cascade_preds = cascade.predict(features)
+    _, estimate = cascade.first_stage(features)
+    flagged = full_preds == -1
+    report = {
+        "first_trees": first_trees,
+        "margin": cascade.margin,
+        "holdout_rows": len(holdout),
+        "cleared_fraction": float(np.mean(estimate > cascade.margin)),
+        "missed_anomalies": float(np.mean(cascade_preds[flagged] == 1)) if flagged.any() else 0.0,
+    }
+
+    benign = np.ones(len(holdout), dtype=bool)
+    if labels is not None:
+        attack = np.array([str(label).upper() != "BENIGN" for label in holdout_labels])
+        benign = ~attack
+        if attack.any():
+            report["recall_full"] = float(np.mean(full_preds[attack] == -1))
+            report["recall_cascade"] = float(np.mean(cascade_preds[attack] == -1))
+            report["recall_loss"] = report["recall_full"] - report["recall_cascade"]
+
+    for name, rows in (("all", holdout), ("benign", holdout[benign])):
+        runs = {
+            "array": benchmark_detection(forest, scaler, rows, batch_size=batch_size),
+            "cascade": benchmark_detection(cascade, scaler, rows, batch_size=batch_size),
+        }
+        report[name] = runs
+        if runs["array"] is not None and runs["array"]["throughput_fps"]:
+            report[f"{name}_speedup"] = runs["cascade"]["throughput_fps"] / runs["array"]["throughput_fps"]
+    return report
+
+
+def _score_agreement(expected_model, expected_scaler, model, scaler, raw):
+    expected_features, features = expected_scaler.transform(raw), scaler.transform(raw)
+    expected = expected_model.decision_function(expected_features)
+    diff = np.abs(expected - model.decision_function(features))
+    return {
+        "mean_abs_score_diff": float(np.mean(diff)),
+        "max_abs_score_diff": float(np.max(diff)),
+        "score_correlation": float(np.corrcoef(expected, model.decision_function(features))[0, 1]),
+        "label_agreement": float(np.mean(expected_model.predict(expected_features) == model.predict(features))),
+    }
+
+
+def compare_sampled_training(
+    df_features, labels=None, sample_size=None, stratify=False, contamination=0.20, chunk_rows=1000
+):
+    """
+    Compare a model trained on a streamed reservoir sample with one trained on all rows.
+
+    The rows are split 70/30. The full-data model is trained on the whole
+    training part; the sampled one (see ``rapids.detection.sampled_training``)
+    sees the same rows ``chunk_rows`` at a time and keeps ``sample_size`` of
+    them (default a tenth, at least 256). Both are scored on the holdout. As
+    a yardstick, ``seed_reference`` compares the full-data model with a
+    second full-data model that differs only in its random seed.
+
+    Returns:
+        Row counts and, for the sampled model and the seed reference, the
+        mean and largest decision_function difference from the full-data
+        model on the holdout, the correlation of the scores and the share of
+        identical labels.
+    """
+    if len(df_features) < 10:
+        return None
+    raw = df_features.values.astype(np.float64)
+    stratify = stratify and labels is not None
+    label_values = np.asarray(labels) if labels is not None else np.zeros(len(raw), dtype=np.int8)
+    train, holdout, train_labels, _ = train_test_split(raw, label_values, test_size=0.3, random_state=42)
+    sample_size = sample_size or max(256, len(train) // 10)
+
+    scaler = StandardScaler().fit(train)
+    full = train_isolation_forest(scaler.transform(train), contamination=contamination)
+    reference = train_isolation_forest(scaler.transform(train), contamination=contamination, random_state=7)
+    chunks = (
+        (train[i : i + chunk_rows], train_labels[i : i + chunk_rows], list(df_features.columns))
+        for i in range(0, len(train), chunk_rows)
+    )
+    sampled = train_sampled(chunks, sample_size=sample_size, stratify=stratify, contamination=contamination)
+
+    return {
+        "train_rows": len(train),
+        "holdout_rows": len(holdout),
+        "sample_rows": sampled.sample_rows,
+        "stratified": stratify,
+        "sample": _score_agreement(full, scaler, sampled.model, sampled.scaler, holdout),
+        "seed_reference": _score_agreement(full, scaler, reference, scaler, holdout),
+    }
+
+
 def false_positive_stress(model, scaler, df_features, labels, batch_size=256):
     if labels is None:
         return None
@@ -90,7 +236,7 @@ def false_positive_stress(model, scaler, df_features, labels, batch_size=256):
 
     for i in range(0, total, batch_size):
         batch = benign_df.iloc[i : i + batch_size].values
-        features = scaler.transform(batch)
+        features = batch if scaler is None else scaler.transform(batch)
         preds = model.predict(features)
         false_positives += int(np.sum(preds == -1))
 
@@ -125,7 +271,13 @@ def attack_path_accuracy(df_features, labels, host_count=20, max_hops=3):
     }
 
 
-def build_report(csv_path: str, max_rows: int, batch_size: int) -> Dict:
+def build_report(
+    csv_path: str,
+    max_rows: int,
+    batch_size: int,
+    model_path: Optional[str] = None,
+    cache_dir: Optional[str] = None,
+) -> Dict:
     """
     Build comprehensive benchmark report with cross-validation and baselines.
     
@@ -133,18 +285,33 @@ def build_report(csv_path: str, max_rows: int, batch_size: int) -> Dict:
         csv_path: Path to dataset CSV.
         max_rows: Maximum rows to use.
         batch_size: Batch size for inference.
+        model_path: Model artifact (version or root) to benchmark instead of
+            a model trained here; evaluation metrics still train their own.
+        cache_dir: Dataset cache directory; rows are read from the cache
+            entry for ``csv_path`` instead of parsing the CSV.
         
     Returns:
         Dictionary with complete evaluation results.
     """
-    df_features, labels = load_dataset(csv_path, max_rows=max_rows)
+    df_features, labels = load_dataset(csv_path, max_rows=max_rows, cache_dir=cache_dir)
 
     scaler = StandardScaler()
     features = scaler.fit_transform(df_features.values)
-    model = train_isolation_forest(features, contamination=0.20)
+    model_version = None
+    if model_path:
+        artifact = load_artifact(model_path, scorer="sklearn")
+        artifact.check_columns(df_features.columns)
+        model, scaler, model_version = artifact.model, artifact.scaler, artifact.version
+        df_model = df_features[artifact.feature_columns]
+    else:
+        model = train_isolation_forest(features, contamination=0.20)
+        df_model = df_features
 
     # Benchmark detection throughput and latency
-    detection = benchmark_detection(model, scaler, df_features, batch_size=batch_size)
+    detection = benchmark_detection(model, scaler, df_model, batch_size=batch_size)
+    scorer = compare_scorers(model, scaler, df_model, batch_size=batch_size)
+    sampled_training = compare_sampled_training(df_features, labels)
+    cascade = compare_cascade(model, scaler, df_model, labels, batch_size=batch_size)
     
     # Detection metrics with standard train/test
     detection_metrics = None
@@ -177,7 +344,7 @@ def build_report(csv_path: str, max_rows: int, batch_size: int) -> Dict:
             baselines["isolation_forest_default"] = {"error": str(e)}
     
     # False positive stress test
-    false_pos = false_positive_stress(model, scaler, df_features, labels, batch_size=batch_size)
+    false_pos = false_positive_stress(model, scaler, df_model, labels, batch_size=batch_size)
     
     # Attack path accuracy
     attack_paths = attack_path_accuracy(df_features, labels)
@@ -185,8 +352,12 @@ def build_report(csv_path: str, max_rows: int, batch_size: int) -> Dict:
     return {
         "dataset": csv_path,
         "rows_used": len(df_features),
+        "model_version": model_version,
         "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
         "detection": detection,
+        "scorer": scorer,
+        "sampled_training": sampled_training,
+        "cascade": cascade,
         "detection_metrics": detection_metrics,
         "cross_validation": cv_metrics,
         "baselines": baselines,
@@ -201,9 +372,10 @@ def main():
     parser.add_argument("--max-rows", type=int, default=5000)
     parser.add_argument("--batch-size", type=int, default=256)
     parser.add_argument("--output", default="evaluation/benchmark_report.json")
+    parser.add_argument("--model", default=None, help="Model artifact to benchmark")
     args = parser.parse_args()
 
-    report = build_report(args.dataset, args.max_rows, args.batch_size)
+    report = build_report(args.dataset, args.max_rows, args.batch_size, args.model)
 
     with open(args.output, "w") as f:
         json.dump(report, f, indent=2)
@@ -1,10 +1,13 @@
 import numpy as np
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
-from rapids.detection.anomaly_model import train_test_evaluation
+from sklearn.preprocessing import StandardScaler
+from rapids.detection.anomaly_model import train_isolation_forest
+from rapids.detection.artifact import save_artifact
+from rapids.evaluation.sweep import feature_tasks, run_sweep
 
 
-def feature_impact_experiment(features, labels, feature_counts):
+def rank_features(features, labels):
     # Convert labels to binary
     labels_binary = np.where(labels != "BENIGN", 1, 0)
 
@@ -13,16 +16,89 @@ def feature_impact_experiment(features, labels, feature_counts):
     rf.fit(features, labels_binary)
 
     importances = rf.feature_importances_
-    ranked_indices = np.argsort(importances)[::-1]
+    return np.argsort(importances)[::-1]
 
-    results = []
 
-    for count in feature_counts:
-        selected = ranked_indices[:count]
-        reduced_features = features[:, selected]
+def feature_impact_experiment(features, labels, feature_counts, workers=1, threads_per_worker=None):
+    # One configuration per count, run concurrently with workers > 1 (see rapids.evaluation.sweep)
+    tasks = feature_tasks(rank_features(features, labels), feature_counts)
+    return run_sweep(features, labels, tasks, workers=workers, threads_per_worker=threads_per_worker)
 
-        metrics = train_test_evaluation(reduced_features, labels)
-        metrics["feature_count"] = count
-        results.append(metrics)
 
-    return results
+def select_feature_subset(results, tolerance=0.01):
+    """
+    Pick the smallest feature subset whose F1 is within ``tolerance`` of the largest one's.
+
+    Args:
+        results: Output of ``feature_impact_experiment``; the result with the
+            most features is the reference.
+        tolerance: F1 the reduced model may lose against the reference.
+
+    Returns:
+        The chosen result, with its ``feature_indices``.
+
+    Raises:
+        ValueError: If ``results`` is empty or ``tolerance`` is negative.
+    """
+    if not results:
+        raise ValueError("No feature impact results to select from")
+    if tolerance < 0:
+        raise ValueError(f"tolerance cannot be negative, got {tolerance}")
+    reference = max(results, key=lambda r: r["feature_count"])
+    within = [r for r in results if r["f1_score"] >= reference["f1_score"] - tolerance]
+    return min(within, key=lambda r: r["feature_count"])
+
+
+def subset_scaler(scaler, indices):
+    """A fitted StandardScaler for the ``indices`` columns of ``scaler``'s input."""
+    indices = np.asarray(indices)
+    subset = StandardScaler()
+    subset.n_features_in_ = len(indices)
+    subset.n_samples_seen_ = scaler.n_samples_seen_
+    subset.mean_ = scaler.mean_[indices]
+    subset.var_ = scaler.var_[indices]
+    subset.scale_ = scaler.scale_[indices]
+    return subset
+
+
+def save_reduced_model(
+    root,
+    features,
+    scaler,
+    feature_columns,
+    selected,
+    contamination=0.20,
+    fuse_scaler=False,
+    metadata=None,
+):
+    """
+    Train the detector on a selected feature subset and save it as a model artifact.
+
+    Args:
+        root: Artifact root directory.
+        features: Scaled feature matrix with every column of ``feature_columns``.
+        scaler: Scaler fitted on all of ``feature_columns``.
+        feature_columns: Ordered columns of ``features``.
+        selected: Result chosen by ``select_feature_subset``.
+        contamination: Expected proportion of anomalies.
+        fuse_scaler: Fold the subset scaler into the saved array scorer.
+        metadata: Extra details for the manifest; the selection is added
+            under ``feature_selection``.
+
+    Returns:
+        Path of the saved artifact version, which scores only the subset.
+    """
+    indices = selected["feature_indices"]
+    model = train_isolation_forest(features[:, indices], contamination=contamination)
+    selection = {
+        key: selected[key] for key in ("feature_count", "precision", "recall", "f1_score", "false_positive_rate")
+    }
+    selection["of_features"] = len(feature_columns)
+    return save_artifact(
+        root,
+        model,
+        subset_scaler(scaler, indices),
+        [feature_columns[i] for i in indices],
+        metadata={**(metadata or {}), "contamination": contamination, "feature_selection": selection},
+        fuse_scaler=fuse_scaler,
+    )
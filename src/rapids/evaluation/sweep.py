@@ -0,0 +1,180 @@
+"""Run experiment sweeps concurrently over one shared train/test split.
+
+A feature-count or contamination sweep trains and evaluates one
+IsolationForest per configuration. Run one after another, every
+configuration re-splits the data and copies it. :func:`run_sweep` computes
+the stratified split once and copies the train and test rows once into
+shared memory blocks (see :class:`SharedArray`). It then evaluates the
+configurations on a process pool, whose workers map those blocks rather
+than receive copies. A configuration on all features trains on the shared
+rows directly; a feature subset copies only its own columns.
+
+Each worker builds its trees with ``threads_per_worker`` threads and caps
+the BLAS/OpenMP pools to the same number, so ``workers * threads_per_worker``
+bounds the cores in use. With enough cores the sweep takes about as long as
+its slowest configuration. Results are the same as the serial
+``train_test_evaluation`` gives for each configuration.
+"""
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+from threadpoolctl import threadpool_limits
+
+from rapids.detection.anomaly_model import evaluate_split, stratified_split
+
+logger = logging.getLogger(__name__)
+
+
+class SharedArray:
+    """
+    A numpy array in a named shared memory block.
+
+    Pickling keeps just the block's name, shape and dtype, so an array can
+    be handed to pool workers, which map the same block. Every process
+    closes its own mapping with :meth:`close` once done with ``array``,
+    and the creating process, which owns the block, then :meth:`unlink` s it.
+    """
+
+    def __init__(self, shape: Tuple[int, ...], dtype, name: Optional[str] = None) -> None:
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        size = max(1, int(np.prod(self.shape)) * self.dtype.itemsize)
+        self._shm = shared_memory.SharedMemory(name=name, create=name is None, size=size if name is None else 0)
+        self.array = np.ndarray(self.shape, dtype=self.dtype, buffer=self._shm.buf)
+
+    @classmethod
+    def copy_of(cls, array: np.ndarray) -> "SharedArray":
+        """A new shared block holding a copy of ``array``."""
+        shared = cls(array.shape, array.dtype)
+        shared.array[...] = array
+        return shared
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    def __getstate__(self):
+        return {"name": self.name, "shape": self.shape, "dtype": self.dtype.str}
+
+    def __setstate__(self, state):
+        self.__init__(state["shape"], state["dtype"], name=state["name"])
+
+    def close(self) -> None:
+        """Drop this process's mapping; ``array`` must not be used afterwards."""
+        del self.array
+        self._shm.close()
+
+    def unlink(self) -> None:
+        """Free the block once every process has closed it (owner only)."""
+        self._shm.unlink()
+
+
+class SweepTask(NamedTuple):
+    """One configuration of a sweep: the features and contamination to evaluate."""
+
+    feature_indices: Optional[Tuple[int, ...]]
+    contamination: float
+    params: Dict[str, Any]
+
+
+def feature_tasks(ranked_indices: Sequence[int], feature_counts: Sequence[int], contamination: float = 0.20):
+    """Tasks evaluating the top ``count`` of ``ranked_indices`` for each feature count."""
+    tasks = []
+    for count in feature_counts:
+        selected = tuple(int(i) for i in ranked_indices[:count])
+        # Counts beyond the number of features select them all
+        params = {"feature_count": len(selected), "feature_indices": list(selected)}
+        tasks.append(SweepTask(selected, contamination, params))
+    return tasks
+
+
+def contamination_tasks(levels: Sequence[float], feature_indices: Optional[Sequence[int]] = None):
+    """Tasks evaluating each contamination level, on all features by default."""
+    indices = tuple(feature_indices) if feature_indices is not None else None
+    return [SweepTask(indices, level, {"contamination": level}) for level in levels]
+
+
+def _evaluate(X_train, X_test, y_test, task: SweepTask, n_jobs: int) -> Dict[str, Any]:
+    if task.feature_indices is not None:
+        columns = list(task.feature_indices)
+        X_train, X_test = X_train[:, columns], X_test[:, columns]
+    metrics = evaluate_split(X_train, X_test, y_test, contamination=task.contamination, n_jobs=n_jobs)
+    metrics.update(task.params)
+    return metrics
+
+
+def _run_task(train: SharedArray, test: SharedArray, y_test: SharedArray, task: SweepTask, threads: int):
+    try:
+        with threadpool_limits(threads):
+            return _evaluate(train.array, test.array, y_test.array, task, threads)
+    finally:
+        for shared in (train, test, y_test):
+            shared.close()
+
+
+def run_sweep(
+    features: np.ndarray,
+    labels: np.ndarray,
+    tasks: Sequence[SweepTask],
+    workers: Optional[int] = 1,
+    threads_per_worker: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Evaluate every task on one stratified split, ``workers`` at a time.
+
+    Args:
+        features: Feature matrix (n_samples, n_features).
+        labels: Labels (BENIGN or ATTACK).
+        tasks: Configurations, e.g. from :func:`feature_tasks` and
+            :func:`contamination_tasks`.
+        workers: Worker processes; None for one per task, up to the cores
+            available to ``threads_per_worker`` threads each. 1 evaluates
+            the tasks in this process, one after another.
+        threads_per_worker: Tree-building and BLAS threads per task; None
+            shares the cores evenly between the workers.
+
+    Returns:
+        Each task's metrics (as ``train_test_evaluation``) with its
+        ``params``, in task order.
+
+    Raises:
+        ValueError: If ``workers`` or ``threads_per_worker`` is below 1.
+    """
+    if not tasks:
+        return []
+    cpus = os.cpu_count() or 1
+    if workers is None:
+        workers = min(len(tasks), max(1, cpus // (threads_per_worker or 1)))
+    if workers < 1:
+        raise ValueError(f"workers must be at least 1, got {workers}")
+    workers = min(workers, len(tasks))
+    if threads_per_worker is None:
+        threads_per_worker = max(1, cpus // workers)
+    if threads_per_worker < 1:
+        raise ValueError(f"threads_per_worker must be at least 1, got {threads_per_worker}")
+
+    train_rows, test_rows, _, y_test = stratified_split(labels)
+    if workers == 1:
+        X_train, X_test = features[train_rows], features[test_rows]
+        with threadpool_limits(threads_per_worker):
+            return [_evaluate(X_train, X_test, y_test, task, threads_per_worker) for task in tasks]
+
+    shared = []
+    try:
+        for rows in (train_rows, test_rows):
+            block = SharedArray((len(rows), features.shape[1]), features.dtype)
+            shared.append(block)
+            np.take(features, rows, axis=0, out=block.array)
+        shared.append(SharedArray.copy_of(y_test))
+        logger.info(f"Sweeping {len(tasks)} configurations on {workers} workers x {threads_per_worker} threads")
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_run_task, *shared, task, threads_per_worker) for task in tasks]
+            return [future.result() for future in futures]
+    finally:
+        for block in shared:
+            block.close()
+            block.unlink()
@@ -1,8 +1,9 @@
 from rapids.core.config_loader import load_config
 from rapids.core.logger import setup_logger, log_event
-from rapids.detection.data_loader import load_and_preprocess
+from rapids.detection.data_loader import load_features
 from rapids.detection.anomaly_model import train_test_evaluation
-from rapids.evaluation.feature_analysis import feature_impact_experiment
+from rapids.evaluation.feature_analysis import rank_features, save_reduced_model, select_feature_subset
+from rapids.evaluation.sweep import contamination_tasks, feature_tasks, run_sweep
 
 
 def main():
@@ -14,13 +15,28 @@ def main():
     dataset_path = config["dataset"]["path"]
     log_event(logger, "dataset.load", path=dataset_path)
 
-    features, labels = load_and_preprocess(dataset_path)
+    features, labels, scaler, feature_columns = load_features(
+        dataset_path, cache_dir=config["dataset"].get("cache_dir")
+    )
     log_event(logger, "dataset.features", rows=features.shape[0], cols=features.shape[1])
 
     log_event(logger, "feature_impact.start")
 
-    feature_counts = [10, 20, 40, 78]
-    results = feature_impact_experiment(features, labels, feature_counts)
+    selection = config.get("feature_selection") or {}
+    # The full feature set is always evaluated: it is the selection's reference
+    feature_counts = sorted(
+        {min(count, len(feature_columns)) for count in selection.get("feature_counts", [10, 20, 40, 78])}
+        | {len(feature_columns)}
+    )
+    # Both sweeps share one split and one worker pool
+    sweep = config.get("sweep") or {}
+    tasks = feature_tasks(rank_features(features, labels), feature_counts)
+    tasks += contamination_tasks(sweep.get("contamination_levels") or [])
+    log_event(logger, "sweep.start", configurations=len(tasks), workers=sweep.get("workers", 1))
+    swept = run_sweep(
+        features, labels, tasks, workers=sweep.get("workers", 1), threads_per_worker=sweep.get("threads_per_worker")
+    )
+    results, contamination_results = swept[: len(feature_counts)], swept[len(feature_counts) :]
 
     for r in results:
         logger.info(
@@ -30,6 +46,34 @@ def main():
             f"f1={r['f1_score']:.4f} | "
             f"fpr={r['false_positive_rate']:.4f}"
         )
+    for r in contamination_results:
+        logger.info(
+            f"contamination={r['contamination']} | "
+            f"precision={r['precision']:.4f} | "
+            f"recall={r['recall']:.4f} | "
+            f"f1={r['f1_score']:.4f} | "
+            f"fpr={r['false_positive_rate']:.4f}"
+        )
+
+    tolerance = selection.get("f1_tolerance", 0.01)
+    selected = select_feature_subset(results, tolerance)
+    log_event(
+        logger, "feature_selection.chosen", features=selected["feature_count"], f1=round(selected["f1_score"], 4)
+    )
+
+    if selection.get("save_artifact", False):
+        model_config = config.get("model") or {}
+        path = save_reduced_model(
+            model_config.get("artifact_dir") or "artifacts/models",
+            features,
+            scaler,
+            feature_columns,
+            selected,
+            contamination=model_config.get("contamination", 0.20),
+            fuse_scaler=bool(model_config.get("fuse_scaler", False)),
+            metadata={"dataset": dataset_path, "f1_tolerance": tolerance},
+        )
+        log_event(logger, "model.save", path=str(path), features=selected["feature_count"])
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
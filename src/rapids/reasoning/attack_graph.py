@@ -16,12 +16,14 @@ class AttackGraph:
         self.node_risk_timestamp: Dict[str, datetime] = {}
         self.anomaly_evidence: Dict[Tuple[str, str], List[Tuple[float, datetime]]] = {}
         self.decay_half_life_hours: float = 24.0  # Risk halves every 24 hours
+        # Optional GraphJournal receiving every state change (see persistence.py)
+        self.journal = None
 
-    def _ensure_node(self, host: str) -> None:
+    def _ensure_node(self, host: str, now: Optional[datetime] = None) -> None:
         """Ensure a node exists in the graph."""
         if host not in self.node_risk:
             self.node_risk[host] = 0.0
-            self.node_risk_timestamp[host] = datetime.now()
+            self.node_risk_timestamp[host] = now or datetime.now()
         if host not in self.adj:
             self.adj[host] = {}
 
@@ -32,47 +34,62 @@ class AttackGraph:
         current = self.roles.get(host)
         if current is None or self.role_rank.get(role, 0) > self.role_rank.get(current, 0):
             self.roles[host] = role
+            if self.journal is not None:
+                self.journal.log_role(host, role)
 
-    def record_flow(self, src: Optional[str], dst: Optional[str]) -> None:
+    def record_flow(self, src: Optional[str], dst: Optional[str], now: Optional[datetime] = None) -> None:
         """Record a network flow between two hosts."""
         if src is None or dst is None:
             return
-        self._ensure_node(src)
-        self._ensure_node(dst)
-        if dst not in self.adj[src]:
-            self.adj[src][dst] = 0.0
+        if dst in self.adj.get(src, {}):
+            return
+        now = now or datetime.now()
+        self._ensure_node(src, now)
+        self._ensure_node(dst, now)
+        self.adj[src][dst] = 0.0
+        if self.journal is not None:
+            self.journal.log_flow(src, dst, now)
 
-    def _compute_temporal_decay(self, risk: float, last_timestamp: datetime) -> float:
+    def _compute_temporal_decay(
+        self, risk: float, last_timestamp: datetime, now: Optional[datetime] = None
+    ) -> float:
         """
         Apply exponential decay to risk based on time elapsed.
         Risk decays with a half-life equal to decay_half_life_hours.
         """
-        elapsed = datetime.now() - last_timestamp
+        elapsed = (now or datetime.now()) - last_timestamp
         elapsed_hours = elapsed.total_seconds() / 3600.0
         
         # Exponential decay: risk * (0.5 ^ (elapsed / half_life))
         decay_factor = 0.5 ** (elapsed_hours / self.decay_half_life_hours)
         return risk * decay_factor
 
-    def add_anomaly(self, src: Optional[str], dst: Optional[str], severity: float = 0.15) -> None:
+    def add_anomaly(
+        self,
+        src: Optional[str],
+        dst: Optional[str],
+        severity: float = 0.15,
+        now: Optional[datetime] = None,
+    ) -> None:
         """Record an anomalous flow and update risk scores with temporal awareness."""
         if src is None or dst is None:
             return
-        self._ensure_node(src)
-        self._ensure_node(dst)
+        now = now or datetime.now()
+        self._ensure_node(src, now)
+        self._ensure_node(dst, now)
         self.adj.setdefault(src, {})
         self.adj[src].setdefault(dst, 0.0)
 
-        now = datetime.now()
-        
         # Apply temporal decay to existing risk
         src_decayed = self._compute_temporal_decay(
             self.node_risk[src],
-            self.node_risk_timestamp[src]
+            self.node_risk_timestamp[src],
+            now,
         )
         dst_decayed = self._compute_temporal_decay(
             self.node_risk[dst],
-            self.node_risk_timestamp[dst]
+            self.node_risk_timestamp[dst],
+            now,
         )
         
         # Add new evidence
@@ -97,10 +114,13 @@ class AttackGraph:
         # Update edge risk
         edge_decayed = self._compute_temporal_decay(
             self.edge_risk.get(edge_key, 0.0),
-            datetime.now() - timedelta(hours=1)  # Assume 1 hour of decay
+            now - timedelta(hours=1),  # Assume 1 hour of decay
+            now,
         )
         self.edge_risk[edge_key] = min(1.0, edge_decayed + severity)
         self.adj[src][dst] = max(self.adj[src][dst], self.edge_risk[edge_key])
+        if self.journal is not None:
+            self.journal.log_anomaly(src, dst, severity, now)
 
     def get_anomaly_history(self, src: str, dst: str) -> List[Tuple[float, str]]:
         """Get timestamp history of anomalies on an edge."""
@@ -134,3 +154,5 @@ class AttackGraph:
                     frontier.append((neighbor, depth + 1, propagated))
 
         self.node_risk.update(updated)
+        if self.journal is not None:
+            self.journal.log_propagation(decay, max_depth)
@@ -6,12 +6,17 @@ from .policy_engine import PolicyEngine
 
 
 class ReasoningEngine:
-    def __init__(self, host_count=20, max_hops=3):
+    def __init__(self, host_count=20, max_hops=3, journal=None):
         self.graph = AttackGraph()
         self.role_classifier = HostRoleClassifier()
         self.path_engine = AttackPathEngine(self.graph, max_hops=max_hops)
         self.policy_engine = PolicyEngine(self.graph)
         self.host_count = host_count
+        # Optional GraphJournal: restore the graph now, then log every change
+        self.journal = journal
+        if journal is not None:
+            journal.restore(self.graph)
+            journal.attach(self.graph)
 
     def observe_flow(self, flow):
         src, dst = extract_hosts(flow, host_count=self.host_count)
@@ -23,6 +28,8 @@ class ReasoningEngine:
         if src not in self.graph.roles:
             self.graph.set_role(src, "workstation")
 
+        if self.journal is not None:
+            self.journal.maybe_snapshot(self.graph)
         return src, dst
 
     def handle_anomaly(self, src, dst, flow, severity=0.15):
@@ -30,7 +37,38 @@ class ReasoningEngine:
         self.graph.propagate_risk()
         paths = self.path_engine.compute_paths()
         recommendations = self.policy_engine.recommend(paths, flow)
+        if self.journal is not None:
+            self.journal.maybe_snapshot(self.graph)
         return paths, recommendations
 
+    def handle_anomalies(self, anomalies, severity=0.15):
+        """
+        Handle several anomalies with one risk propagation and one path search.
+
+        Cheaper than calling ``handle_anomaly`` for each, at the cost of
+        propagating all of them together: every anomaly gets the same paths,
+        and recommendations are made per flow.
+
+        Args:
+            anomalies: (src, dst, flow) tuples.
+
+        Returns:
+            One (paths, recommendations) pair per anomaly, in order.
+        """
+        if not anomalies:
+            return []
+        for src, dst, _ in anomalies:
+            self.graph.add_anomaly(src, dst, severity=severity)
+        self.graph.propagate_risk()
+        paths = self.path_engine.compute_paths()
+        results = [(paths, self.policy_engine.recommend(paths, flow)) for _, _, flow in anomalies]
+        if self.journal is not None:
+            self.journal.maybe_snapshot(self.graph)
+        return results
+
+    def close(self):
+        if self.journal is not None:
+            self.journal.close()
+
     def simulate_containment(self, recommendation):
         return self.policy_engine.simulate_containment(recommendation)
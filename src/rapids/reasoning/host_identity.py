@@ -1,3 +1,24 @@
+SRC_KEYS = {
+    "src_ip",
+    "source_ip",
+    "src_addr",
+    "source_address",
+    "ip_src",
+}
+DST_KEYS = {
+    "dst_ip",
+    "dest_ip",
+    "destination_ip",
+    "dst_addr",
+    "destination_address",
+    "ip_dst",
+}
+PORT_KEYS = {"destination_port", "dest_port", "dst_port"}
+FWD_KEYS = {"total_fwd_packets", "subflow_fwd_packets"}
+DURATION_KEYS = {"flow_duration"}
+HOST_KEYS = SRC_KEYS | DST_KEYS | PORT_KEYS | FWD_KEYS | DURATION_KEYS
+
+
 def _normalize_key(key):
     return "_".join(key.strip().lower().replace("/", " ").split())
 
@@ -10,36 +31,21 @@ def _get_value_by_keys(flow, keys):
     return None
 
 
+def host_columns(columns):
+    """The columns among ``columns`` that ``extract_hosts`` reads."""
+    return [col for col in columns if _normalize_key(col) in HOST_KEYS]
+
+
 def extract_hosts(flow, host_count=20):
-    src_keys = {
-        "src_ip",
-        "source_ip",
-        "src_addr",
-        "source_address",
-        "ip_src",
-    }
-    dst_keys = {
-        "dst_ip",
-        "dest_ip",
-        "destination_ip",
-        "dst_addr",
-        "destination_address",
-        "ip_dst",
-    }
-
-    src = _get_value_by_keys(flow, src_keys)
-    dst = _get_value_by_keys(flow, dst_keys)
+    src = _get_value_by_keys(flow, SRC_KEYS)
+    dst = _get_value_by_keys(flow, DST_KEYS)
 
     if src is not None and dst is not None:
         return str(src), str(dst)
 
-    port_keys = {"destination_port", "dest_port", "dst_port"}
-    fwd_keys = {"total_fwd_packets", "subflow_fwd_packets"}
-    duration_keys = {"flow_duration"}
-
-    dest_port = _get_value_by_keys(flow, port_keys)
-    total_fwd = _get_value_by_keys(flow, fwd_keys)
-    duration = _get_value_by_keys(flow, duration_keys)
+    dest_port = _get_value_by_keys(flow, PORT_KEYS)
+    total_fwd = _get_value_by_keys(flow, FWD_KEYS)
+    duration = _get_value_by_keys(flow, DURATION_KEYS)
 
     try:
         dest_port = int(dest_port or 0)
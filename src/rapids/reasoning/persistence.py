@@ -0,0 +1,373 @@
+"""Snapshots and a write-ahead log for restoring an AttackGraph after restart.
+
+A journal directory holds numbered files::
+
+    snapshot-00000003.npz   graph state including every event before segment 3
+    wal-00000003.log        events since that snapshot, one JSON array per line
+    wal-00000004.log        ...
+
+Restoring loads the newest snapshot and replays the WAL segments from its
+number on. Snapshots are arrays in an uncompressed ``.npz`` (hosts, node
+risk, edges sorted by source, roles, evidence), so loading is a handful of
+vectorised reads plus one pass to rebuild the dicts.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from itertools import islice
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .attack_graph import AttackGraph
+
+logger = logging.getLogger(__name__)
+
+_SNAPSHOT_VERSION = 1
+
+
+def _encode_strings(values: List[str]) -> np.ndarray:
+    return np.frombuffer("\x00".join(values).encode("utf-8"), dtype=np.uint8)
+
+
+def _decode_strings(blob: np.ndarray) -> List[str]:
+    if blob.size == 0:
+        return []
+    return blob.tobytes().decode("utf-8").split("\x00")
+
+
+def copy_graph(graph: AttackGraph) -> AttackGraph:
+    """
+    Copy the state a snapshot needs, without the journal.
+
+    This is the only part of a snapshot that must run on the thread that
+    mutates the graph; the copy can be turned into arrays elsewhere.
+    """
+    copy = AttackGraph()
+    copy.decay_half_life_hours = graph.decay_half_life_hours
+    copy.node_risk = dict(graph.node_risk)
+    copy.node_risk_timestamp = dict(graph.node_risk_timestamp)
+    copy.roles = dict(graph.roles)
+    copy.adj = {host: neighbors.copy() for host, neighbors in graph.adj.items()}
+    copy.edge_risk = dict(graph.edge_risk)
+    copy.anomaly_evidence = {edge: history[:] for edge, history in graph.anomaly_evidence.items()}
+    return copy
+
+
+def snapshot_arrays(graph: AttackGraph) -> Dict[str, np.ndarray]:
+    """Capture the graph state as plain numpy arrays."""
+    hosts = list(graph.adj)
+    for mapping in (graph.node_risk, graph.roles):
+        for host in mapping:
+            if host not in graph.adj:
+                hosts.append(host)
+    index = {host: i for i, host in enumerate(hosts)}
+
+    node_risk = np.array([graph.node_risk.get(h, np.nan) for h in hosts], dtype=np.float64)
+    timestamps = graph.node_risk_timestamp
+    node_ts = np.array(
+        [timestamps[h].timestamp() if h in timestamps else np.nan for h in hosts],
+        dtype=np.float64,
+    )
+
+    role_names = sorted(set(graph.roles.values()))
+    role_codes = {role: i for i, role in enumerate(role_names)}
+    roles = np.full(len(hosts), -1, dtype=np.int16)
+    for host, role in graph.roles.items():
+        roles[index[host]] = role_codes[role]
+
+    # Edges are written grouped by source so loading can slice per node
+    edge_src: List[int] = []
+    edge_dst: List[int] = []
+    edge_weight: List[float] = []
+    edge_risk: List[float] = []
+    for src, neighbors in graph.adj.items():
+        src_idx = index[src]
+        for dst, weight in neighbors.items():
+            edge_src.append(src_idx)
+            edge_dst.append(index[dst])
+            edge_weight.append(weight)
+            edge_risk.append(graph.edge_risk.get((src, dst), np.nan))
+
+    adj_src_count = np.array([len(graph.adj[h]) if h in graph.adj else -1 for h in hosts], dtype=np.int32)
+
+    ev_src: List[int] = []
+    ev_dst: List[int] = []
+    ev_severity: List[float] = []
+    ev_ts: List[float] = []
+    for (src, dst), history in graph.anomaly_evidence.items():
+        for severity, ts in history:
+            ev_src.append(index[src])
+            ev_dst.append(index[dst])
+            ev_severity.append(severity)
+            ev_ts.append(ts.timestamp())
+
+    return {
+        "version": np.array([_SNAPSHOT_VERSION], dtype=np.int32),
+        "decay_half_life_hours": np.array([graph.decay_half_life_hours], dtype=np.float64),
+        "hosts": _encode_strings(hosts),
+        "role_names": _encode_strings(role_names),
+        "node_risk": node_risk,
+        "node_ts": node_ts,
+        "roles": roles,
+        "adj_count": adj_src_count,
+        "edge_dst": np.array(edge_dst, dtype=np.int32),
+        "edge_weight": np.array(edge_weight, dtype=np.float64),
+        "edge_risk": np.array(edge_risk, dtype=np.float64),
+        "edge_src": np.array(edge_src, dtype=np.int32),
+        "ev_src": np.array(ev_src, dtype=np.int32),
+        "ev_dst": np.array(ev_dst, dtype=np.int32),
+        "ev_severity": np.array(ev_severity, dtype=np.float64),
+        "ev_ts": np.array(ev_ts, dtype=np.float64),
+    }
+
+
+def write_snapshot(arrays: Dict[str, np.ndarray], path: str) -> None:
+    """Write captured arrays to ``path`` atomically."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(f, **arrays)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def save_snapshot(graph: AttackGraph, path: str) -> None:
+    """Write a snapshot of ``graph`` to ``path``."""
+    write_snapshot(snapshot_arrays(graph), path)
+
+
+def load_snapshot(path: str, graph: Optional[AttackGraph] = None) -> AttackGraph:
+    """
+    Load a snapshot into ``graph`` (a new AttackGraph if None).
+
+    Raises:
+        ValueError: If the file is not a supported snapshot.
+    """
+    graph = graph if graph is not None else AttackGraph()
+    with np.load(path) as data:
+        if "version" not in data.files or int(data["version"][0]) != _SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported snapshot version in {path}")
+        arrays = {key: data[key] for key in data.files}
+
+    hosts = _decode_strings(arrays["hosts"])
+    host_arr = np.array(hosts, dtype=object)
+    role_names = _decode_strings(arrays["role_names"])
+    graph.decay_half_life_hours = float(arrays["decay_half_life_hours"][0])
+
+    node_risk = arrays["node_risk"]
+    has_risk = ~np.isnan(node_risk)
+    graph.node_risk = dict(zip(host_arr[has_risk].tolist(), node_risk[has_risk].tolist()))
+
+    node_ts = arrays["node_ts"]
+    has_ts = ~np.isnan(node_ts)
+    fromtimestamp = datetime.fromtimestamp
+    graph.node_risk_timestamp = {
+        host: fromtimestamp(ts) for host, ts in zip(host_arr[has_ts].tolist(), node_ts[has_ts].tolist())
+    }
+
+    roles = arrays["roles"]
+    has_role = roles >= 0
+    graph.roles = {
+        host: role_names[code] for host, code in zip(host_arr[has_role].tolist(), roles[has_role].tolist())
+    }
+
+    # Edges are grouped by source, so each node takes the next ``count`` of them
+    dst_names = iter(host_arr[arrays["edge_dst"]].tolist())
+    weights = iter(arrays["edge_weight"].tolist())
+    adj: Dict[str, Dict[str, float]] = {}
+    for host, count in zip(hosts, arrays["adj_count"].tolist()):
+        if count > 0:
+            adj[host] = dict(zip(islice(dst_names, count), islice(weights, count)))
+        elif count == 0:
+            adj[host] = {}
+    graph.adj = adj
+
+    edge_risk = arrays["edge_risk"]
+    has_edge_risk = ~np.isnan(edge_risk)
+    src_names = host_arr[arrays["edge_src"][has_edge_risk]].tolist()
+    risk_dst = host_arr[arrays["edge_dst"][has_edge_risk]].tolist()
+    graph.edge_risk = dict(zip(zip(src_names, risk_dst), edge_risk[has_edge_risk].tolist()))
+
+    evidence: Dict[Tuple[str, str], List[Tuple[float, datetime]]] = {}
+    ev_keys = zip(host_arr[arrays["ev_src"]].tolist(), host_arr[arrays["ev_dst"]].tolist())
+    for key, severity, ts in zip(ev_keys, arrays["ev_severity"].tolist(), arrays["ev_ts"].tolist()):
+        evidence.setdefault(key, []).append((severity, fromtimestamp(ts)))
+    graph.anomaly_evidence = evidence
+
+    return graph
+
+
+def _seq(path: Path) -> int:
+    return int(path.stem.split("-")[1])
+
+
+class GraphJournal:
+    """
+    Write-ahead log plus periodic snapshots for one AttackGraph.
+
+    Attach it with :meth:`attach` (``ReasoningEngine(journal=...)`` does this):
+    the graph then reports every ``record_flow`` that adds an edge, every
+    ``set_role`` that changes a role, every ``add_anomaly`` and every
+    ``propagate_risk`` call. Events are appended to the current WAL segment
+    through a buffered file that is flushed every ``flush_interval_sec``.
+
+    :meth:`maybe_snapshot` should be called between graph updates. Once
+    ``snapshot_interval_sec`` has passed it copies the graph, starts a new WAL
+    segment, and converts and writes the copy on a background thread, after
+    which older snapshots and segments are deleted. Only the dict copy runs on
+    the caller's thread.
+
+    Files are opened lazily, so a journal can be pickled before first use.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        snapshot_interval_sec: float = 300.0,
+        flush_interval_sec: float = 1.0,
+    ) -> None:
+        self.directory = Path(directory)
+        self.snapshot_interval_sec = snapshot_interval_sec
+        self.flush_interval_sec = flush_interval_sec
+        self._seq: Optional[int] = None
+        self._wal = None
+        self._writer: Optional[threading.Thread] = None
+        self._next_snapshot = time.monotonic() + snapshot_interval_sec
+        self._next_flush = time.monotonic() + flush_interval_sec
+
+    def _segments(self) -> List[Path]:
+        return sorted(self.directory.glob("wal-*.log"), key=_seq)
+
+    def _snapshots(self) -> List[Path]:
+        return sorted(self.directory.glob("snapshot-*.npz"), key=_seq)
+
+    def restore(self, graph: AttackGraph) -> AttackGraph:
+        """
+        Load the newest snapshot into ``graph`` and replay the WAL tail.
+
+        A truncated last line (from a crash mid-write) is ignored.
+        """
+        snapshots = self._snapshots()
+        start_seq = 0
+        if snapshots:
+            load_snapshot(str(snapshots[-1]), graph)
+            start_seq = _seq(snapshots[-1])
+
+        journal, graph.journal = graph.journal, None
+        replayed = 0
+        try:
+            for segment in self._segments():
+                if _seq(segment) < start_seq:
+                    continue
+                with open(segment, "r") as f:
+                    for line in f:
+                        try:
+                            event = json.loads(line)
+                        except json.JSONDecodeError:
+                            logger.warning(f"Skipping truncated journal line in {segment.name}")
+                            continue
+                        _apply(graph, event)
+                        replayed += 1
+        finally:
+            graph.journal = journal
+
+        logger.info(
+            f"Restored attack graph: {len(graph.adj)} hosts from "
+            f"{snapshots[-1].name if snapshots else 'empty graph'} + {replayed} journal events"
+        )
+        return graph
+
+    def attach(self, graph: AttackGraph) -> None:
+        graph.journal = self
+
+    def _append(self, event: list) -> None:
+        if self._wal is None:
+            self._open_segment()
+        self._wal.write(json.dumps(event, separators=(",", ":")) + "\n")
+
+    def _open_segment(self) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        if self._seq is None:
+            existing = [_seq(p) for p in self._segments() + self._snapshots()]
+            # Never append to a segment that may end in a partial line
+            self._seq = max(existing, default=0) + 1
+        else:
+            self._seq += 1
+        self._wal = open(self.directory / f"wal-{self._seq:08d}.log", "a", buffering=1 << 16)
+
+    def log_flow(self, src: str, dst: str, now: datetime) -> None:
+        self._append(["f", src, dst, now.timestamp()])
+
+    def log_role(self, host: str, role: str) -> None:
+        self._append(["r", host, role])
+
+    def log_anomaly(self, src: str, dst: str, severity: float, now: datetime) -> None:
+        self._append(["a", src, dst, severity, now.timestamp()])
+
+    def log_propagation(self, decay: float, max_depth: int) -> None:
+        self._append(["p", decay, max_depth])
+
+    def maybe_snapshot(self, graph: AttackGraph) -> None:
+        """Flush the WAL and start a background snapshot when they are due."""
+        now = time.monotonic()
+        if self._wal is not None and now >= self._next_flush:
+            self._wal.flush()
+            self._next_flush = now + self.flush_interval_sec
+        if now >= self._next_snapshot and (self._writer is None or not self._writer.is_alive()):
+            self.snapshot(graph)
+
+    def snapshot(self, graph: AttackGraph, wait: bool = False) -> None:
+        """Snapshot ``graph`` now; the file is written in the background unless ``wait``."""
+        self._next_snapshot = time.monotonic() + self.snapshot_interval_sec
+        state = copy_graph(graph)
+
+        # Events from here on go to a new segment that the snapshot does not cover
+        if self._wal is not None:
+            self._wal.close()
+            self._wal = None
+        self._open_segment()
+        seq = self._seq
+
+        self._writer = threading.Thread(
+            target=self._write_snapshot, args=(state, seq), name="rapids-graph-snapshot", daemon=True
+        )
+        self._writer.start()
+        if wait:
+            self._writer.join()
+
+    def _write_snapshot(self, state: AttackGraph, seq: int) -> None:
+        path = self.directory / f"snapshot-{seq:08d}.npz"
+        try:
+            save_snapshot(state, str(path))
+        except OSError as e:
+            logger.error(f"Failed to write graph snapshot {path.name}: {e}")
+            return
+        for old in self._snapshots() + self._segments():
+            if _seq(old) < seq:
+                old.unlink(missing_ok=True)
+        logger.info(f"Wrote graph snapshot {path.name}")
+
+    def close(self) -> None:
+        """Flush the WAL and wait for a pending snapshot."""
+        if self._writer is not None:
+            self._writer.join()
+        if self._wal is not None:
+            self._wal.close()
+            self._wal = None
+
+
+def _apply(graph: AttackGraph, event: list) -> None:
+    kind = event[0]
+    if kind == "f":
+        graph.record_flow(event[1], event[2], now=datetime.fromtimestamp(event[3]))
+    elif kind == "a":
+        graph.add_anomaly(event[1], event[2], severity=event[3], now=datetime.fromtimestamp(event[4]))
+    elif kind == "r":
+        graph.set_role(event[1], event[2])
+    elif kind == "p":
+        graph.propagate_risk(decay=event[1], max_depth=event[2])
@@ -0,0 +1,151 @@
+"""Adaptive XREAD batch sizing against an end-to-end latency target."""
+import logging
+import time
+from collections import deque
+from typing import Any, Deque, NamedTuple, Optional, Sequence
+
+from rapids.streaming.wire import entry_ms
+
+logger = logging.getLogger(__name__)
+
+
+class Decision(NamedTuple):
+    """One adjustment made by a BatchController."""
+
+    time: float
+    batch_size: int
+    block_ms: int
+    latency_p99_ms: float
+    processing_p99_ms: float
+    reason: str
+
+
+def entry_age_ms(entry_id: Any, now_ms: float) -> float:
+    """Milliseconds since a stream entry was added, from the time part of its id."""
+    return now_ms - entry_ms(entry_id)
+
+
+def _p99(values: Sequence[float]) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+
+
+class BatchController:
+    """
+    Tune a reader's ``batch_size`` and ``block_ms`` toward a p99 latency target.
+
+    Call :meth:`observe` once per handled batch with the entry ids and the
+    time from read to ack. End-to-end latency is taken from the oldest entry
+    id (Redis ids start with the millisecond the entry was added), so it
+    includes time spent waiting in the stream.
+
+    Every ``interval`` batches the controller looks at the p99 over the last
+    ``window`` batches:
+
+    * processing p99 above half the target: one batch alone eats the budget,
+      so ``batch_size`` is halved. It is also halved when the end-to-end p99
+      is over the target, reads are not full and processing takes over a
+      quarter of it: entries then wait mostly for their own batch;
+    * reads coming back full (a backlog) or the end-to-end p99 over the
+      target while processing has headroom: entries are waiting in the
+      stream, so ``batch_size`` grows by half, since larger reads drain it
+      with fewer round trips and less per-batch overhead.
+
+    ``block_ms`` is kept to the budget left after processing, so a blocked
+    read never holds the loop longer than the target allows. Every change is
+    logged and kept in :attr:`decisions`.
+    """
+
+    def __init__(
+        self,
+        reader,
+        latency_target_ms: float,
+        min_batch_size: int = 20,
+        max_batch_size: int = 5000,
+        min_block_ms: int = 5,
+        max_block_ms: Optional[int] = None,
+        window: int = 200,
+        interval: int = 10,
+    ) -> None:
+        if latency_target_ms <= 0:
+            raise ValueError("latency_target_ms must be positive")
+        if not 0 < min_batch_size <= max_batch_size:
+            raise ValueError("Require 0 < min_batch_size <= max_batch_size")
+        self.reader = reader
+        self.latency_target_ms = latency_target_ms
+        self.min_batch_size = min_batch_size
+        self.max_batch_size = max_batch_size
+        self.min_block_ms = min_block_ms
+        self.max_block_ms = max_block_ms if max_block_ms is not None else reader.block_ms
+        self.interval = interval
+        self.latencies: Deque[float] = deque(maxlen=window)
+        self.processing: Deque[float] = deque(maxlen=window)
+        self.decisions: Deque[Decision] = deque(maxlen=100)
+        self._full = 0
+        self._since_decision = 0
+
+    def observe(self, entry_ids: Sequence[Any], processing_sec: float, full: Optional[bool] = None) -> None:
+        """
+        Record a handled batch and adjust the reader when a decision is due.
+
+        Args:
+            entry_ids: Stream ids of the batch, oldest first.
+            processing_sec: Time from the read returning to the batch being acked.
+            full: Whether the read returned ``batch_size`` entries; inferred
+                from ``len(entry_ids)`` when None.
+        """
+        if not entry_ids:
+            return
+        if full is None:
+            full = len(entry_ids) >= self.reader.batch_size
+        try:
+            self.latencies.append(entry_age_ms(entry_ids[0], time.time() * 1000.0))
+        except ValueError:
+            pass
+        self.processing.append(processing_sec * 1000.0)
+        self._full += bool(full)
+        self._since_decision += 1
+        if self._since_decision >= self.interval:
+            self._decide()
+
+    def _decide(self) -> None:
+        target = self.latency_target_ms
+        processing_p99 = _p99(self.processing)
+        latency_p99 = _p99(self.latencies) if self.latencies else processing_p99
+        backlog = self._full * 2 > self._since_decision
+        self._full = 0
+        self._since_decision = 0
+
+        over = latency_p99 > target
+
+        batch_size = self.reader.batch_size
+        reason = None
+        if processing_p99 > target * 0.5 and batch_size > self.min_batch_size:
+            batch_size = max(self.min_batch_size, batch_size // 2)
+            reason = f"processing p99 {processing_p99:.1f}ms > {target * 0.5:.1f}ms"
+        elif over and not backlog and processing_p99 > target * 0.25 and batch_size > self.min_batch_size:
+            batch_size = max(self.min_batch_size, batch_size // 2)
+            reason = f"latency p99 {latency_p99:.1f}ms > {target:.1f}ms, processing p99 {processing_p99:.1f}ms"
+        elif (backlog or over) and processing_p99 < target * 0.25 and batch_size < self.max_batch_size:
+            batch_size = min(self.max_batch_size, batch_size + max(1, batch_size // 2))
+            cause = "backlog with" if backlog else f"{target:.1f}ms target exceeded,"
+            reason = f"{cause} latency p99 {latency_p99:.1f}ms, processing p99 {processing_p99:.1f}ms"
+
+        block_ms = int(min(self.max_block_ms, max(self.min_block_ms, target - processing_p99)))
+        if reason is None:
+            # Ignore small moves so noise in the window does not churn the setting
+            if abs(block_ms - self.reader.block_ms) <= max(self.min_block_ms, self.reader.block_ms // 5):
+                return
+            reason = f"block timeout to fit {target - processing_p99:.1f}ms headroom"
+        else:
+            # Both windows were measured at the old size
+            self.processing.clear()
+            self.latencies.clear()
+
+        logger.info(
+            f"[ADAPT] batch_size {self.reader.batch_size} -> {batch_size}, "
+            f"block_ms {self.reader.block_ms} -> {block_ms}: {reason}"
+        )
+        self.reader.batch_size = batch_size
+        self.reader.block_ms = block_ms
+        self.decisions.append(Decision(time.time(), batch_size, block_ms, latency_p99, processing_p99, reason))
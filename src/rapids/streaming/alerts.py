@@ -0,0 +1,247 @@
+"""Batched alert output with per-(src, dst, action) coalescing."""
+import json
+import logging
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+
+import redis
+
+from rapids.core.redis_utils import connect_redis
+
+logger = logging.getLogger(__name__)
+
+ALERT_SINKS = ("redis", "jsonl")
+
+
+class RedisAlertWriter:
+    """Append alerts to a Redis stream, one pipelined XADD per alert."""
+
+    def __init__(
+        self,
+        stream_name: str = "rapids_alerts",
+        redis_host: str = "localhost",
+        redis_port: int = 6379,
+        connect_retries: int = 5,
+        retry_delay_sec: float = 0.5,
+        maxlen: Optional[int] = 100000,
+    ) -> None:
+        self.stream_name = stream_name
+        self.redis_host = redis_host
+        self.redis_port = redis_port
+        self.connect_retries = connect_retries
+        self.retry_delay_sec = retry_delay_sec
+        self.maxlen = maxlen
+        self.r: Optional[redis.Redis] = None
+
+    def open(self) -> None:
+        self.r = connect_redis(self.redis_host, self.redis_port, self.connect_retries, self.retry_delay_sec)
+
+    def write(self, records: Sequence[Dict[str, Any]]) -> None:
+        pipe = self.r.pipeline(transaction=False)
+        for record in records:
+            pipe.xadd(
+                self.stream_name,
+                {"alert": json.dumps(record)},
+                maxlen=self.maxlen,
+                approximate=True,
+            )
+        pipe.execute()
+
+    def close(self) -> None:
+        if self.r is not None:
+            self.r.close()
+            self.r = None
+
+
+class JsonlAlertWriter:
+    """Append alerts to a JSON-lines file."""
+
+    def __init__(self, path: str) -> None:
+        self.path = Path(path)
+        self._file = None
+
+    def open(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "a")
+
+    def write(self, records: Sequence[Dict[str, Any]]) -> None:
+        self._file.write("".join(json.dumps(record) + "\n" for record in records))
+        self._file.flush()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class _Window:
+    __slots__ = ("first", "count", "last_seen", "last_id", "risk", "ends")
+
+    def __init__(self, first: Dict[str, Any], now: float, window_sec: float) -> None:
+        self.first = first
+        self.count = 1
+        self.last_seen = now
+        self.last_id = first["id"]
+        self.risk = first["risk"]
+        self.ends = now + window_sec
+
+
+class AlertSink:
+    """
+    Collect alerts on the consumer thread and write them in batches.
+
+    :meth:`emit` only updates in-memory state. The first alert for a
+    (src, dst, action) key is queued for the next flush; repeats of that key
+    within ``window_sec`` are counted, and once the window closes one summary
+    record with ``count`` and the highest risk seen is written. A background
+    thread flushes every ``flush_interval_sec``, handing each writer the whole
+    batch at once.
+
+    At most ``max_pending`` records wait for a flush; beyond that the oldest
+    are dropped and counted in :attr:`dropped`. A failing writer is logged and
+    skipped for that batch, so alerts never block or crash the consumer.
+
+    Writers connect in :meth:`start`, so a sink can be pickled into a
+    consumer process before use.
+    """
+
+    def __init__(
+        self,
+        writers: Sequence[Any],
+        window_sec: float = 5.0,
+        flush_interval_sec: float = 0.5,
+        max_pending: int = 10000,
+    ) -> None:
+        self.writers = list(writers)
+        self.window_sec = window_sec
+        self.flush_interval_sec = flush_interval_sec
+        self.max_pending = max_pending
+        self.dropped = 0
+        self.written = 0
+        self._ready: Deque[Dict[str, Any]] = deque(maxlen=max_pending)
+        self._windows: Dict[Tuple[Any, Any, Any], _Window] = {}
+        self._lock: Optional[threading.Lock] = None
+        self._stop: Optional[threading.Event] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Open the writers and start the background flush thread."""
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        for writer in self.writers:
+            writer.open()
+        self._thread = threading.Thread(target=self._run, name="rapids-alerts", daemon=True)
+        self._thread.start()
+
+    def emit(
+        self,
+        entry_id: str,
+        src: Optional[str],
+        dst: Optional[str],
+        paths: List[Dict[str, Any]],
+        recommendations: List[Dict[str, Any]],
+        now: Optional[float] = None,
+    ) -> None:
+        """Record one anomaly and what the reasoning engine made of it."""
+        now = now if now is not None else time.time()
+        top = recommendations[0] if recommendations else None
+        action = top["action"] if top else None
+        risk = paths[0]["risk"] if paths else 0.0
+        key = (src, dst, action)
+
+        with self._lock:
+            window = self._windows.get(key)
+            if window is not None:
+                if now < window.ends:
+                    window.count += 1
+                    window.last_seen = now
+                    window.last_id = entry_id
+                    window.risk = max(window.risk, risk)
+                    return
+                self._close(key, window)
+
+            record = {
+                "ts": now,
+                "id": entry_id,
+                "src": src,
+                "dst": dst,
+                "action": action,
+                "risk": risk,
+                "risk_reduction": top["risk_reduction"] if top else None,
+                "path": paths[0]["path"] if paths else None,
+                "count": 1,
+            }
+            self._windows[key] = _Window(record, now, self.window_sec)
+            self._queue(record)
+
+    def _close(self, key: Tuple[Any, Any, Any], window: _Window) -> None:
+        del self._windows[key]
+        if window.count > 1:
+            summary = dict(window.first)
+            summary.update(
+                ts=window.last_seen,
+                id=window.last_id,
+                risk=window.risk,
+                count=window.count,
+                first_seen=window.first["ts"],
+            )
+            self._queue(summary)
+
+    def _queue(self, record: Dict[str, Any]) -> None:
+        if len(self._ready) == self.max_pending:
+            self.dropped += 1
+        self._ready.append(record)
+
+    def flush(self, now: Optional[float] = None, close_windows: bool = False) -> int:
+        """
+        Write queued alerts and summaries of closed windows.
+
+        Args:
+            now: Current time (defaults to ``time.time()``).
+            close_windows: Close every open window, e.g. on shutdown.
+
+        Returns:
+            Number of records handed to the writers.
+        """
+        now = now if now is not None else time.time()
+        with self._lock:
+            # Windows are kept in opening order, so the expired ones come first
+            expired = []
+            for key, window in self._windows.items():
+                if not close_windows and now < window.ends:
+                    break
+                expired.append((key, window))
+            for key, window in expired:
+                self._close(key, window)
+            records = list(self._ready)
+            self._ready.clear()
+
+        if not records:
+            return 0
+        for writer in self.writers:
+            try:
+                writer.write(records)
+            except Exception as e:
+                logger.error(f"Failed to write {len(records)} alerts with {type(writer).__name__}: {e}")
+        self.written += len(records)
+        return len(records)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_interval_sec):
+            self.flush()
+
+    def close(self) -> None:
+        """Stop the flush thread, write everything still pending and close the writers."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self.flush(close_windows=True)
+        for writer in self.writers:
+            writer.close()
+        if self.dropped:
+            logger.warning(f"Dropped {self.dropped} alerts while the writers were behind")
@@ -0,0 +1,306 @@
+"""Asyncio producer and consumer built on ``redis.asyncio``.
+
+These mirror ``run_producer`` and ``run_consumer`` for embedding in asyncio
+services. Waiting on Redis never occupies a thread, and model scoring runs in
+an executor so the event loop keeps serving other streams meanwhile. Several
+consumers can share one loop::
+
+    await asyncio.gather(
+        run_consumer_async(model, scaler, cols, stop, ReasoningEngine(), stream_name="a"),
+        run_consumer_async(model, scaler, cols, stop, ReasoningEngine(), stream_name="b"),
+    )
+"""
+import asyncio
+import json
+import logging
+import time
+from concurrent.futures import Executor
+from typing import Any, List, Optional, Sequence, Tuple
+
+import redis
+
+from rapids.core.redis_utils import connect_redis_async
+from rapids.streaming.alerts import AlertSink
+from rapids.streaming.consumer import ConsumerStats, detect, reason
+from rapids.streaming.decoder import FlowDecoder
+from rapids.streaming.producer import flow_encoder, load_flows, send_interval
+from rapids.streaming.wire import SchemaRegistry, as_text, schema_id
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncStreamReader:
+    """Asyncio counterpart of ``StreamReader`` (XREAD or XREADGROUP + XAUTOCLAIM)."""
+
+    def __init__(
+        self,
+        r: "redis.asyncio.Redis",
+        stream_name: str,
+        batch_size: int = 200,
+        block_ms: int = 200,
+        group_name: Optional[str] = None,
+        consumer_name: Optional[str] = None,
+        claim_idle_ms: int = 30000,
+        claim_interval_sec: float = 5.0,
+    ) -> None:
+        self.r = r
+        self.stream_name = stream_name
+        self.batch_size = batch_size
+        self.block_ms = block_ms
+        self.group_name = group_name
+        self.consumer_name = consumer_name or "consumer-0"
+        self.claim_idle_ms = claim_idle_ms
+        self.claim_interval_sec = claim_interval_sec
+        self.last_id = "0-0"
+        self._claim_cursor = "0-0"
+        self._next_claim = time.perf_counter() + claim_interval_sec
+
+    async def ensure_group(self) -> None:
+        """Create the consumer group if needed; a no-op outside group mode."""
+        if not self.group_name:
+            return
+        try:
+            await self.r.xgroup_create(self.stream_name, self.group_name, id="0", mkstream=True)
+        except redis.ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    async def read(self) -> List[Tuple[Any, dict]]:
+        """Return the next batch of (entry_id, fields), possibly empty."""
+        if self.group_name and time.perf_counter() >= self._next_claim:
+            self._next_claim = time.perf_counter() + self.claim_interval_sec
+            response: Any = await self.r.xautoclaim(
+                self.stream_name,
+                self.group_name,
+                self.consumer_name,
+                min_idle_time=self.claim_idle_ms,
+                start_id=self._claim_cursor,
+                count=self.batch_size,
+            )
+            self._claim_cursor = as_text(response[0])
+            claimed = [(msg_id, data) for msg_id, data in response[1] if data is not None]
+            if claimed:
+                logger.info(f"Reclaimed {len(claimed)} stale pending entries")
+                return claimed
+
+        if self.group_name:
+            results = await self.r.xreadgroup(
+                self.group_name,
+                self.consumer_name,
+                {self.stream_name: ">"},
+                count=self.batch_size,
+                block=self.block_ms,
+            )
+        else:
+            results = await self.r.xread(
+                {self.stream_name: self.last_id}, count=self.batch_size, block=self.block_ms
+            )
+
+        messages: List[Tuple[Any, dict]] = []
+        for _, stream_messages in results or []:
+            messages.extend(stream_messages)
+        if messages:
+            self.last_id = as_text(messages[-1][0])
+        return messages
+
+    async def ack(self, entry_ids: Sequence[Any]) -> None:
+        """Acknowledge handled entries; a no-op outside a consumer group."""
+        if self.group_name and entry_ids:
+            await self.r.xack(self.stream_name, self.group_name, *entry_ids)
+
+
+class AsyncSchemaRegistry(SchemaRegistry):
+    """SchemaRegistry for an asyncio client; lookups are prefetched before decoding."""
+
+    async def register_async(self, columns: Sequence[str]) -> str:
+        """Publish a column order and return its schema id."""
+        schema = schema_id(columns)
+        await self.r.hset(self.key, schema, json.dumps(list(columns)))
+        self._columns[schema] = list(columns)
+        return schema
+
+    async def prefetch(self, messages: Sequence[Tuple[Any, dict]]) -> None:
+        """Load the column names of every schema referenced by ``messages``."""
+        for _, data in messages:
+            raw = data.get(b"schema")
+            if raw is None:
+                continue
+            schema = as_text(raw)
+            if schema not in self._columns:
+                columns = await self.r.hget(self.key, schema)
+                if columns is not None:
+                    self._columns[schema] = json.loads(as_text(columns))
+
+    def columns(self, schema: str) -> Optional[List[str]]:
+        return self._columns.get(schema)
+
+
+async def run_consumer_async(
+    model,
+    scaler,
+    feature_columns: List[str],
+    stop_event,
+    reasoning_engine,
+    stream_name: str = "rapids_stream",
+    redis_host: str = "localhost",
+    redis_port: int = 6379,
+    connect_retries: int = 5,
+    retry_delay_sec: float = 0.5,
+    batch_size: int = 200,
+    block_ms: int = 200,
+    group_name: Optional[str] = None,
+    consumer_name: Optional[str] = None,
+    claim_idle_ms: int = 30000,
+    wire_format: str = "json",
+    executor: Optional[Executor] = None,
+    alert_sink: Optional[AlertSink] = None,
+) -> ConsumerStats:
+    """
+    Consume flows from a Redis stream on the running event loop.
+
+    Takes the same arguments as ``run_consumer`` (including ``alert_sink``,
+    whose writes stay on its own thread) plus ``executor`` for model
+    scoring (the loop's default executor when None). ``stop_event`` may be an
+    ``asyncio.Event`` or a ``threading.Event``; it is checked between reads,
+    so shutdown takes at most ``block_ms``.
+
+    Returns:
+        The final consumer statistics.
+    """
+    binary = wire_format == "binary"
+    try:
+        r = await connect_redis_async(
+            redis_host, redis_port, connect_retries, retry_delay_sec, decode_responses=not binary
+        )
+    except Exception as e:
+        logger.error(f"Failed to connect to Redis: {e}")
+        raise
+
+    reader = AsyncStreamReader(
+        r,
+        stream_name,
+        batch_size=batch_size,
+        block_ms=block_ms,
+        group_name=group_name,
+        consumer_name=consumer_name,
+        claim_idle_ms=claim_idle_ms,
+    )
+    schemas = AsyncSchemaRegistry(r, stream_name) if binary else None
+    decoder = FlowDecoder(feature_columns, capacity=batch_size, schemas=schemas)
+    stats = ConsumerStats()
+    loop = asyncio.get_running_loop()
+    if alert_sink is not None:
+        alert_sink.start()
+    logger.info(f"[*] Async consumer started. Waiting for flows on stream '{stream_name}'...")
+
+    try:
+        await reader.ensure_group()
+        while not stop_event.is_set():
+            try:
+                messages = await reader.read()
+                if not messages:
+                    continue
+
+                if schemas is not None:
+                    await schemas.prefetch(messages)
+                started = time.perf_counter()
+                batch_ids, batch_flows, features = decoder.decode(messages, stats)
+                stats.stages.observe("decode", time.perf_counter() - started)
+                if batch_ids:
+                    try:
+                        preds = await loop.run_in_executor(executor, detect, features, model, scaler, stats.stages)
+                    except Exception as e:
+                        logger.error(f"Error during anomaly detection: {e}")
+                        stats.errors_count += len(batch_ids)
+                    else:
+                        reason(batch_ids, batch_flows, preds, reasoning_engine, stats, alert_sink=alert_sink)
+
+                await reader.ack([msg_id for msg_id, _ in messages])
+
+            except redis.RedisError as e:
+                logger.error(f"Redis error during xread: {e}")
+                stats.errors_count += 1
+                await asyncio.sleep(retry_delay_sec)
+            except Exception as e:
+                logger.error(f"Unexpected error in consumer loop: {e}")
+                stats.errors_count += 1
+                await asyncio.sleep(retry_delay_sec)
+    finally:
+        await r.aclose()
+        if alert_sink is not None:
+            alert_sink.close()
+        if hasattr(reasoning_engine, "close"):
+            reasoning_engine.close()
+        logger.info("[*] Async consumer shutting down.")
+        logger.info(
+            f"[FINAL] Processed {stats.flow_count} flows in {stats.elapsed():.2f}s "
+            f"({stats.throughput():.2f} fps), {stats.alert_count} alerts, {stats.errors_count} errors"
+        )
+
+    return stats
+
+
+async def run_producer_async(
+    csv_path,
+    stream_name="rapids_stream",
+    max_rows=10000,
+    target_fps=None,
+    redis_host="localhost",
+    redis_port=6379,
+    connect_retries=5,
+    retry_delay_sec=0.5,
+    batch_size=500,
+    flush_interval_sec=0.05,
+    wire_format="json",
+    wire_dtype="float64",
+    cache_dir=None,
+    columns=None,
+):
+    """
+    Replay flows from a CSV file into a Redis stream without blocking the loop.
+
+    Always sends in pipelined batches, paced like the batched mode of
+    ``run_producer``; without ``target_fps`` it sends as fast as Redis accepts.
+    With ``cache_dir`` the flows come from the dataset cache, and with
+    ``columns`` only those columns are sent (see ``load_flows``).
+
+    Returns:
+        Number of flows sent.
+    """
+    r = await connect_redis_async(redis_host, redis_port, connect_retries, retry_delay_sec)
+    try:
+        loop = asyncio.get_running_loop()
+        # CSV parsing is blocking; keep it off the event loop
+        df = await loop.run_in_executor(None, load_flows, csv_path, max_rows, cache_dir, columns)
+        if df.empty:
+            print("[!] No rows to stream.")
+            return 0
+
+        print(f"[*] Sending {len(df)} flows to stream...")
+        schema = None
+        if wire_format == "binary":
+            schema = await AsyncSchemaRegistry(r, stream_name).register_async(df.columns.tolist())
+        encode = flow_encoder(wire_format, wire_dtype, schema)
+        interval, batch_size = send_interval(batch_size, target_fps, flush_interval_sec)
+
+        start_time = time.perf_counter()
+        sent = 0
+        for offset in range(0, len(df), batch_size):
+            chunk = df.iloc[offset : offset + batch_size]
+            pipe = r.pipeline(transaction=False)
+            for fields in encode(chunk):
+                pipe.xadd(stream_name, fields)
+            await pipe.execute()
+            sent += len(chunk)
+
+            if interval is None:
+                await asyncio.sleep(0)
+            else:
+                sleep_for = start_time + (sent * interval) - time.perf_counter()
+                if sleep_for > 0:
+                    await asyncio.sleep(sleep_for)
+
+        print(f"[*] Producer finished sending {sent} flows.")
+        return sent
+    finally:
+        await r.aclose()
@@ -0,0 +1,73 @@
+"""Durable stream offset checkpoints for consumer restarts."""
+import logging
+import os
+from pathlib import Path
+from typing import Optional
+
+import redis
+
+from rapids.streaming.wire import as_text
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_STORES = ("none", "redis", "file")
+
+
+class FileCheckpoint:
+    """Last processed stream id kept in a local file, replaced atomically on save."""
+
+    def __init__(self, path: str) -> None:
+        self.path = Path(path)
+
+    def load(self) -> Optional[str]:
+        try:
+            entry_id = self.path.read_text().strip()
+        except FileNotFoundError:
+            return None
+        return entry_id or None
+
+    def save(self, entry_id: str) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, "w") as f:
+            f.write(entry_id)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+
+class RedisCheckpoint:
+    """Last processed stream id kept in a Redis string key."""
+
+    def __init__(self, r: redis.Redis, key: str) -> None:
+        self.r = r
+        self.key = key
+
+    def load(self) -> Optional[str]:
+        value = self.r.get(self.key)
+        return as_text(value) if value is not None else None
+
+    def save(self, entry_id: str) -> None:
+        self.r.set(self.key, entry_id)
+
+
+def open_checkpoint(store: str, r: redis.Redis, stream_name: str, path: Optional[str] = None):
+    """
+    Build the checkpoint backend named by ``store``.
+
+    Args:
+        store: "none", "redis" or "file".
+        r: Redis client, used by the "redis" store.
+        stream_name: Stream being consumed; names the default key and file.
+        path: File path for the "file" store, or key for the "redis" store.
+
+    Returns:
+        FileCheckpoint, RedisCheckpoint, or None for "none".
+    """
+    if store == "redis":
+        return RedisCheckpoint(r, path or f"{stream_name}:checkpoint")
+    if store == "file":
+        return FileCheckpoint(path or f"{stream_name}.checkpoint")
+    if store not in (None, "none"):
+        raise ValueError(f"Unknown checkpoint store: {store}")
+    return None
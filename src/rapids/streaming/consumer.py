@@ -1,16 +1,475 @@
 """Stream consumer for real-time anomaly detection and risk reasoning."""
-import json
 import numpy as np
 import time
 import logging
 import redis
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
 from rapids.core.redis_utils import connect_redis
+from rapids.streaming.alerts import AlertSink
+from rapids.streaming.adaptive import BatchController
+from rapids.streaming.checkpoint import open_checkpoint
+from rapids.streaming.decoder import FlowDecoder, scale_in_place
+from rapids.streaming.metrics import MetricsServer, StageTimings
+from rapids.streaming.overload import SHED_MODES, OverloadGuard
+from rapids.streaming.retrain import BackgroundRetrainer
+from rapids.streaming.wire import SchemaRegistry, as_text
 
 logger = logging.getLogger(__name__)
 
 
+class ConsumerStats:
+    """Running counters for a single consumer."""
+
+    def __init__(self) -> None:
+        self.flow_count = 0
+        self.alert_count = 0
+        self.errors_count = 0
+        self.start_time = time.perf_counter()
+        self.stages = StageTimings()
+        self.overload_level = 0
+        self.shed = dict.fromkeys(SHED_MODES, 0)
+        self.model_version = "startup"
+        self.model_swaps = 0
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start_time
+
+    def throughput(self) -> float:
+        elapsed = self.elapsed()
+        return self.flow_count / elapsed if elapsed > 0 else 0.0
+
+
+def ensure_consumer_group(r: redis.Redis, stream_name: str, group_name: str, start_id: str = "0") -> None:
+    """
+    Create a consumer group on a stream if it does not exist yet.
+
+    Args:
+        r: Connected Redis client.
+        stream_name: Redis stream name (created if missing).
+        group_name: Consumer group name.
+        start_id: First stream id delivered to a newly created group.
+    """
+    try:
+        r.xgroup_create(stream_name, group_name, id=start_id, mkstream=True)
+        logger.info(f"Created consumer group '{group_name}' on stream '{stream_name}'")
+    except redis.ResponseError as e:
+        if "BUSYGROUP" not in str(e):
+            raise
+
+
+def process_messages(
+    messages: Sequence[Tuple[Any, dict]],
+    model,
+    scaler,
+    decoder: FlowDecoder,
+    reasoning_engine,
+    stats: ConsumerStats,
+    alert_sink: Optional[AlertSink] = None,
+    overload: Optional[OverloadGuard] = None,
+    retrainer: Optional[BackgroundRetrainer] = None,
+) -> None:
+    """
+    Detect anomalies in a batch of stream messages and feed the reasoning engine.
+
+    Malformed messages and per-flow failures are counted in ``stats.errors_count``
+    rather than raised, so every message in ``messages`` is considered handled.
+
+    Args:
+        messages: (message_id, fields) pairs as returned by XREAD/XREADGROUP.
+        model: Trained anomaly detection model.
+        scaler: Fitted feature scaler, or None when the model takes raw features.
+        decoder: FlowDecoder for the consumer's feature columns.
+        reasoning_engine: ReasoningEngine instance.
+        stats: Counters updated in place.
+        alert_sink: Receives every anomaly with its paths and recommendations.
+        overload: OverloadGuard deciding how much reasoning to shed under lag.
+        retrainer: BackgroundRetrainer sampling the batch's raw features.
+    """
+    started = time.perf_counter()
+    batch_ids, batch_flows, features = decoder.decode(messages, stats)
+    stats.stages.observe("decode", time.perf_counter() - started)
+    if batch_ids:
+        detect_and_reason(
+            batch_ids, batch_flows, features, model, scaler, reasoning_engine, stats, alert_sink, overload, retrainer
+        )
+
+
+def detect(features: np.ndarray, model, scaler, stages: Optional[StageTimings] = None) -> np.ndarray:
+    """
+    Scale ``features`` (in place when possible) and return model predictions.
+
+    When ``stages`` is given, the time spent scaling and predicting is recorded.
+    """
+    started = time.perf_counter()
+    features = scale_in_place(scaler, features)
+    scaled = time.perf_counter()
+    preds = model.predict(features)
+    if stages is not None:
+        stages.observe("scale", scaled - started)
+        stages.observe("predict", time.perf_counter() - scaled)
+    return preds
+
+
+def score(
+    features: np.ndarray, model, scaler, stages: Optional[StageTimings] = None
+) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Like :func:`detect`, but also return the model's anomaly scores.
+
+    Predictions come from ``decision_function`` (negative is anomalous, as
+    for IsolationForest), so scoring costs no more than ``predict``. Models
+    without ``decision_function`` return None scores.
+    """
+    if not hasattr(model, "decision_function"):
+        return detect(features, model, scaler, stages), None
+    started = time.perf_counter()
+    features = scale_in_place(scaler, features)
+    scaled = time.perf_counter()
+    scores = model.decision_function(features)
+    preds = np.where(scores < 0, -1, 1)
+    if stages is not None:
+        stages.observe("scale", scaled - started)
+        stages.observe("predict", time.perf_counter() - scaled)
+    return preds, scores
+
+
+def detect_and_reason(
+    batch_ids: List[str],
+    batch_flows: List[dict],
+    features: np.ndarray,
+    model,
+    scaler,
+    reasoning_engine,
+    stats: ConsumerStats,
+    alert_sink: Optional[AlertSink] = None,
+    overload: Optional[OverloadGuard] = None,
+    retrainer: Optional[BackgroundRetrainer] = None,
+) -> None:
+    """
+    Score one decoded block and pass every flow to the reasoning engine.
+
+    ``features`` is scaled in place when the scaler allows it, so
+    ``retrainer`` samples it first.
+    """
+    # Detect anomalies
+    scores = None
+    try:
+        if retrainer is not None:
+            retrainer.sample(features)
+        if overload is not None and overload.level > 0:
+            preds, scores = score(features, model, scaler, stats.stages)
+        else:
+            preds = detect(features, model, scaler, stats.stages)
+        if retrainer is not None:
+            retrainer.record(preds)
+    except Exception as e:
+        logger.error(f"Error during anomaly detection: {e}")
+        stats.errors_count += len(batch_ids)
+        return
+
+    reason(
+        batch_ids, batch_flows, preds, reasoning_engine, stats, alert_sink=alert_sink, overload=overload, scores=scores
+    )
+
+
+def reason(
+    batch_ids: List[str],
+    batch_flows: List[dict],
+    preds: np.ndarray,
+    reasoning_engine,
+    stats: ConsumerStats,
+    queue_depths: Optional[Dict[str, int]] = None,
+    alert_sink: Optional[AlertSink] = None,
+    overload: Optional[OverloadGuard] = None,
+    scores: Optional[np.ndarray] = None,
+) -> None:
+    """
+    Feed scored flows to the reasoning engine and handle anomalies.
+
+    Every anomaly goes to ``alert_sink`` when given; every 50th is also logged.
+
+    Only ``handle_anomaly`` calls are timed individually; ``observe_flow``
+    time is the rest of the loop, so normal flows carry no timing overhead.
+
+    With ``overload``, the batch's lag sets the overload level first; above
+    level 0 the batch is handled by :func:`reason_degraded` instead.
+    """
+    stats.flow_count += len(preds)
+    if overload is not None and batch_ids:
+        stats.overload_level = overload.observe(batch_ids[0])
+        if stats.overload_level > 0:
+            reason_degraded(batch_ids, batch_flows, preds, reasoning_engine, stats, overload, scores, alert_sink)
+            _maybe_log_stats(stats, len(preds), queue_depths)
+            return
+
+    perf_counter = time.perf_counter
+    started = perf_counter()
+    anomaly_seconds = 0.0
+
+    # Process each prediction
+    for msg_id, flow, pred in zip(batch_ids, batch_flows, preds):
+        try:
+            src, dst = reasoning_engine.observe_flow(flow)
+
+            if pred == -1:  # Anomaly detected
+                stats.alert_count += 1
+                anomaly_started = perf_counter()
+                paths, recommendations = reasoning_engine.handle_anomaly(src, dst, flow)
+                anomaly_seconds += perf_counter() - anomaly_started
+                _alert(msg_id, src, dst, paths, recommendations, stats, alert_sink)
+        except Exception as e:
+            logger.warning(f"Error processing flow in message {msg_id}: {e}")
+            stats.errors_count += 1
+            continue
+
+    stats.stages.observe("observe_flow", perf_counter() - started - anomaly_seconds)
+    if anomaly_seconds:
+        stats.stages.observe("handle_anomaly", anomaly_seconds)
+    _maybe_log_stats(stats, len(preds), queue_depths)
+
+
+def reason_degraded(
+    batch_ids: List[str],
+    batch_flows: List[dict],
+    preds: np.ndarray,
+    reasoning_engine,
+    stats: ConsumerStats,
+    overload: OverloadGuard,
+    scores: Optional[np.ndarray] = None,
+    alert_sink: Optional[AlertSink] = None,
+) -> None:
+    """
+    Reason about a batch at ``overload.level`` > 0, counting what is shed.
+
+    Weak anomalies (by ``scores``; all anomalies count as strong without
+    scores) are alerted with no paths and counted in ``stats.shed["reasoning"]``.
+    From level 2 the strong anomalies share one ``handle_anomalies`` call
+    (``stats.shed["paths"]``); at level 3 benign flows not sampled skip
+    ``observe_flow`` (``stats.shed["observe"]``).
+    """
+    level = overload.level
+    perf_counter = time.perf_counter
+    started = perf_counter()
+    anomaly_seconds = 0.0
+    deferred: List[Tuple[str, Any, Any, dict]] = []
+
+    for i, (msg_id, flow, pred) in enumerate(zip(batch_ids, batch_flows, preds)):
+        try:
+            if pred != -1:
+                if level >= 3 and not overload.sample_benign():
+                    stats.shed["observe"] += 1
+                else:
+                    reasoning_engine.observe_flow(flow)
+                continue
+
+            src, dst = reasoning_engine.observe_flow(flow)
+            stats.alert_count += 1
+            if scores is not None and overload.is_weak(scores[i]):
+                stats.shed["reasoning"] += 1
+                _alert(msg_id, src, dst, [], [], stats, alert_sink)
+            elif level >= 2:
+                deferred.append((msg_id, src, dst, flow))
+            else:
+                anomaly_started = perf_counter()
+                paths, recommendations = reasoning_engine.handle_anomaly(src, dst, flow)
+                anomaly_seconds += perf_counter() - anomaly_started
+                _alert(msg_id, src, dst, paths, recommendations, stats, alert_sink)
+        except Exception as e:
+            logger.warning(f"Error processing flow in message {msg_id}: {e}")
+            stats.errors_count += 1
+
+    if deferred:
+        anomaly_started = perf_counter()
+        try:
+            results = reasoning_engine.handle_anomalies([(src, dst, flow) for _, src, dst, flow in deferred])
+        except Exception as e:
+            logger.warning(f"Error handling {len(deferred)} anomalies together: {e}")
+            stats.errors_count += len(deferred)
+            results = []
+        anomaly_seconds += perf_counter() - anomaly_started
+        stats.shed["paths"] += len(results)
+        for (msg_id, src, dst, _), (paths, recommendations) in zip(deferred, results):
+            _alert(msg_id, src, dst, paths, recommendations, stats, alert_sink)
+
+    stats.stages.observe("observe_flow", perf_counter() - started - anomaly_seconds)
+    if anomaly_seconds:
+        stats.stages.observe("handle_anomaly", anomaly_seconds)
+
+
+def _alert(msg_id, src, dst, paths, recommendations, stats: ConsumerStats, alert_sink: Optional[AlertSink]) -> None:
+    if alert_sink is not None:
+        alert_sink.emit(msg_id, src, dst, paths, recommendations)
+
+    # Log outstanding alerts
+    if stats.alert_count % 50 == 0:
+        logger.info(f"[ALERT] {msg_id} (count={stats.alert_count})")
+        if paths:
+            best = paths[0]
+            path_str = " -> ".join(best["path"])
+            logger.info(f"[PATH] {path_str} risk={best['risk']:.2f}")
+        if recommendations:
+            rec = recommendations[0]
+            reduction = rec["risk_reduction"] * 100
+            logger.info(f"[ACTION] {rec['action']}")
+            logger.info(f"[REDUCTION] {reduction:.0f}%")
+
+
+def _maybe_log_stats(stats: ConsumerStats, batch_flows: int, queue_depths: Optional[Dict[str, int]]) -> None:
+    # Log statistics every 500 flows; batches rarely end exactly on a multiple
+    if stats.flow_count // 500 > (stats.flow_count - batch_flows) // 500:
+        log_stats(stats, queue_depths)
+
+
+def log_stats(stats: ConsumerStats, queue_depths: Optional[Dict[str, int]] = None) -> None:
+    """Log a [STATS] line with throughput, error rate and pipeline queue depths."""
+    error_rate = (stats.errors_count / stats.flow_count * 100) if stats.flow_count > 0 else 0
+    queues = ""
+    if queue_depths:
+        queues = " queues=" + ",".join(f"{name}:{depth}" for name, depth in queue_depths.items())
+    if stats.overload_level or any(stats.shed.values()):
+        queues += f" overload={stats.overload_level} shed=" + ",".join(
+            f"{mode}:{count}" for mode, count in stats.shed.items()
+        )
+    logger.info(
+        f"[STATS] flows={stats.flow_count} "
+        f"time={stats.elapsed():.2f}s "
+        f"throughput={stats.throughput():.2f} flows/sec "
+        f"alerts={stats.alert_count} "
+        f"errors={stats.errors_count} ({error_rate:.1f}%)"
+        f"{queues}"
+    )
+
+
+class StreamReader:
+    """
+    Read batches of entries from a Redis stream.
+
+    Without ``group_name`` entries are read with XREAD, starting after the
+    id stored in ``checkpoint`` if there is one, otherwise at the beginning
+    (``start_from="earliest"``) or at the current end of the stream
+    (``start_from="latest"``). The id of the last entry passed to :meth:`ack`
+    is saved to ``checkpoint`` at most every ``checkpoint_interval_sec``, so
+    a restart replays at most that window (at-least-once).
+
+    With ``group_name`` entries are read with XREADGROUP, acknowledged
+    through :meth:`ack`, and entries left pending by a dead consumer are taken
+    over with XAUTOCLAIM once idle for ``claim_idle_ms``. The group keeps its
+    own offset in Redis; ``start_from`` only applies when the group is created.
+    """
+
+    # A stream never runs out; replay transports set this at end of input
+    exhausted = False
+
+    def __init__(
+        self,
+        r: redis.Redis,
+        stream_name: str,
+        batch_size: int = 200,
+        block_ms: int = 200,
+        group_name: Optional[str] = None,
+        consumer_name: Optional[str] = None,
+        claim_idle_ms: int = 30000,
+        claim_interval_sec: float = 5.0,
+        checkpoint=None,
+        checkpoint_interval_sec: float = 5.0,
+        start_from: str = "earliest",
+    ) -> None:
+        self.r = r
+        self.stream_name = stream_name
+        self.batch_size = batch_size
+        self.block_ms = block_ms
+        self.group_name = group_name
+        self.consumer_name = consumer_name or "consumer-0"
+        self.claim_idle_ms = claim_idle_ms
+        self.claim_interval_sec = claim_interval_sec
+        self.last_id = "0-0"
+        self._claim_cursor = "0-0"
+        self._next_claim = time.perf_counter() + claim_interval_sec
+        self.checkpoint = None if group_name else checkpoint
+        self.checkpoint_interval_sec = checkpoint_interval_sec
+        self._processed_id: Optional[str] = None
+        self._saved_id: Optional[str] = None
+        self._next_checkpoint = time.perf_counter() + checkpoint_interval_sec
+
+        if start_from not in ("earliest", "latest"):
+            raise ValueError(f"start_from must be 'earliest' or 'latest', got {start_from!r}")
+
+        if group_name:
+            ensure_consumer_group(r, stream_name, group_name, start_id="$" if start_from == "latest" else "0")
+            return
+
+        resumed = self.checkpoint.load() if self.checkpoint is not None else None
+        if resumed:
+            self.last_id = resumed
+            self._saved_id = resumed
+            logger.info(f"Resuming stream '{stream_name}' after checkpoint {resumed}")
+        elif start_from == "latest":
+            newest = r.xrevrange(stream_name, count=1)
+            if newest:
+                self.last_id = as_text(newest[0][0])
+            logger.info(f"Starting stream '{stream_name}' at latest entry {self.last_id}")
+
+    def read(self) -> List[Tuple[Any, dict]]:
+        """Return the next batch of (entry_id, fields), possibly empty."""
+        if self.group_name and time.perf_counter() >= self._next_claim:
+            self._next_claim = time.perf_counter() + self.claim_interval_sec
+            claimed = self._claim_stale()
+            if claimed:
+                logger.info(f"Reclaimed {len(claimed)} stale pending entries")
+                return claimed
+
+        if self.group_name:
+            results = self.r.xreadgroup(
+                self.group_name,
+                self.consumer_name,
+                {self.stream_name: ">"},
+                count=self.batch_size,
+                block=self.block_ms,
+            )
+        else:
+            results = self.r.xread({self.stream_name: self.last_id}, count=self.batch_size, block=self.block_ms)
+
+        messages: List[Tuple[Any, dict]] = []
+        for _, stream_messages in results or []:
+            messages.extend(stream_messages)
+        if messages:
+            self.last_id = as_text(messages[-1][0])
+        return messages
+
+    def ack(self, entry_ids: Sequence[Any]) -> None:
+        """Mark entries as handled: XACK in a group, otherwise advance the checkpoint."""
+        if not entry_ids:
+            return
+        if self.group_name:
+            self.r.xack(self.stream_name, self.group_name, *entry_ids)
+        elif self.checkpoint is not None:
+            self._processed_id = as_text(entry_ids[-1])
+            if time.perf_counter() >= self._next_checkpoint:
+                self.save_checkpoint()
+
+    def save_checkpoint(self) -> None:
+        """Persist the last handled entry id now, if it changed."""
+        self._next_checkpoint = time.perf_counter() + self.checkpoint_interval_sec
+        if self.checkpoint is None or self._processed_id is None or self._processed_id == self._saved_id:
+            return
+        self.checkpoint.save(self._processed_id)
+        self._saved_id = self._processed_id
+
+    def _claim_stale(self) -> List[Tuple[Any, dict]]:
+        response: Any = self.r.xautoclaim(
+            self.stream_name,
+            self.group_name,
+            self.consumer_name,
+            min_idle_time=self.claim_idle_ms,
+            start_id=self._claim_cursor,
+            count=self.batch_size,
+        )
+        self._claim_cursor = as_text(response[0])
+        # Entries deleted from the stream while pending come back with no fields
+        return [(msg_id, data) for msg_id, data in response[1] if data is not None]
+
+
 def run_consumer(
     model,
     scaler,
@@ -24,10 +483,63 @@ def run_consumer(
     retry_delay_sec: float = 0.5,
     batch_size: int = 200,
     block_ms: int = 200,
+    group_name: Optional[str] = None,
+    consumer_name: Optional[str] = None,
+    claim_idle_ms: int = 30000,
+    claim_interval_sec: float = 5.0,
+    wire_format: str = "json",
+    pipeline_depth: int = 0,
+    checkpoint_store: str = "none",
+    checkpoint_path: Optional[str] = None,
+    checkpoint_interval_sec: float = 5.0,
+    start_from: str = "earliest",
+    latency_target_ms: Optional[float] = None,
+    min_batch_size: int = 20,
+    max_batch_size: int = 5000,
+    metrics_port: Optional[int] = None,
+    alert_sink: Optional[AlertSink] = None,
+    overload: Optional[OverloadGuard] = None,
+    retrainer: Optional[BackgroundRetrainer] = None,
 ) -> None:
     """
     Consume flows from Redis stream and process anomalies.
-    
+
+    Without ``group_name`` the consumer reads the whole stream with XREAD from
+    the beginning. With ``group_name`` it joins a consumer group and reads with
+    XREADGROUP, so several consumers (typically separate processes) share the
+    stream and each flow is delivered to exactly one of them. Entries are
+    acknowledged with XACK once handled, and entries left pending by a crashed
+    consumer are taken over with XAUTOCLAIM after ``claim_idle_ms``.
+
+    With ``wire_format="binary"`` the consumer also accepts packed batch
+    entries (see ``rapids.streaming.wire``); JSON entries are still decoded.
+    ``batch_size`` then bounds stream entries per read, not flows.
+
+    With ``pipeline_depth > 0`` decoding, scoring and reasoning run as separate
+    stages connected by bounded queues (see ``rapids.streaming.pipeline``), so
+    scoring of the next batch overlaps with reasoning on the current one.
+
+    With ``latency_target_ms`` the read ``count`` and block timeout start at
+    ``batch_size`` and ``block_ms`` and are then tuned per batch toward that
+    p99 end-to-end latency (see ``rapids.streaming.adaptive``).
+
+    With ``metrics_port`` counters, per-stage latency histograms, queue depths
+    and XINFO stream lag are served in Prometheus text format on
+    ``http://127.0.0.1:<metrics_port>/metrics``.
+
+    With ``alert_sink`` every anomaly, with its attack paths and recommended
+    action, is written in batches by the sink's background thread (see
+    ``rapids.streaming.alerts``); the sink is started here and closed on exit.
+
+    With ``overload`` the reasoning stage sheds work in steps as stream lag
+    grows and returns to full reasoning once it drains (see
+    ``rapids.streaming.overload``); shed flows are counted in the stats.
+
+    With ``retrainer`` a sample of the live flows is kept and the detector is
+    retrained on it in a background worker; each new scaler and model replace
+    the current ones between two batches (see ``rapids.streaming.retrain``),
+    and the swap shows in the logs, stats and metrics.
+
     Args:
         model: Trained anomaly detection model.
         scaler: Fitted feature scaler.
@@ -41,121 +553,168 @@ def run_consumer(
         retry_delay_sec: Delay between retries.
         batch_size: Number of flows to batch.
         block_ms: Redis XREAD block timeout.
+        group_name: Consumer group to join; None reads the stream directly.
+        consumer_name: Name of this consumer within the group.
+        claim_idle_ms: Idle time after which pending entries are reclaimed.
+        claim_interval_sec: How often to check for reclaimable entries.
+        wire_format: "json" or "binary".
+        pipeline_depth: Bound of each inter-stage queue; 0 runs all stages inline.
+        checkpoint_store: Where to keep the resume offset: "none", "redis" or "file".
+        checkpoint_path: Checkpoint file path or Redis key (defaults derive from the stream).
+        checkpoint_interval_sec: Minimum time between checkpoint writes.
+        start_from: "earliest" or "latest" when no checkpoint exists.
+        latency_target_ms: p99 end-to-end latency target; None keeps the batch size fixed.
+        min_batch_size: Smallest read count the adaptive mode may choose.
+        max_batch_size: Largest read count the adaptive mode may choose.
+        metrics_port: Local port for the metrics endpoint; None disables it.
+        alert_sink: AlertSink receiving anomalies; None only logs every 50th.
+        overload: OverloadGuard for lag-driven degradation; None always reasons fully.
+        retrainer: BackgroundRetrainer for live retraining; None keeps the startup model.
     """
+    binary = wire_format == "binary"
     try:
-        r = connect_redis(redis_host, redis_port, connect_retries, retry_delay_sec)
+        r = connect_redis(
+            redis_host, redis_port, connect_retries, retry_delay_sec, decode_responses=not binary
+        )
     except Exception as e:
         logger.error(f"Failed to connect to Redis: {e}")
         raise
 
-    last_id = "0-0"
-    logger.info(f"[*] Consumer started. Waiting for flows on stream '{stream_name}'...")
+    reader = StreamReader(
+        r,
+        stream_name,
+        batch_size=batch_size,
+        block_ms=block_ms,
+        group_name=group_name,
+        consumer_name=consumer_name,
+        claim_idle_ms=claim_idle_ms,
+        claim_interval_sec=claim_interval_sec,
+        checkpoint=open_checkpoint(checkpoint_store, r, stream_name, checkpoint_path),
+        checkpoint_interval_sec=checkpoint_interval_sec,
+        start_from=start_from,
+    )
+    if group_name:
+        logger.info(
+            f"[*] Consumer '{reader.consumer_name}' joined group '{group_name}'. "
+            f"Waiting for flows on stream '{stream_name}'..."
+        )
+    else:
+        logger.info(f"[*] Consumer started. Waiting for flows on stream '{stream_name}'...")
 
-    flow_count = 0
-    alert_count = 0
-    errors_count = 0
-    start_time = time.perf_counter()
+    consume(
+        reader,
+        model,
+        scaler,
+        feature_columns,
+        stop_event,
+        reasoning_engine,
+        retry_delay_sec=retry_delay_sec,
+        pipeline_depth=pipeline_depth,
+        schemas=SchemaRegistry(r, stream_name) if binary else None,
+        latency_target_ms=latency_target_ms,
+        min_batch_size=min_batch_size,
+        max_batch_size=max_batch_size,
+        metrics_port=metrics_port,
+        alert_sink=alert_sink,
+        overload=overload,
+        retrainer=retrainer,
+    )
+
+
+def consume(
+    reader,
+    model,
+    scaler,
+    feature_columns: List[str],
+    stop_event,
+    reasoning_engine,
+    retry_delay_sec: float = 0.5,
+    pipeline_depth: int = 0,
+    schemas: Optional[SchemaRegistry] = None,
+    latency_target_ms: Optional[float] = None,
+    min_batch_size: int = 20,
+    max_batch_size: int = 5000,
+    metrics_port: Optional[int] = None,
+    alert_sink: Optional[AlertSink] = None,
+    overload: Optional[OverloadGuard] = None,
+    retrainer: Optional[BackgroundRetrainer] = None,
+) -> ConsumerStats:
+    """
+    Run the consumer loop over ``reader`` until ``stop_event`` is set or the
+    reader is exhausted.
+
+    ``reader`` is a StreamReader or any transport with the same interface
+    (see ``rapids.streaming.transport``). The remaining arguments are as for
+    ``run_consumer``; ``schemas`` resolves binary batch entries.
+
+    Returns:
+        The final consumer statistics.
+    """
+    stats = ConsumerStats()
+    controller = None
+    if latency_target_ms:
+        controller = BatchController(
+            reader, latency_target_ms, min_batch_size=min_batch_size, max_batch_size=max_batch_size
+        )
+    if alert_sink is not None:
+        alert_sink.start()
+    metrics = None
+    if metrics_port is not None:
+        # Stream lag comes from XINFO, so it is only reported for Redis readers
+        metrics = MetricsServer(stats, reader if isinstance(reader, StreamReader) else None, port=metrics_port)
+        metrics.start()
 
     try:
-        while not stop_event.is_set():
-            try:
-                results = r.xread({stream_name: last_id}, count=batch_size, block=block_ms)
+        if pipeline_depth > 0:
+            from rapids.streaming.pipeline import StagedPipeline
 
-                if not results:
+            pipeline = StagedPipeline(
+                reader,
+                model,
+                scaler,
+                feature_columns,
+                reasoning_engine,
+                stats,
+                depth=pipeline_depth,
+                schemas=schemas,
+                retry_delay_sec=retry_delay_sec,
+                controller=controller,
+                alert_sink=alert_sink,
+                overload=overload,
+                retrainer=retrainer,
+            )
+            if metrics is not None:
+                metrics.queue_depths = pipeline.queue_depths
+            pipeline.run(stop_event)
+            return stats
+
+        decoder = FlowDecoder(feature_columns, capacity=reader.batch_size, schemas=schemas)
+        while not stop_event.is_set() and not reader.exhausted:
+            try:
+                messages = reader.read()
+                if not messages:
                     continue
 
-                for stream, messages in results:
-                    batch_ids = []
-                    batch_vectors = []
-                    batch_flows = []
-
-                    for msg_id, data in messages:
-                        last_id = str(msg_id)
-
-                        if "flow" not in data:
-                            logger.warning(f"Message {msg_id} missing 'flow' field")
-                            errors_count += 1
-                            continue
-
-                        try:
-                            flow = json.loads(data["flow"])
-                        except json.JSONDecodeError as e:
-                            logger.warning(f"Failed to parse flow JSON in {msg_id}: {e}")
-                            errors_count += 1
-                            continue
-
-                        try:
-                            vector = [flow[col] for col in feature_columns]
-                        except KeyError as e:
-                            logger.warning(f"Missing feature {e} in flow {msg_id}")
-                            errors_count += 1
-                            continue
-
-                        batch_ids.append(msg_id)
-                        batch_flows.append(flow)
-                        batch_vectors.append(vector)
-
-                    if not batch_vectors:
-                        continue
-
-                    # Detect anomalies
-                    try:
-                        features = np.array(batch_vectors, dtype=float)
-                        features = scaler.transform(features)
-                        preds = model.predict(features)
-                    except Exception as e:
-                        logger.error(f"Error during anomaly detection: {e}")
-                        errors_count += len(batch_ids)
-                        continue
-
-                    flow_count += len(preds)
-
-                    # Process each prediction
-                    for msg_id, flow, pred in zip(batch_ids, batch_flows, preds):
-                        try:
-                            src, dst = reasoning_engine.observe_flow(flow)
-
-                            if pred == -1:  # Anomaly detected
-                                alert_count += 1
-                                paths, recommendations = reasoning_engine.handle_anomaly(src, dst, flow)
-
-                                # Log outstanding alerts
-                                if alert_count % 50 == 0:
-                                    logger.info(f"[ALERT] {msg_id} (count={alert_count})")
-                                    if paths:
-                                        best = paths[0]
-                                        path_str = " -> ".join(best["path"])
-                                        logger.info(f"[PATH] {path_str} risk={best['risk']:.2f}")
-                                    if recommendations:
-                                        rec = recommendations[0]
-                                        reduction = rec["risk_reduction"] * 100
-                                        logger.info(f"[ACTION] {rec['action']}")
-                                        logger.info(f"[REDUCTION] {reduction:.0f}%")
-                        except Exception as e:
-                            logger.warning(f"Error processing flow in message {msg_id}: {e}")
-                            errors_count += 1
-                            continue
-
-                    # Log statistics every 500 flows
-                    if flow_count % 500 == 0:
-                        elapsed = time.perf_counter() - start_time
-                        fps = flow_count / elapsed if elapsed > 0 else 0
-                        error_rate = (errors_count / flow_count * 100) if flow_count > 0 else 0
-                        logger.info(
-                            f"[STATS] flows={flow_count} "
-                            f"time={elapsed:.2f}s "
-                            f"throughput={fps:.2f} flows/sec "
-                            f"alerts={alert_count} "
-                            f"errors={errors_count} ({error_rate:.1f}%)"
-                        )
+                read_at = time.perf_counter()
+                full = len(messages) >= reader.batch_size
+                if retrainer is not None:
+                    # Swap in a freshly trained model between batches only
+                    model, scaler = retrainer.poll(model, scaler, stats)
+                process_messages(
+                    messages, model, scaler, decoder, reasoning_engine, stats, alert_sink, overload, retrainer
+                )
+                entry_ids = [msg_id for msg_id, _ in messages]
+                reader.ack(entry_ids)
+                if controller is not None:
+                    controller.observe(entry_ids, time.perf_counter() - read_at, full)
 
             except redis.RedisError as e:
                 logger.error(f"Redis error during xread: {e}")
-                errors_count += 1
+                stats.errors_count += 1
                 time.sleep(retry_delay_sec)
             except Exception as e:
                 logger.error(f"Unexpected error in consumer loop: {e}")
-                errors_count += 1
+                stats.errors_count += 1
                 time.sleep(retry_delay_sec)
 
     except KeyboardInterrupt:
@@ -163,10 +722,28 @@ def run_consumer(
     except Exception as e:
         logger.error(f"Fatal error in consumer: {e}")
     finally:
+        if metrics is not None:
+            metrics.stop()
+        if retrainer is not None:
+            retrainer.close()
+        try:
+            reader.save_checkpoint()
+        except Exception as e:
+            logger.error(f"Failed to save stream checkpoint: {e}")
+        if alert_sink is not None:
+            alert_sink.close()
+        if hasattr(reasoning_engine, "close"):
+            reasoning_engine.close()
         logger.info("[*] Consumer shutting down.")
-        elapsed = time.perf_counter() - start_time
-        fps = flow_count / elapsed if elapsed > 0 else 0
         logger.info(
-            f"[FINAL] Processed {flow_count} flows in {elapsed:.2f}s "
-            f"({fps:.2f} fps), {alert_count} alerts, {errors_count} errors"
+            f"[FINAL] Processed {stats.flow_count} flows in {stats.elapsed():.2f}s "
+            f"({stats.throughput():.2f} fps), {stats.alert_count} alerts, {stats.errors_count} errors"
         )
+        if any(stats.shed.values()):
+            logger.info(
+                "[FINAL] Shed under overload: " + ", ".join(f"{mode}={count}" for mode, count in stats.shed.items())
+            )
+        if stats.model_swaps:
+            logger.info(f"[FINAL] Model swapped {stats.model_swaps} times, now {stats.model_version}")
+
+    return stats
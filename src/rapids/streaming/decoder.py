@@ -0,0 +1,151 @@
+"""Schema-compiled flow decoding into a reusable feature buffer."""
+import json
+import logging
+from operator import itemgetter
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sklearn.preprocessing import StandardScaler
+
+from rapids.streaming.wire import SchemaRegistry, as_text, decode_batch, is_binary_entry, stream_field
+
+logger = logging.getLogger(__name__)
+
+
+def scale_in_place(scaler, features: np.ndarray) -> np.ndarray:
+    """
+    Apply a fitted scaler to ``features`` without allocating a new array.
+
+    ``StandardScaler`` is applied in place; any other scaler falls back to
+    ``scaler.transform`` and the returned array must be used instead. A
+    ``None`` scaler (the model takes raw features) leaves ``features`` as is.
+    """
+    if scaler is None:
+        return features
+    if isinstance(scaler, StandardScaler) and features.flags.writeable:
+        if scaler.with_mean:
+            np.subtract(features, scaler.mean_, out=features)
+        if scaler.with_std:
+            np.divide(features, scaler.scale_, out=features)
+        return features
+    return scaler.transform(features)
+
+
+class FlowDecoder:
+    """
+    Decode stream messages straight into a preallocated feature matrix.
+
+    The column order is resolved once: JSON flows go through an ``itemgetter``
+    compiled for ``feature_columns``, and binary batches through a column index
+    computed once per schema id. Rows are written into a buffer that is reused
+    across calls, so the array returned by :meth:`decode` is only valid until
+    the next call. The buffer grows if a read holds more rows than ``capacity``.
+    """
+
+    def __init__(
+        self,
+        feature_columns: Sequence[str],
+        capacity: int = 256,
+        schemas: Optional[SchemaRegistry] = None,
+    ) -> None:
+        self.feature_columns = list(feature_columns)
+        self.schemas = schemas
+        self._getter = itemgetter(*self.feature_columns)
+        self._buffer = np.empty((max(capacity, 1), len(self.feature_columns)), dtype=np.float64)
+        # Per schema: are the feature columns its leading columns, in order
+        self._prefix: Dict[str, bool] = {}
+
+    @property
+    def capacity(self) -> int:
+        return self._buffer.shape[0]
+
+    def _reserve(self, rows: int) -> None:
+        if rows > self.capacity:
+            grown = np.empty((max(rows, 2 * self.capacity), self._buffer.shape[1]), dtype=np.float64)
+            grown[: self.capacity] = self._buffer
+            self._buffer = grown
+
+    def decode(self, messages: Sequence[Tuple[Any, dict]], stats) -> Tuple[List[str], List[dict], np.ndarray]:
+        """
+        Decode messages into the feature buffer.
+
+        Malformed messages and flows missing a feature are skipped and counted
+        in ``stats.errors_count``.
+
+        Returns:
+            Tuple of (message_ids, flows, features) where ``features`` is a
+            view of the shared buffer with one row per returned flow.
+        """
+        ids: List[str] = []
+        flows: List[dict] = []
+        self._reserve(len(messages))
+        n = 0
+
+        for msg_id, data in messages:
+            msg_id = as_text(msg_id)
+
+            if self.schemas is not None and is_binary_entry(data):
+                n = self._decode_binary(msg_id, data, ids, flows, n, stats)
+                continue
+
+            raw = stream_field(data, "flow")
+            if raw is None:
+                logger.warning(f"Message {msg_id} missing 'flow' field")
+                stats.errors_count += 1
+                continue
+
+            try:
+                flow = json.loads(raw)
+            except json.JSONDecodeError as e:
+                logger.warning(f"Failed to parse flow JSON in {msg_id}: {e}")
+                stats.errors_count += 1
+                continue
+
+            try:
+                self._buffer[n] = self._getter(flow)
+            except KeyError as e:
+                logger.warning(f"Missing feature {e} in flow {msg_id}")
+                stats.errors_count += 1
+                continue
+            except (TypeError, ValueError) as e:
+                logger.warning(f"Non-numeric feature in flow {msg_id}: {e}")
+                stats.errors_count += 1
+                continue
+
+            ids.append(msg_id)
+            flows.append(flow)
+            n += 1
+
+        return ids, flows, self._buffer[:n]
+
+    def _decode_binary(self, msg_id: str, data: dict, ids: List[str], flows: List[dict], n: int, stats) -> int:
+        try:
+            schema, values = decode_batch(data)
+        except ValueError as e:
+            logger.warning(f"Failed to decode binary batch in {msg_id}: {e}")
+            stats.errors_count += 1
+            return n
+
+        index = self.schemas.column_index(schema, self.feature_columns)
+        if index is None:
+            logger.warning(f"Unknown or incompatible schema {schema} in {msg_id}")
+            stats.errors_count += len(values)
+            return n
+
+        rows = len(values)
+        self._reserve(n + rows)
+        if self._is_prefix(schema, index):
+            # Extra trailing columns (e.g. host identity) are not copied
+            self._buffer[n : n + rows] = values[:, : len(index)]
+        else:
+            self._buffer[n : n + rows] = values[:, index]
+
+        columns = self.schemas.columns(schema)
+        flows.extend(dict(zip(columns, row)) for row in values.tolist())
+        ids.extend(f"{msg_id}#{i}" for i in range(rows))
+        return n + rows
+
+    def _is_prefix(self, schema: str, index: np.ndarray) -> bool:
+        if schema not in self._prefix:
+            self._prefix[schema] = bool(np.array_equal(index, np.arange(len(self.feature_columns))))
+        return self._prefix[schema]
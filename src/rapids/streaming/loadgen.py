@@ -0,0 +1,453 @@
+"""Open-loop load generation against a Redis stream with declarative rate profiles.
+
+A profile is a list of phases played back to back, each with a rate in
+flows per second over time:
+
+* ``constant``: ``fps`` for ``duration_sec``;
+* ``ramp``: linear from ``start_fps`` to ``end_fps`` over ``duration_sec``;
+* ``step``: each of ``levels`` held for ``step_sec``;
+* ``burst``: ``base_fps``, with ``burst_fps`` for the first ``burst_sec`` of
+  every ``period_sec``, for ``duration_sec``;
+* ``diurnal``: a sinusoid around ``mean_fps`` with ``amplitude_fps``, starting
+  at the trough, one cycle per ``period_sec``, for ``duration_sec``.
+
+A ``replay`` profile instead sends every flow at its original capture time
+(``timestamp_column``), sped up by ``speed``; it cannot be combined with
+other phases. Profiles are usually written in YAML, e.g.::
+
+    - {type: ramp, start_fps: 500, end_fps: 5000, duration_sec: 60}
+    - {type: burst, base_fps: 1000, burst_fps: 8000, period_sec: 10, burst_sec: 1, duration_sec: 60}
+
+:func:`run_load` is open loop: the number of flows due is a function of wall
+time only, so a slow consumer or a slow XADD never stretches the schedule.
+Flows that are late go out in the next pipeline, up to ``max_batch`` at a
+time, and the shortfall is reported as ``behind``.
+"""
+import logging
+import math
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import yaml
+
+from rapids.core.redis_utils import connect_redis
+from rapids.streaming.producer import flow_encoder, iter_flows
+from rapids.streaming.wire import SchemaRegistry
+
+logger = logging.getLogger(__name__)
+
+
+class ConstantPhase:
+    """A fixed rate."""
+
+    def __init__(self, fps: float, duration_sec: float) -> None:
+        self.fps = float(fps)
+        self.duration_sec = float(duration_sec)
+
+    def rate(self, t: float) -> float:
+        return self.fps
+
+    def count(self, t: float) -> float:
+        return self.fps * t
+
+
+class RampPhase:
+    """A rate changing linearly from ``start_fps`` to ``end_fps``."""
+
+    def __init__(self, start_fps: float, end_fps: float, duration_sec: float) -> None:
+        self.start_fps = float(start_fps)
+        self.end_fps = float(end_fps)
+        self.duration_sec = float(duration_sec)
+
+    def rate(self, t: float) -> float:
+        return self.start_fps + (self.end_fps - self.start_fps) * t / self.duration_sec
+
+    def count(self, t: float) -> float:
+        return self.start_fps * t + (self.end_fps - self.start_fps) * t * t / (2.0 * self.duration_sec)
+
+
+class StepPhase:
+    """Each of ``levels`` held for ``step_sec``."""
+
+    def __init__(self, levels: Sequence[float], step_sec: float) -> None:
+        if not levels:
+            raise ValueError("A step phase needs at least one level")
+        self.levels = [float(level) for level in levels]
+        self.step_sec = float(step_sec)
+        self.duration_sec = self.step_sec * len(self.levels)
+
+    def _step(self, t: float) -> int:
+        return min(int(t // self.step_sec), len(self.levels) - 1)
+
+    def rate(self, t: float) -> float:
+        return self.levels[self._step(t)]
+
+    def count(self, t: float) -> float:
+        step = self._step(t)
+        return sum(self.levels[:step]) * self.step_sec + self.levels[step] * (t - step * self.step_sec)
+
+
+class BurstPhase:
+    """``base_fps`` with a burst of ``burst_fps`` at the start of every period."""
+
+    def __init__(
+        self, base_fps: float, burst_fps: float, period_sec: float, burst_sec: float, duration_sec: float
+    ) -> None:
+        if not 0 < burst_sec <= period_sec:
+            raise ValueError("Require 0 < burst_sec <= period_sec")
+        self.base_fps = float(base_fps)
+        self.burst_fps = float(burst_fps)
+        self.period_sec = float(period_sec)
+        self.burst_sec = float(burst_sec)
+        self.duration_sec = float(duration_sec)
+
+    def rate(self, t: float) -> float:
+        return self.burst_fps if t % self.period_sec < self.burst_sec else self.base_fps
+
+    def count(self, t: float) -> float:
+        periods, offset = divmod(t, self.period_sec)
+        per_period = self.burst_fps * self.burst_sec + self.base_fps * (self.period_sec - self.burst_sec)
+        return (
+            periods * per_period
+            + self.burst_fps * min(offset, self.burst_sec)
+            + self.base_fps * max(0.0, offset - self.burst_sec)
+        )
+
+
+class DiurnalPhase:
+    """A sinusoidal rate, ``mean_fps - amplitude_fps * cos(2 pi t / period_sec)``."""
+
+    def __init__(self, mean_fps: float, amplitude_fps: float, period_sec: float, duration_sec: float) -> None:
+        if not 0 <= amplitude_fps <= mean_fps:
+            raise ValueError("Require 0 <= amplitude_fps <= mean_fps")
+        self.mean_fps = float(mean_fps)
+        self.amplitude_fps = float(amplitude_fps)
+        self.period_sec = float(period_sec)
+        self.duration_sec = float(duration_sec)
+
+    def rate(self, t: float) -> float:
+        return self.mean_fps - self.amplitude_fps * math.cos(2 * math.pi * t / self.period_sec)
+
+    def count(self, t: float) -> float:
+        omega = 2 * math.pi / self.period_sec
+        return self.mean_fps * t - self.amplitude_fps * math.sin(omega * t) / omega
+
+
+PHASES = {
+    "constant": ConstantPhase,
+    "ramp": RampPhase,
+    "step": StepPhase,
+    "burst": BurstPhase,
+    "diurnal": DiurnalPhase,
+}
+
+
+class RateProfile:
+    """Phases played back to back; ``count(t)`` is the number of flows due by ``t``."""
+
+    def __init__(self, phases: Sequence[Any]) -> None:
+        if not phases:
+            raise ValueError("A rate profile needs at least one phase")
+        self.phases = list(phases)
+        self.duration_sec = sum(phase.duration_sec for phase in self.phases)
+
+    def _locate(self, t: float) -> Tuple[float, float, Any]:
+        before = 0.0
+        start = 0.0
+        for phase in self.phases:
+            if t < start + phase.duration_sec:
+                return before, t - start, phase
+            before += phase.count(phase.duration_sec)
+            start += phase.duration_sec
+        return before, 0.0, None
+
+    def rate(self, t: float) -> float:
+        _, offset, phase = self._locate(t)
+        return phase.rate(offset) if phase is not None else 0.0
+
+    def count(self, t: float) -> float:
+        before, offset, phase = self._locate(t)
+        return before + (phase.count(offset) if phase is not None else 0.0)
+
+
+class ReplayProfile:
+    """Send flows at their capture times, ``speed`` times faster."""
+
+    def __init__(
+        self, timestamp_column: str = " Timestamp", speed: float = 1.0, duration_sec: Optional[float] = None
+    ) -> None:
+        if speed <= 0:
+            raise ValueError("speed must be positive")
+        self.timestamp_column = timestamp_column
+        self.speed = float(speed)
+        self.duration_sec = float(duration_sec) if duration_sec is not None else math.inf
+
+
+def parse_profile(spec: Union[Dict[str, Any], Sequence[Dict[str, Any]]]) -> Union[RateProfile, ReplayProfile]:
+    """
+    Build a profile from its declarative form.
+
+    Args:
+        spec: One phase mapping or a list of them, each with a ``type``.
+
+    Returns:
+        A RateProfile, or a ReplayProfile for a single ``replay`` entry.
+
+    Raises:
+        ValueError: On an unknown type, bad parameters, or ``replay``
+            combined with other phases.
+    """
+    entries = [spec] if isinstance(spec, dict) else list(spec or [])
+    if not entries:
+        raise ValueError("Empty load profile")
+
+    phases = []
+    for entry in entries:
+        params = dict(entry)
+        kind = params.pop("type", None)
+        if kind == "replay":
+            if len(entries) > 1:
+                raise ValueError("A replay profile cannot be combined with other phases")
+            cls = ReplayProfile
+        elif kind in PHASES:
+            cls = PHASES[kind]
+        else:
+            raise ValueError(f"Unknown load phase type {kind!r}; expected one of {sorted(PHASES) + ['replay']}")
+        try:
+            phase = cls(**params)
+        except TypeError as e:
+            raise ValueError(f"Bad parameters for {kind} phase: {e}") from e
+        if kind == "replay":
+            return phase
+        phases.append(phase)
+    return RateProfile(phases)
+
+
+def load_profile(path: str) -> Union[RateProfile, ReplayProfile]:
+    """Read a profile from a YAML (or JSON) file; see :func:`parse_profile`."""
+    with open(path, "r") as f:
+        return parse_profile(yaml.safe_load(f))
+
+
+class LoadSample(NamedTuple):
+    """Send rates over one reporting interval."""
+
+    elapsed_sec: float
+    target_fps: float
+    achieved_fps: float
+    behind: int
+
+
+class LoadReport:
+    """Outcome of one :func:`run_load` run."""
+
+    def __init__(self) -> None:
+        self.samples: List[LoadSample] = []
+        self.target = 0
+        self.sent = 0
+        self.elapsed_sec = 0.0
+        self.max_behind = 0
+
+    @property
+    def target_fps(self) -> float:
+        return self.target / self.elapsed_sec if self.elapsed_sec else 0.0
+
+    @property
+    def achieved_fps(self) -> float:
+        return self.sent / self.elapsed_sec if self.elapsed_sec else 0.0
+
+
+class _FlowSource:
+    """
+    Flows from a CSV, a chunk at a time, restarting at the end when ``loop``.
+
+    For replay, each chunk also carries the second, relative to the first
+    flow and divided by ``speed``, at which each of its rows is due. Capture
+    files are only roughly ordered, so times are made non-decreasing.
+    """
+
+    def __init__(
+        self,
+        csv_path: str,
+        chunk_rows: int,
+        loop: bool,
+        registry: Optional[SchemaRegistry] = None,
+        replay: Optional[ReplayProfile] = None,
+        cache_dir: Optional[str] = None,
+        columns: Optional[List[str]] = None,
+    ) -> None:
+        self.csv_path = csv_path
+        self.cache_dir = cache_dir
+        self.columns = columns
+        self.chunk_rows = chunk_rows
+        self.loop = loop and replay is None
+        self.registry = registry
+        self.replay = replay
+        self.exhausted = False
+        self._chunks = self._open()
+        self._chunk = None
+        self._schema = None
+        self._due_at: Optional[np.ndarray] = None
+        self._offset = 0
+        self._first: Optional[float] = None
+        self._latest = 0.0
+
+    def _open(self):
+        column = self.replay.timestamp_column if self.replay is not None else None
+        return iter_flows(
+            self.csv_path, self.chunk_rows, timestamp_column=column, cache_dir=self.cache_dir, columns=self.columns
+        )
+
+    def _advance(self) -> bool:
+        chunk = next(self._chunks, None)
+        if chunk is None and self.loop and self._chunk is not None:
+            self._chunks = self._open()
+            chunk = next(self._chunks, None)
+        if chunk is None:
+            self.exhausted = True
+            return False
+        self._chunk = chunk
+        self._offset = 0
+        self._schema = self.registry.register(chunk.columns.tolist()) if self.registry is not None else None
+        if self.replay is not None:
+            stamps = chunk.index.to_numpy(dtype=np.float64)
+            if self._first is None:
+                self._first = stamps[0]
+            due_at = np.maximum.accumulate(np.maximum((stamps - self._first) / self.replay.speed, self._latest))
+            self._latest = due_at[-1]
+            self._due_at = due_at
+        return True
+
+    def _ready(self) -> bool:
+        if self.exhausted:
+            return False
+        if self._chunk is None or self._offset >= len(self._chunk):
+            return self._advance()
+        return True
+
+    def due(self, elapsed: float) -> int:
+        """Replay only: rows of the current chunk due by ``elapsed`` and not yet taken."""
+        if not self._ready():
+            return 0
+        return int(np.searchsorted(self._due_at, elapsed, side="right")) - self._offset
+
+    def take(self, count: int) -> List[Tuple[Any, Optional[str]]]:
+        """Up to ``count`` rows as (DataFrame slice, schema) pieces; fewer once exhausted."""
+        pieces = []
+        while count > 0 and self._ready():
+            piece = self._chunk.iloc[self._offset : self._offset + count]
+            self._offset += len(piece)
+            count -= len(piece)
+            pieces.append((piece, self._schema))
+        return pieces
+
+
+def run_load(
+    csv_path: str,
+    profile: Union[RateProfile, ReplayProfile],
+    stream_name: str = "rapids_stream",
+    redis_host: str = "localhost",
+    redis_port: int = 6379,
+    connect_retries: int = 5,
+    retry_delay_sec: float = 0.5,
+    wire_format: str = "json",
+    wire_dtype: str = "float64",
+    chunk_rows: int = 100000,
+    tick_sec: float = 0.01,
+    max_batch: int = 5000,
+    report_interval_sec: float = 1.0,
+    loop: bool = True,
+    cache_dir: Optional[str] = None,
+    columns: Optional[List[str]] = None,
+) -> LoadReport:
+    """
+    Send flows from a CSV to a Redis stream following a rate profile.
+
+    Every ``tick_sec`` the flows due by now and not yet sent go out in one
+    non-transactional pipeline (at most ``max_batch`` per round trip; a
+    larger backlog is sent in consecutive pipelines without sleeping). With
+    ``wire_format="binary"`` each pipeline piece becomes one packed entry.
+
+    Every ``report_interval_sec`` the target and achieved rates over the
+    interval are logged and kept in the report; ``behind`` is the backlog
+    found at the last send, i.e. flows already due before it went out (about
+    one tick's worth when keeping up). The run ends when the profile does, or when
+    the CSV runs out (immediately for rate profiles with ``loop=False``).
+
+    Args:
+        csv_path: Flow CSV to send.
+        profile: RateProfile or ReplayProfile (see :func:`parse_profile`).
+        cache_dir: Dataset cache directory for rate profiles (see
+            ``iter_flows``); replay profiles need the CSV's timestamps.
+        columns: Send only these columns.
+
+    Returns:
+        LoadReport with per-interval samples and totals.
+    """
+    r = connect_redis(redis_host, redis_port, connect_retries, retry_delay_sec)
+    registry = SchemaRegistry(r, stream_name) if wire_format == "binary" else None
+    replay = profile if isinstance(profile, ReplayProfile) else None
+    source = _FlowSource(csv_path, chunk_rows, loop, registry, replay, cache_dir, columns)
+    encoders: Dict[Optional[str], Any] = {}
+    pipe = r.pipeline(transaction=False)
+
+    report = LoadReport()
+    expected = 0
+    last_expected = 0
+    last_sent = 0
+    last_report = 0.0
+    duration = profile.duration_sec
+
+    logger.info(f"[*] Generating load from {csv_path} into stream '{stream_name}'...")
+    start = time.perf_counter()
+    while True:
+        elapsed = min(time.perf_counter() - start, duration)
+        if replay is not None:
+            expected = report.sent + source.due(elapsed)
+        else:
+            expected = int(profile.count(elapsed))
+        due = expected - report.sent
+
+        if due > 0:
+            pieces = source.take(min(due, max_batch))
+            for piece, schema in pieces:
+                encode = encoders.get(schema)
+                if encode is None:
+                    encode = encoders[schema] = flow_encoder(wire_format, wire_dtype, schema)
+                for fields in encode(piece):
+                    pipe.xadd(stream_name, fields)
+                report.sent += len(piece)
+            if pieces:
+                pipe.execute()
+
+        behind = max(due, 0)
+        report.max_behind = max(report.max_behind, behind)
+        done = elapsed >= duration or source.exhausted
+        if elapsed - last_report >= report_interval_sec or done:
+            interval = elapsed - last_report
+            if interval > 0:
+                sample = LoadSample(
+                    round(elapsed, 3),
+                    (expected - last_expected) / interval,
+                    (report.sent - last_sent) / interval,
+                    behind,
+                )
+                report.samples.append(sample)
+                logger.info(
+                    f"[LOAD] t={sample.elapsed_sec:.1f}s target={sample.target_fps:.0f} fps "
+                    f"achieved={sample.achieved_fps:.0f} fps behind={behind}"
+                )
+            last_report, last_expected, last_sent = elapsed, expected, report.sent
+        if done:
+            break
+        if expected <= report.sent:
+            time.sleep(tick_sec)
+
+    report.target = expected
+    report.elapsed_sec = elapsed
+    logger.info(
+        f"[*] Load run finished: sent {report.sent} of {report.target} flows in {report.elapsed_sec:.1f}s "
+        f"({report.achieved_fps:.0f} of {report.target_fps:.0f} fps target, max behind {report.max_behind})"
+    )
+    return report
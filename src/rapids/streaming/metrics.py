@@ -0,0 +1,224 @@
+"""In-process consumer metrics and a Prometheus text endpoint."""
+import logging
+import threading
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Sequence
+
+from rapids.streaming.wire import as_text, entry_ms
+
+logger = logging.getLogger(__name__)
+
+STAGES = ("decode", "scale", "predict", "observe_flow", "handle_anomaly")
+DEFAULT_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+)
+
+
+class Histogram:
+    """Fixed-bucket histogram; one ``observe`` is a bisect and three additions."""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[int]:
+        """Counts per bucket upper bound, the last being +Inf."""
+        total = 0
+        result = []
+        for count in self.counts:
+            total += count
+            result.append(total)
+        return result
+
+
+class StageTimings:
+    """
+    Per-batch time spent in each consumer stage.
+
+    Every stage is observed once per batch, so recording cost does not grow
+    with the number of flows. Each histogram is written by one thread only
+    (the one running that stage), and read without locking by the endpoint.
+    """
+
+    def __init__(self, stages: Sequence[str] = STAGES, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.histograms: Dict[str, Histogram] = {stage: Histogram(buckets) for stage in stages}
+
+    def observe(self, stage: str, seconds: float) -> None:
+        self.histograms[stage].observe(seconds)
+
+
+def stream_lag(reader) -> Dict[str, float]:
+    """
+    Query how far ``reader`` is behind its stream with XINFO.
+
+    Returns:
+        ``length`` of the stream and ``seconds`` between the newest entry and
+        the last one delivered to this consumer (or its group); in group mode
+        also ``pending`` and, on Redis 7+, ``entries`` not yet delivered.
+    """
+    info = reader.r.xinfo_stream(reader.stream_name)
+    lag: Dict[str, float] = {"length": info["length"]}
+    delivered = reader.last_id
+    if reader.group_name:
+        for group in reader.r.xinfo_groups(reader.stream_name):
+            if as_text(group["name"]) == reader.group_name:
+                lag["pending"] = group["pending"]
+                if group.get("lag") is not None:
+                    lag["entries"] = group["lag"]
+                delivered = as_text(group["last-delivered-id"])
+                break
+    newest = as_text(info["last-generated-id"])
+    lag["seconds"] = max(0.0, (entry_ms(newest) - entry_ms(delivered)) / 1000.0)
+    return lag
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render_metrics(
+    stats,
+    reader=None,
+    queue_depths: Optional[Callable[[], Dict[str, int]]] = None,
+) -> str:
+    """
+    Render consumer counters, stage histograms, queue depths and stream lag
+    in the Prometheus text exposition format.
+
+    Args:
+        stats: ConsumerStats of the consumer.
+        reader: StreamReader used for the XINFO lag query; omitted when None.
+        queue_depths: Callable returning pipeline queue depths, if any.
+    """
+    lines = [
+        "# HELP rapids_flows_total Flows scored by the consumer.",
+        "# TYPE rapids_flows_total counter",
+        f"rapids_flows_total {stats.flow_count}",
+        "# HELP rapids_alerts_total Flows flagged as anomalous.",
+        "# TYPE rapids_alerts_total counter",
+        f"rapids_alerts_total {stats.alert_count}",
+        "# HELP rapids_errors_total Malformed entries and processing errors.",
+        "# TYPE rapids_errors_total counter",
+        f"rapids_errors_total {stats.errors_count}",
+        "# HELP rapids_uptime_seconds Seconds since the consumer started.",
+        "# TYPE rapids_uptime_seconds gauge",
+        f"rapids_uptime_seconds {stats.elapsed():.3f}",
+        "# HELP rapids_overload_level Current overload degradation level (0 = full reasoning).",
+        "# TYPE rapids_overload_level gauge",
+        f"rapids_overload_level {stats.overload_level}",
+        "# HELP rapids_shed_total Flows whose reasoning was reduced under overload, by mode.",
+        "# TYPE rapids_shed_total counter",
+    ]
+    lines.extend(f'rapids_shed_total{{mode="{mode}"}} {count}' for mode, count in stats.shed.items())
+    lines += [
+        "# HELP rapids_model_swaps_total Retrained models swapped in since start.",
+        "# TYPE rapids_model_swaps_total counter",
+        f"rapids_model_swaps_total {stats.model_swaps}",
+        "# HELP rapids_model_info Model version currently scoring flows.",
+        "# TYPE rapids_model_info gauge",
+        f'rapids_model_info{{version="{_label(stats.model_version)}"}} 1',
+        "# HELP rapids_stage_seconds Time spent per batch in each consumer stage.",
+        "# TYPE rapids_stage_seconds histogram",
+    ]
+    for stage, histogram in stats.stages.histograms.items():
+        bounds = [repr(float(b)) for b in histogram.buckets] + ["+Inf"]
+        for bound, count in zip(bounds, histogram.cumulative()):
+            lines.append(f'rapids_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {count}')
+        lines.append(f'rapids_stage_seconds_sum{{stage="{stage}"}} {histogram.sum:.9f}')
+        lines.append(f'rapids_stage_seconds_count{{stage="{stage}"}} {histogram.count}')
+
+    if queue_depths is not None:
+        lines.append("# HELP rapids_queue_depth Batches waiting in front of each pipeline stage.")
+        lines.append("# TYPE rapids_queue_depth gauge")
+        for stage, depth in queue_depths().items():
+            lines.append(f'rapids_queue_depth{{stage="{stage}"}} {depth}')
+
+    if reader is not None:
+        try:
+            lag = stream_lag(reader)
+        except Exception as e:
+            logger.warning(f"Failed to query stream lag: {e}")
+            lag = {}
+        stream = _label(reader.stream_name)
+        for key, help_text in (
+            ("length", "Entries in the stream."),
+            ("entries", "Entries not yet delivered to the consumer group."),
+            ("pending", "Entries delivered to the group but not acknowledged."),
+            ("seconds", "Age difference between the newest entry and the last delivered one."),
+        ):
+            if key in lag:
+                name = "rapids_stream_length" if key == "length" else f"rapids_stream_lag_{key}"
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} gauge")
+                lines.append(f'{name}{{stream="{stream}"}} {lag[key]}')
+
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        if self.path not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = self.server.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+
+class MetricsServer:
+    """
+    Serve ``render_metrics`` over HTTP on a daemon thread.
+
+    Metrics are rendered when scraped, so the consumer only pays for
+    recording; the XINFO lag query runs on the server thread.
+    """
+
+    def __init__(
+        self,
+        stats,
+        reader=None,
+        queue_depths: Optional[Callable[[], Dict[str, int]]] = None,
+        host: str = "127.0.0.1",
+        port: int = 9108,
+    ) -> None:
+        self.stats = stats
+        self.reader = reader
+        self.queue_depths = queue_depths
+        self._server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        self._server.daemon_threads = True
+        self._server.render = self.render
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def render(self) -> str:
+        return render_metrics(self.stats, self.reader, self.queue_depths)
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._server.serve_forever, name="rapids-metrics", daemon=True)
+        self._thread.start()
+        logger.info(f"Serving metrics on http://{self._server.server_address[0]}:{self.port}/metrics")
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
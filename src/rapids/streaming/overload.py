@@ -0,0 +1,109 @@
+"""Lag-driven overload levels for the reasoning stage."""
+import logging
+import time
+from collections import deque
+from typing import Any, Deque, NamedTuple, Optional, Sequence
+
+from rapids.streaming.wire import entry_ms
+
+logger = logging.getLogger(__name__)
+
+# What each level adds on top of the ones below it
+LEVELS = ("normal", "skip_weak_anomalies", "batch_paths", "sample_benign")
+SHED_MODES = ("reasoning", "paths", "observe")
+
+
+class Transition(NamedTuple):
+    """One level change made by an OverloadGuard."""
+
+    time: float
+    level: int
+    lag_sec: float
+
+
+class OverloadGuard:
+    """
+    Step the consumer through degraded modes as stream lag grows.
+
+    Lag is the age of the oldest entry of each batch reaching the reasoning
+    stage (Redis ids start with the millisecond the entry was added). Each
+    level keeps everything the levels below it shed:
+
+    1. anomalies whose score is within ``weak_score_margin`` of the decision
+       threshold are alerted without reasoning (no paths or recommendation);
+    2. the remaining anomalies of a batch are added to the graph together and
+       share one risk propagation and one path computation;
+    3. only every ``benign_sample_every``-th benign flow is passed to
+       ``observe_flow``.
+
+    The level goes up one step once lag has exceeded ``lag_sec[level]`` for
+    ``patience`` consecutive batches, and down one step once it has stayed
+    below ``recover_ratio`` times the threshold of the current level for as
+    long, so the consumer recovers by itself as the backlog drains.
+    """
+
+    def __init__(
+        self,
+        lag_sec: Sequence[float] = (2.0, 5.0, 15.0),
+        recover_ratio: float = 0.5,
+        patience: int = 3,
+        weak_score_margin: float = 0.05,
+        benign_sample_every: int = 10,
+    ) -> None:
+        if len(lag_sec) != len(LEVELS) - 1 or list(lag_sec) != sorted(lag_sec):
+            raise ValueError(f"lag_sec needs {len(LEVELS) - 1} increasing thresholds, got {list(lag_sec)}")
+        if not 0 < recover_ratio < 1:
+            raise ValueError("recover_ratio must be between 0 and 1")
+        if benign_sample_every < 1:
+            raise ValueError("benign_sample_every must be at least 1")
+        self.lag_sec = [float(threshold) for threshold in lag_sec]
+        self.recover_ratio = recover_ratio
+        self.patience = patience
+        self.weak_score_margin = weak_score_margin
+        self.benign_sample_every = benign_sample_every
+        self.level = 0
+        self.lag = 0.0
+        self.transitions: Deque[Transition] = deque(maxlen=100)
+        self._over = 0
+        self._under = 0
+        self._benign_seen = 0
+
+    def observe(self, entry_id: Any, now_ms: Optional[float] = None) -> int:
+        """Update the level from the oldest entry id of a batch and return it."""
+        now_ms = now_ms if now_ms is not None else time.time() * 1000.0
+        try:
+            self.lag = max(0.0, (now_ms - entry_ms(entry_id)) / 1000.0)
+        except ValueError:
+            return self.level
+
+        if self.level < len(self.lag_sec) and self.lag >= self.lag_sec[self.level]:
+            self._over += 1
+            self._under = 0
+            if self._over >= self.patience:
+                self._change(self.level + 1)
+        elif self.level > 0 and self.lag < self.lag_sec[self.level - 1] * self.recover_ratio:
+            self._under += 1
+            self._over = 0
+            if self._under >= self.patience:
+                self._change(self.level - 1)
+        else:
+            self._over = 0
+            self._under = 0
+        return self.level
+
+    def _change(self, level: int) -> None:
+        verb = "raised" if level > self.level else "lowered"
+        logger.warning(f"[OVERLOAD] level {verb} to {level} ({LEVELS[level]}): lag {self.lag:.1f}s")
+        self.level = level
+        self._over = 0
+        self._under = 0
+        self.transitions.append(Transition(time.time(), level, self.lag))
+
+    def is_weak(self, score: float) -> bool:
+        """True for an anomaly scored close enough to the threshold to skip reasoning."""
+        return score > -self.weak_score_margin
+
+    def sample_benign(self) -> bool:
+        """True for the benign flows still passed to ``observe_flow`` at the top level."""
+        self._benign_seen += 1
+        return self._benign_seen % self.benign_sample_every == 0
@@ -0,0 +1,217 @@
+"""Staged decode -> detect -> reason consumer pipeline."""
+import logging
+import queue
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import redis
+
+from rapids.streaming.adaptive import BatchController
+from rapids.streaming.alerts import AlertSink
+from rapids.streaming.consumer import ConsumerStats, StreamReader, detect, reason, score
+from rapids.streaming.decoder import FlowDecoder
+from rapids.streaming.overload import OverloadGuard
+from rapids.streaming.retrain import BackgroundRetrainer
+from rapids.streaming.wire import SchemaRegistry
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class _Batch:
+    """A decoded batch travelling through the pipeline stages."""
+
+    __slots__ = ("entry_ids", "ids", "flows", "features", "decoder", "preds", "scores", "errors", "read_at", "full")
+
+    def __init__(self, entry_ids: List[Any], decoder: Optional[FlowDecoder] = None) -> None:
+        self.entry_ids = entry_ids
+        self.decoder = decoder
+        self.read_at = time.perf_counter()
+        self.full = False
+        self.ids: List[str] = []
+        self.flows: List[dict] = []
+        self.features = None
+        self.preds = None
+        self.scores = None
+        self.errors = 0
+
+
+class _ErrorCounter:
+    """Stand-in for ConsumerStats so decode errors travel with their batch."""
+
+    def __init__(self) -> None:
+        self.errors_count = 0
+
+
+class StagedPipeline:
+    """
+    Run decoding, scoring and reasoning on three threads.
+
+    Stages are connected by queues bounded at ``depth`` batches. When
+    reasoning falls behind, the scored queue fills, scoring blocks, the
+    decoded queue fills and the reader stops issuing reads, so backpressure
+    reaches XREAD instead of growing memory. Scoring releases the GIL for
+    most of ``model.predict``, so batch N+1 is scored while batch N is in
+    the pure-Python reasoning stage.
+
+    Decoders (and their feature buffers) come from a pool of ``depth + 2``
+    and return to it once a batch is scored. All counters in ``stats`` are
+    written by the reasoning thread only (stage timings by the thread running
+    that stage); entries are acknowledged there too,
+    so a consumer-group entry is acked only after it has been reasoned about.
+    An optional ``controller`` is updated there as well, with each batch's
+    time from read to ack, and an optional ``overload`` guard sets the
+    degradation level from the lag of each batch reaching that stage.
+
+    An optional ``retrainer`` samples each batch on the scoring thread, which
+    is also the only reader of ``model`` and ``scaler``: a retrained pair is
+    swapped in there between two batches (the swap count and model version
+    in ``stats`` are written by that thread).
+    """
+
+    def __init__(
+        self,
+        reader: StreamReader,
+        model,
+        scaler,
+        feature_columns: List[str],
+        reasoning_engine,
+        stats: ConsumerStats,
+        depth: int = 4,
+        schemas: Optional[SchemaRegistry] = None,
+        retry_delay_sec: float = 0.5,
+        controller: Optional[BatchController] = None,
+        alert_sink: Optional[AlertSink] = None,
+        overload: Optional[OverloadGuard] = None,
+        retrainer: Optional[BackgroundRetrainer] = None,
+    ) -> None:
+        self.reader = reader
+        self.model = model
+        self.scaler = scaler
+        self.reasoning_engine = reasoning_engine
+        self.stats = stats
+        self.retry_delay_sec = retry_delay_sec
+        self.controller = controller
+        self.alert_sink = alert_sink
+        self.overload = overload
+        self.retrainer = retrainer
+        self.decoded: "queue.Queue[Any]" = queue.Queue(maxsize=depth)
+        self.scored: "queue.Queue[Any]" = queue.Queue(maxsize=depth)
+        self._decoders: "queue.Queue[FlowDecoder]" = queue.Queue()
+        for _ in range(depth + 2):
+            self._decoders.put(FlowDecoder(feature_columns, capacity=reader.batch_size, schemas=schemas))
+
+    def queue_depths(self) -> Dict[str, int]:
+        """Current number of batches waiting in front of each stage."""
+        return {"detect": self.decoded.qsize(), "reason": self.scored.qsize()}
+
+    def run(self, stop_event) -> None:
+        """Run until ``stop_event`` is set or the reader is exhausted, then drain queued batches."""
+        workers = [
+            threading.Thread(target=self._detect_stage, name="rapids-detect", daemon=True),
+            threading.Thread(target=self._reason_stage, name="rapids-reason", daemon=True),
+        ]
+        for worker in workers:
+            worker.start()
+        try:
+            self._read_stage(stop_event)
+        finally:
+            self.decoded.put(_STOP)
+            for worker in workers:
+                worker.join()
+
+    def _read_stage(self, stop_event) -> None:
+        while not stop_event.is_set() and not self.reader.exhausted:
+            try:
+                decoder = self._decoders.get(timeout=self.retry_delay_sec)
+            except queue.Empty:
+                continue
+
+            try:
+                messages = self.reader.read()
+            except redis.RedisError as e:
+                logger.error(f"Redis error during xread: {e}")
+                self._decoders.put(decoder)
+                self._report_errors(1)
+                time.sleep(self.retry_delay_sec)
+                continue
+
+            if not messages:
+                self._decoders.put(decoder)
+                continue
+
+            batch = _Batch([msg_id for msg_id, _ in messages], decoder)
+            batch.full = len(messages) >= self.reader.batch_size
+            counter = _ErrorCounter()
+            try:
+                batch.ids, batch.flows, batch.features = decoder.decode(messages, counter)
+            except Exception as e:
+                logger.error(f"Unexpected error while decoding: {e}")
+                counter.errors_count += len(messages)
+            self.stats.stages.observe("decode", time.perf_counter() - batch.read_at)
+            batch.errors = counter.errors_count
+            self.decoded.put(batch)
+
+    def _report_errors(self, count: int) -> None:
+        batch = _Batch([])
+        batch.errors = count
+        self.decoded.put(batch)
+
+    def _detect_stage(self) -> None:
+        while True:
+            batch = self.decoded.get()
+            if batch is _STOP:
+                self.scored.put(_STOP)
+                return
+
+            if batch.ids:
+                try:
+                    if self.retrainer is not None:
+                        self.model, self.scaler = self.retrainer.poll(self.model, self.scaler, self.stats)
+                        self.retrainer.sample(batch.features)
+                    if self.overload is not None and self.overload.level > 0:
+                        batch.preds, batch.scores = score(batch.features, self.model, self.scaler, self.stats.stages)
+                    else:
+                        batch.preds = detect(batch.features, self.model, self.scaler, self.stats.stages)
+                    if self.retrainer is not None:
+                        self.retrainer.record(batch.preds)
+                except Exception as e:
+                    logger.error(f"Error during anomaly detection: {e}")
+                    batch.errors += len(batch.ids)
+            if batch.decoder is not None:
+                self._decoders.put(batch.decoder)
+            batch.decoder = None
+            batch.features = None
+            self.scored.put(batch)
+
+    def _reason_stage(self) -> None:
+        while True:
+            batch = self.scored.get()
+            if batch is _STOP:
+                return
+
+            self.stats.errors_count += batch.errors
+            try:
+                if batch.preds is not None:
+                    reason(
+                        batch.ids,
+                        batch.flows,
+                        batch.preds,
+                        self.reasoning_engine,
+                        self.stats,
+                        self.queue_depths(),
+                        self.alert_sink,
+                        self.overload,
+                        batch.scores,
+                    )
+                self.reader.ack(batch.entry_ids)
+                if self.controller is not None:
+                    self.controller.observe(batch.entry_ids, time.perf_counter() - batch.read_at, batch.full)
+            except redis.RedisError as e:
+                logger.error(f"Redis error during xack: {e}")
+                self.stats.errors_count += 1
+            except Exception as e:
+                logger.error(f"Unexpected error in reasoning stage: {e}")
+                self.stats.errors_count += 1
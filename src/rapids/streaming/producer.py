@@ -1,9 +1,131 @@
-import pandas as pd
 import json
+import multiprocessing
 import time
+
 import numpy as np
+import pandas as pd
 
 from rapids.core.redis_utils import connect_redis
+from rapids.detection.data_loader import iter_clean_chunks
+from rapids.detection.dataset_cache import open_dataset
+from rapids.streaming.wire import SchemaRegistry, encode_batch
+
+
+def load_flows(csv_path, max_rows=None, cache_dir=None, columns=None):
+    """Read a flow CSV and keep the clean numeric feature rows, as streamed.
+
+    The rows are cleaned by ``rapids.detection.data_loader.iter_clean_chunks``.
+    With ``cache_dir`` they come from the dataset cache (see
+    ``rapids.detection.dataset_cache``) instead of the CSV. With ``columns``
+    only those columns are kept, in that order. ``max_rows`` counts clean
+    rows, and the CSV is read no further than needed for them.
+    """
+    if cache_dir:
+        return open_dataset(csv_path, cache_dir).frame(0, max_rows or None, columns)
+    chunks = []
+    rows = 0
+    for chunk in iter_clean_chunks(csv_path, dtype=np.float64):
+        chunks.append(chunk)
+        rows += len(chunk.features)
+        if max_rows and rows >= max_rows:
+            break
+    features = np.concatenate([chunk.features for chunk in chunks])[: max_rows or None]
+    df = chunks[0]._replace(features=features).frame()
+    if columns is not None:
+        df = df[columns]
+    return df
+
+
+def iter_flows(
+    csv_path,
+    chunk_rows=100000,
+    max_rows=None,
+    shard=0,
+    shards=1,
+    timestamp_column=None,
+    cache_dir=None,
+    columns=None,
+):
+    """
+    Yield cleaned flow DataFrames of at most ``chunk_rows`` input rows each.
+
+    Memory stays bounded by one chunk however large the CSV is. The rows
+    are cleaned by ``rapids.detection.data_loader.iter_clean_chunks``, so
+    every chunk has the columns of the file's first chunk, even where a
+    later one holds stray text. With ``shards > 1`` only this shard's byte
+    range of the file is read, so several processes can split one file
+    between them; every shard still sends the same columns.
+
+    With ``timestamp_column`` set, that column is removed from the features
+    and becomes the index, as seconds since the epoch (numeric values are
+    taken as seconds already); rows without a parseable timestamp are
+    dropped.
+
+    With ``cache_dir`` the rows are read from the memory-mapped dataset
+    cache (see ``rapids.detection.dataset_cache``), built on first use, and
+    shards split the cleaned rows rather than the file's bytes. The cache
+    holds no timestamps, so ``timestamp_column`` always reads the CSV.
+
+    With ``columns`` each chunk keeps only those columns, in that order;
+    the rows are still cleaned on all of them.
+    """
+    if cache_dir and timestamp_column is None:
+        yield from open_dataset(csv_path, cache_dir).iter_frames(chunk_rows, max_rows, shard, shards, columns)
+        return
+
+    remaining = max_rows or None
+    chunks = iter_clean_chunks(
+        csv_path, chunk_rows, dtype=np.float64, shard=shard, shards=shards, index_column=timestamp_column
+    )
+    try:
+        for clean in chunks:
+            if timestamp_column is not None:
+                chunk = clean.frame(_timestamp_seconds(pd.Series(clean.index)))
+                chunk = chunk[chunk.index.notna()]
+            else:
+                chunk = clean.frame()
+            if columns is not None:
+                chunk = chunk[columns]
+            if remaining is not None:
+                chunk = chunk.head(remaining)
+                remaining -= len(chunk)
+            if not chunk.empty:
+                yield chunk
+            if remaining == 0:
+                return
+    finally:
+        chunks.close()
+
+
+def _timestamp_seconds(column):
+    if pd.api.types.is_numeric_dtype(column):
+        return pd.Index(column.astype(float).to_numpy())
+    stamps = pd.to_datetime(column, errors="coerce", format="mixed", utc=True)
+    seconds = (stamps - pd.Timestamp(0, tz="UTC")).dt.total_seconds()
+    return pd.Index(seconds.to_numpy())
+
+
+def flow_encoder(wire_format="json", wire_dtype="float64", schema=None):
+    """Return a function turning a DataFrame chunk into a list of XADD field dicts."""
+    if wire_format == "binary":
+
+        def encode(chunk):
+            return [encode_batch(chunk.to_numpy(), schema, wire_dtype)]
+
+    else:
+
+        def encode(chunk):
+            return [{"flow": json.dumps(record)} for record in chunk.to_dict(orient="records")]
+
+    return encode
+
+
+def send_interval(batch_size, target_fps, flush_interval_sec):
+    """Return (per-flow interval, effective batch size) for paced batched sends."""
+    interval = 1.0 / float(target_fps) if target_fps else None
+    if interval is not None and flush_interval_sec:
+        batch_size = max(1, min(batch_size, int(flush_interval_sec / interval)))
+    return interval, batch_size
 
 
 def run_producer(
@@ -16,54 +138,150 @@ def run_producer(
     redis_port=6379,
     connect_retries=5,
     retry_delay_sec=0.5,
+    batch_size=None,
+    flush_interval_sec=0.05,
+    wire_format="json",
+    wire_dtype="float64",
+    chunk_rows=100000,
+    shard=0,
+    shards=1,
+    cache_dir=None,
+    columns=None,
 ):
+    """
+    Replay flows from a CSV file into a Redis stream.
+
+    The file is read and cleaned ``chunk_rows`` rows at a time and each chunk
+    is sent as soon as it is ready, so memory stays bounded by one chunk
+    whatever the file size. With ``shards > 1`` only this producer's share
+    of the file is sent (see ``shard_range``); ``run_producers`` runs one
+    process per shard. With ``cache_dir`` flows are read from the dataset
+    cache instead of parsing the CSV, and with ``columns`` only those
+    columns are sent (see ``iter_flows``).
+
+    By default every row is sent with its own XADD. With ``batch_size`` set,
+    rows are serialized a batch at a time and sent through a non-transactional
+    Redis pipeline, one round trip per batch. When ``target_fps`` is also set,
+    the rate is kept at batch granularity and batches are capped so that one
+    batch never covers more than ``flush_interval_sec`` of send time. Without
+    ``target_fps``, ``delay`` still applies per flow; pass ``delay=0`` to send
+    as fast as Redis accepts.
+
+    With ``wire_format="binary"`` each batch becomes a single stream entry
+    holding a packed ``wire_dtype`` matrix (see ``rapids.streaming.wire``);
+    this implies batching, with ``batch_size`` defaulting to 500.
+
+    Returns:
+        Number of flows sent.
+    """
     r = connect_redis(redis_host, redis_port, connect_retries, retry_delay_sec)
 
-    df = pd.read_csv(csv_path)
+    interval = None
+    if target_fps:
+        interval = 1.0 / float(target_fps)
+
+    registry = None
+    if wire_format == "binary":
+        registry = SchemaRegistry(r, stream_name)
+        batch_size = batch_size or 500
 
-    # Drop label column
-    label_col = None
-    for col in df.columns:
-        if "label" in col.lower():
-            label_col = col
-            break
+    print(f"[*] Sending flows from {csv_path} to stream '{stream_name}'...")
+    start_time = time.perf_counter()
+    sent = 0
 
-    if label_col:
-        df = df.drop(columns=[label_col])
+    for df in iter_flows(csv_path, chunk_rows, max_rows, shard, shards, cache_dir=cache_dir, columns=columns):
+        schema = registry.register(df.columns.tolist()) if registry is not None else None
+        encode = flow_encoder(wire_format, wire_dtype, schema)
 
-    # Keep numeric columns only
-    df = df.select_dtypes(include=["number"])
+        if batch_size:
+            sent = _send_batched(
+                r, df, stream_name, encode, batch_size, flush_interval_sec, target_fps, delay, start_time, sent
+            )
+            continue
 
-    # Clean data
-    df = df.replace([np.inf, -np.inf], np.nan)
-    df = df.dropna()
+        for row in df.itertuples(index=False):
+            data = dict(zip(df.columns, row))
+            r.xadd(stream_name, {"flow": json.dumps(data)})
+            sent += 1
 
-    df = df.head(max_rows)
+            if interval is None:
+                time.sleep(delay)
+            else:
+                next_time = start_time + (sent * interval)
+                sleep_for = next_time - time.perf_counter()
+                if sleep_for > 0:
+                    time.sleep(sleep_for)
 
-    if df.empty:
+    if not sent:
         print("[!] No rows to stream.")
-        return
+        return 0
+    print(f"[*] Producer finished sending {sent} flows.")
+    return sent
 
-    print(f"[*] Sending {len(df)} flows to stream...")
 
-    interval = None
-    if target_fps:
-        interval = 1.0 / float(target_fps)
+def _send_batched(r, df, stream_name, encode, batch_size, flush_interval_sec, target_fps, delay, start_time, sent):
+    interval, batch_size = send_interval(batch_size, target_fps, flush_interval_sec)
 
-    start_time = time.perf_counter()
-    sent = 0
+    pipe = r.pipeline(transaction=False)
 
-    for row in df.itertuples(index=False):
-        data = dict(zip(df.columns, row))
-        r.xadd(stream_name, {"flow": json.dumps(data)})
-        sent += 1
+    for offset in range(0, len(df), batch_size):
+        chunk = df.iloc[offset : offset + batch_size]
+        for fields in encode(chunk):
+            pipe.xadd(stream_name, fields)
+        pipe.execute()
+        sent += len(chunk)
 
         if interval is None:
-            time.sleep(delay)
+            time.sleep(delay * len(chunk))
         else:
             next_time = start_time + (sent * interval)
             sleep_for = next_time - time.perf_counter()
             if sleep_for > 0:
                 time.sleep(sleep_for)
 
-    print("[*] Producer finished sending flows.")
+    return sent
+
+
+def run_producers(csv_path, processes, stream_name="rapids_stream", partitioned=False, max_rows=None, **kwargs):
+    """
+    Split one CSV across ``processes`` producer processes.
+
+    Each process sends one shard of the file (see ``shard_range``), with
+    memory bounded by its own chunk. All processes write to ``stream_name``;
+    with ``partitioned`` process ``i`` writes to ``f"{stream_name}-{i}"``.
+    ``max_rows`` is divided between the shards. Other keyword arguments go to
+    ``run_producer``, and ``target_fps`` applies to each process. With
+    ``cache_dir`` the cache entry is built here first, so the processes only
+    map it.
+
+    Returns:
+        Exit codes of the producer processes.
+    """
+    if kwargs.get("cache_dir"):
+        open_dataset(csv_path, kwargs["cache_dir"])
+    workers = []
+    for i in range(processes):
+        shard_rows = None
+        if max_rows:
+            shard_rows = max_rows // processes + (1 if i < max_rows % processes else 0)
+            if shard_rows == 0:
+                continue
+        workers.append(
+            multiprocessing.Process(
+                target=run_producer,
+                args=(csv_path,),
+                kwargs=dict(
+                    kwargs,
+                    stream_name=f"{stream_name}-{i}" if partitioned else stream_name,
+                    max_rows=shard_rows,
+                    shard=i,
+                    shards=processes,
+                ),
+                name=f"rapids-producer-{i}",
+            )
+        )
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return [worker.exitcode for worker in workers]
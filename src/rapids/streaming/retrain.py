@@ -0,0 +1,236 @@
+"""Background retraining on a reservoir of live flows, with hot-swap between batches."""
+import logging
+import time
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Deque, NamedTuple, Optional, Tuple
+
+import numpy as np
+from sklearn.preprocessing import StandardScaler
+
+from rapids.detection.anomaly_model import train_isolation_forest
+from rapids.detection.array_forest import ArrayIsolationForest
+from rapids.detection.cascade import CascadeIsolationForest
+from rapids.detection.sampled_training import FlowReservoir
+
+logger = logging.getLogger(__name__)
+
+EXECUTORS = ("process", "thread")
+
+
+class Swap(NamedTuple):
+    """One model replacement made by a BackgroundRetrainer."""
+
+    time: float
+    version: str
+    flows: int
+    train_sec: float
+
+
+def fit_detector(
+    features: np.ndarray,
+    contamination: float = 0.20,
+    n_jobs: int = 1,
+    scorer: str = "array",
+    fuse_scaler: bool = False,
+    cascade_trees: Optional[int] = None,
+    cascade_max_miss: float = 0.01,
+) -> Tuple[object, Optional[StandardScaler]]:
+    """
+    Fit a scaler and IsolationForest on raw feature rows, as ``rapids train`` does.
+
+    Rows with missing or infinite values are dropped first. Runs in the
+    retrainer's worker, so it must stay a picklable top-level function.
+    With ``cascade_trees`` the array scorer is wrapped in a
+    CascadeIsolationForest calibrated on the same rows.
+
+    Returns:
+        ``(model, scaler)``; the model is an ArrayIsolationForest unless
+        ``scorer`` is ``"sklearn"``, and the scaler is None when fused into it.
+    """
+    features = features[np.isfinite(features).all(axis=1)]
+    scaler = StandardScaler()
+    scaled = scaler.fit_transform(features)
+    model = train_isolation_forest(scaled, contamination=contamination, n_jobs=n_jobs)
+    if scorer == "sklearn":
+        return model, scaler
+    model = ArrayIsolationForest.from_sklearn(model)
+    cascade = None
+    if cascade_trees:
+        cascade = CascadeIsolationForest.calibrate(model, scaled, cascade_trees, cascade_max_miss)
+    if fuse_scaler:
+        model, scaler = model.fuse_scaler(scaler), None
+    if cascade is not None:
+        model = CascadeIsolationForest(model, **cascade.params)
+    return model, scaler
+
+
+class BackgroundRetrainer:
+    """
+    Keep a reservoir of live flows and periodically retrain the detector on it.
+
+    The consumer calls :meth:`sample` with each batch's raw features before
+    scoring, :meth:`record` with its predictions, and :meth:`poll` between
+    batches. ``poll`` starts a training job once ``interval_sec`` has passed
+    or a retrain was triggered (and the reservoir holds ``min_samples``
+    rows), and when a job has finished returns its model and scaler in place
+    of the current ones. The job runs on a single-worker process pool
+    (``executor="thread"`` for a thread), so ingestion never waits for it,
+    and the swap happens between two batches: no batch is scored by a mix
+    of old and new model.
+
+    A retrain is triggered by :meth:`trigger`, which is safe to call from
+    any thread, or, with ``drift_ratio``, when the share of flows flagged as
+    anomalous over ``drift_window`` flows exceeds ``drift_ratio`` times the
+    expected ``contamination``.
+
+    The executor is created on first use, so a retrainer can be handed to a
+    consumer process before it starts.
+    """
+
+    def __init__(
+        self,
+        reservoir_size: int = 50000,
+        interval_sec: float = 3600.0,
+        min_samples: int = 5000,
+        contamination: float = 0.20,
+        n_jobs: int = 1,
+        scorer: str = "array",
+        fuse_scaler: bool = False,
+        cascade_trees: Optional[int] = None,
+        cascade_max_miss: float = 0.01,
+        drift_ratio: Optional[float] = None,
+        drift_window: int = 5000,
+        executor: str = "process",
+        seed: Optional[int] = None,
+    ) -> None:
+        if executor not in EXECUTORS:
+            raise ValueError(f"Unknown retrain executor {executor!r}; expected one of {EXECUTORS}")
+        if min_samples > reservoir_size:
+            raise ValueError("min_samples cannot exceed reservoir_size")
+        self.reservoir = FlowReservoir(reservoir_size, seed=seed)
+        self.interval_sec = interval_sec
+        self.min_samples = min_samples
+        self.contamination = contamination
+        self.n_jobs = n_jobs
+        self.scorer = scorer
+        self.fuse_scaler = fuse_scaler
+        self.cascade_trees = cascade_trees
+        self.cascade_max_miss = cascade_max_miss
+        self.drift_ratio = drift_ratio
+        self.drift_window = drift_window
+        self.executor = executor
+        self.version = "startup"
+        self.swap_count = 0
+        self.swaps: Deque[Swap] = deque(maxlen=100)
+        self._executor: Optional[Executor] = None
+        self._job: Optional[Future] = None
+        self._job_started = 0.0
+        self._job_flows = 0
+        self._triggered = False
+        self._next_run = time.monotonic() + interval_sec
+        self._window_flows = 0
+        self._window_alerts = 0
+
+    @property
+    def training(self) -> bool:
+        return self._job is not None
+
+    def trigger(self) -> None:
+        """Retrain at the next :meth:`poll` that has enough samples."""
+        self._triggered = True
+
+    def sample(self, features: np.ndarray) -> None:
+        """Add a batch's raw (unscaled) features to the reservoir."""
+        self.reservoir.add(features)
+
+    def record(self, preds: np.ndarray) -> None:
+        """Count a batch's predictions toward the drift trigger."""
+        if self.drift_ratio is None:
+            return
+        self._window_flows += len(preds)
+        self._window_alerts += int(np.count_nonzero(preds == -1))
+        if self._window_flows < self.drift_window:
+            return
+        rate = self._window_alerts / self._window_flows
+        self._window_flows = self._window_alerts = 0
+        if rate > self.drift_ratio * self.contamination and not self._triggered:
+            logger.info(f"[DRIFT] anomaly rate {rate:.1%} over {self.drift_window} flows; retraining")
+            self.trigger()
+
+    def poll(self, model, scaler, stats=None):
+        """
+        Start a due training job, or swap in the result of a finished one.
+
+        Args:
+            model: Model currently used for scoring.
+            scaler: Scaler currently used for scoring.
+            stats: ConsumerStats whose model version and swap count are updated.
+
+        Returns:
+            ``(model, scaler)`` to score the next batch with.
+        """
+        if self._job is not None:
+            if not self._job.done():
+                return model, scaler
+            return self._finish(model, scaler, stats)
+
+        due = self._triggered or time.monotonic() >= self._next_run
+        if due and self.reservoir.size >= self.min_samples:
+            self._start()
+        return model, scaler
+
+    def _start(self) -> None:
+        features = self.reservoir.snapshot()
+        self.reservoir.rewind()
+        self._triggered = False
+        self._next_run = time.monotonic() + self.interval_sec
+        if self._executor is None:
+            pool = ProcessPoolExecutor if self.executor == "process" else ThreadPoolExecutor
+            self._executor = pool(max_workers=1)
+        self._job_started = time.perf_counter()
+        self._job_flows = len(features)
+        self._job = self._executor.submit(
+            fit_detector,
+            features,
+            self.contamination,
+            self.n_jobs,
+            self.scorer,
+            self.fuse_scaler,
+            self.cascade_trees,
+            self.cascade_max_miss,
+        )
+        logger.info(f"[RETRAIN] training on {len(features)} reservoir flows ({self.executor} worker)")
+
+    def _finish(self, model, scaler, stats):
+        job, self._job = self._job, None
+        train_sec = time.perf_counter() - self._job_started
+        try:
+            new_model, new_scaler = job.result()
+        except Exception as e:
+            logger.error(f"[RETRAIN] training failed after {train_sec:.1f}s, keeping {self.version}: {e}")
+            return model, scaler
+
+        self.swap_count += 1
+        self.version = f"retrain-{self.swap_count}-{time.strftime('%Y%m%dT%H%M%SZ', time.gmtime())}"
+        self.swaps.append(Swap(time.time(), self.version, self._job_flows, train_sec))
+        self._window_flows = self._window_alerts = 0
+        if stats is not None:
+            stats.model_version = self.version
+            stats.model_swaps += 1
+        logger.info(f"[SWAP] model {self.version} trained on {self._job_flows} flows in {train_sec:.1f}s")
+        return new_model, new_scaler
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the running training job finishes; True if none is still running."""
+        if self._job is None:
+            return True
+        wait([self._job], timeout=timeout)
+        return self._job.done()
+
+    def close(self) -> None:
+        """Abandon any running job and shut the worker down."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        self._job = None
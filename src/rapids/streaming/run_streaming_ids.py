@@ -1,89 +1,525 @@
+import asyncio
+import multiprocessing
+import os
 import threading
 import pandas as pd
-from sklearn.preprocessing import StandardScaler
 
 from rapids.core.config_loader import load_config
 from rapids.core.logger import setup_logger, log_event
 from rapids.detection.anomaly_model import train_isolation_forest
-from rapids.streaming.producer import run_producer
+from rapids.detection.array_forest import ArrayIsolationForest
+from rapids.detection.artifact import load_artifact, save_artifact
+from rapids.detection.cascade import CascadeIsolationForest
+from rapids.detection.data_loader import iter_clean_chunks, load_features
+from rapids.detection.sampled_training import train_sampled
+from rapids.streaming.producer import run_producer, run_producers
 from rapids.streaming.consumer import run_consumer
+from rapids.streaming.alerts import ALERT_SINKS, AlertSink, JsonlAlertWriter, RedisAlertWriter
+from rapids.streaming.async_stream import run_consumer_async, run_producer_async
+from rapids.streaming.loadgen import load_profile as read_load_profile, run_load
+from rapids.streaming.overload import OverloadGuard
+from rapids.streaming.retrain import BackgroundRetrainer
+from rapids.streaming.transport import run_replay
 from rapids.reasoning.engine import ReasoningEngine
+from rapids.reasoning.host_identity import host_columns
+from rapids.reasoning.persistence import GraphJournal
 
 
-def main():
-    config = load_config()
-    logger = setup_logger(config)
+def _consumer_kwargs(config, group_name=None, consumer_name=None, index=0):
+    streaming = config["streaming"]
+    metrics_port = streaming.get("metrics_port")
+    return {
+        "stream_name": streaming["stream_name"],
+        "redis_host": config["redis"]["host"],
+        "redis_port": config["redis"]["port"],
+        "connect_retries": config["redis"]["connect_retries"],
+        "retry_delay_sec": config["redis"]["retry_delay_sec"],
+        "batch_size": streaming["batch_size"],
+        "block_ms": streaming["block_ms"],
+        "group_name": group_name,
+        "consumer_name": consumer_name,
+        "claim_idle_ms": streaming.get("claim_idle_ms", 30000),
+        "wire_format": streaming.get("wire_format", "json"),
+        "pipeline_depth": streaming.get("pipeline_depth", 0),
+        "checkpoint_store": streaming.get("checkpoint_store", "none"),
+        "checkpoint_path": streaming.get("checkpoint_path"),
+        "checkpoint_interval_sec": streaming.get("checkpoint_interval_sec", 5.0),
+        "start_from": streaming.get("start_from", "earliest"),
+        "latency_target_ms": streaming.get("latency_target_ms"),
+        "min_batch_size": streaming.get("min_batch_size", 20),
+        "max_batch_size": streaming.get("max_batch_size", 5000),
+        # Consumer processes serve metrics on consecutive ports
+        "metrics_port": metrics_port + index if metrics_port is not None else None,
+        "alert_sink": _alert_sink(config, consumer_name),
+        "overload": _overload_guard(config),
+        "retrainer": _retrainer(config),
+    }
 
-    dataset_path = config["dataset"]["path"]
-    log_event(logger, "dataset.load", path=dataset_path)
 
-    df = pd.read_csv(dataset_path)
+def _overload_guard(config):
+    overload = config.get("overload") or {}
+    if not overload.get("enabled", False):
+        return None
+    return OverloadGuard(
+        lag_sec=overload.get("lag_sec", (2.0, 5.0, 15.0)),
+        recover_ratio=overload.get("recover_ratio", 0.5),
+        patience=overload.get("patience", 3),
+        weak_score_margin=overload.get("weak_score_margin", 0.05),
+        benign_sample_every=overload.get("benign_sample_every", 10),
+    )
 
-    label_col = None
-    for col in df.columns:
-        if "label" in col.lower():
-            label_col = col
-            break
 
-    if label_col:
-        df = df.drop(columns=[label_col])
+def _retrainer(config):
+    retrain = config.get("retrain") or {}
+    if not retrain.get("enabled", False):
+        return None
+    model_config = config.get("model") or {}
+    return BackgroundRetrainer(
+        reservoir_size=retrain.get("reservoir_size", 50000),
+        interval_sec=retrain.get("interval_sec", 3600.0),
+        min_samples=retrain.get("min_samples", 5000),
+        contamination=_contamination(config),
+        n_jobs=retrain.get("n_jobs", 1),
+        scorer=_scorer(config),
+        fuse_scaler=_fuse_scaler(config),
+        cascade_trees=model_config.get("cascade_trees", 10) if model_config.get("cascade", False) else None,
+        cascade_max_miss=model_config.get("cascade_max_miss", 0.01),
+        drift_ratio=retrain.get("drift_ratio"),
+        drift_window=retrain.get("drift_window", 5000),
+        executor=retrain.get("executor", "process"),
+    )
 
-    df = df.select_dtypes(include=["number"])
-    df = df.replace([float("inf"), -float("inf")], float("nan"))
-    df = df.dropna()
 
-    feature_columns = df.columns.tolist()
+def _reasoning_engine(config, consumer_name=None, journaled=True):
+    reasoning = config["reasoning"]
+    journal = None
+    journal_dir = reasoning.get("journal_dir")
+    if journal_dir and journaled:
+        # Consumers in a group each keep their own graph, so each gets its own journal
+        if consumer_name:
+            journal_dir = os.path.join(journal_dir, consumer_name)
+        journal = GraphJournal(journal_dir, snapshot_interval_sec=reasoning.get("snapshot_interval_sec", 300.0))
+    return ReasoningEngine(host_count=reasoning["host_count"], max_hops=reasoning["max_hops"], journal=journal)
 
-    scaler = StandardScaler()
-    features = scaler.fit_transform(df.values)
 
+def _alert_sink(config, consumer_name=None):
+    alerts = config.get("alerts") or {}
+    sinks = alerts.get("sinks") or []
+    unknown = set(sinks) - set(ALERT_SINKS)
+    if unknown:
+        raise ValueError(f"Unknown alert sinks: {sorted(unknown)}")
+    writers = []
+    if "redis" in sinks:
+        writers.append(
+            RedisAlertWriter(
+                alerts.get("stream_name", "rapids_alerts"),
+                redis_host=config["redis"]["host"],
+                redis_port=config["redis"]["port"],
+                connect_retries=config["redis"]["connect_retries"],
+                retry_delay_sec=config["redis"]["retry_delay_sec"],
+                maxlen=alerts.get("stream_maxlen", 100000),
+            )
+        )
+    if "jsonl" in sinks:
+        path = alerts.get("path", "alerts.jsonl")
+        if consumer_name:
+            # Separate files so consumer processes never interleave partial lines
+            root, ext = os.path.splitext(path)
+            path = f"{root}-{consumer_name}{ext}"
+        writers.append(JsonlAlertWriter(path))
+    if not writers:
+        return None
+    return AlertSink(
+        writers,
+        window_sec=alerts.get("coalesce_window_sec", 5.0),
+        flush_interval_sec=alerts.get("flush_interval_sec", 0.5),
+    )
 
-    log_event(logger, "model.train", model="IsolationForest")
-    model = train_isolation_forest(features, contamination=0.20)
 
-    stop_event = threading.Event()
-    reasoning_engine = ReasoningEngine(
-        host_count=config["reasoning"]["host_count"],
-        max_hops=config["reasoning"]["max_hops"],
-    )
+async def _run_asyncio(config, dataset_path, model, scaler, feature_columns, reasoning_engine):
+    streaming = config["streaming"]
+    kwargs = _consumer_kwargs(config)
+    # Options only the threaded consumer supports
+    for key in (
+        "pipeline_depth",
+        "checkpoint_store",
+        "checkpoint_path",
+        "checkpoint_interval_sec",
+        "start_from",
+        "latency_target_ms",
+        "min_batch_size",
+        "max_batch_size",
+        "metrics_port",
+        "overload",
+        "retrainer",
+    ):
+        kwargs.pop(key)
 
-    consumer_thread = threading.Thread(
-        target=run_consumer,
-        args=(
-            model,
-            scaler,
-            feature_columns,
-            stop_event,
-            reasoning_engine,
-            config["streaming"]["stream_name"],
-            config["redis"]["host"],
-            config["redis"]["port"],
-            config["redis"]["connect_retries"],
-            config["redis"]["retry_delay_sec"],
-            config["streaming"]["batch_size"],
-            config["streaming"]["block_ms"],
-        )
+    stop_event = asyncio.Event()
+    consumer = asyncio.create_task(
+        run_consumer_async(model, scaler, feature_columns, stop_event, reasoning_engine, **kwargs)
     )
-    consumer_thread.start()
-
     try:
-        run_producer(
+        await run_producer_async(
             dataset_path,
-            stream_name=config["streaming"]["stream_name"],
-            max_rows=config["streaming"]["max_rows"],
-            target_fps=config["streaming"]["target_fps"],
+            stream_name=streaming["stream_name"],
+            max_rows=streaming["max_rows"],
+            target_fps=streaming["target_fps"],
             redis_host=config["redis"]["host"],
             redis_port=config["redis"]["port"],
             connect_retries=config["redis"]["connect_retries"],
             retry_delay_sec=config["redis"]["retry_delay_sec"],
+            batch_size=streaming.get("producer_batch_size") or 500,
+            flush_interval_sec=streaming.get("producer_flush_interval_sec", 0.05),
+            wire_format=streaming.get("wire_format", "json"),
+            wire_dtype=streaming.get("wire_dtype", "float64"),
+            cache_dir=_cache_dir(config),
+            columns=_producer_columns(config, dataset_path, feature_columns),
         )
+    finally:
+        stop_event.set()
+        await consumer
+
+
+def _train(config, logger, sample_size=None):
+    dataset_path = config["dataset"]["path"]
+    log_event(logger, "dataset.load", path=dataset_path)
+
+    model_config = config.get("model") or {}
+    sample_size = sample_size or model_config.get("train_sample_size")
+    if sample_size:
+        # One pass over the capture; only the sample is held for training
+        log_event(logger, "model.train", model="IsolationForest", sample_size=sample_size)
+        sampled = train_sampled(
+            dataset_path,
+            sample_size=sample_size,
+            stratify=bool(model_config.get("stratify_sample", False)),
+            contamination=_contamination(config),
+            cache_dir=_cache_dir(config),
+        )
+        log_event(logger, "dataset.features", rows=sampled.rows_seen, sampled=sampled.sample_rows)
+        return sampled.model, sampled.scaler, sampled.feature_columns, sampled.scaler.transform(sampled.sample)
+
+    features, _, scaler, feature_columns = load_features(dataset_path, cache_dir=_cache_dir(config))
+    log_event(logger, "dataset.features", rows=features.shape[0], cols=features.shape[1])
+
+    log_event(logger, "model.train", model="IsolationForest")
+    model = train_isolation_forest(features, contamination=_contamination(config))
+    return model, scaler, feature_columns, features
+
+
+def _cascade(config, logger, model, features, enabled=None):
+    """Calibrate a cascade for ``model`` on its scaled training rows, if enabled."""
+    model_config = config.get("model") or {}
+    enabled = bool(model_config.get("cascade", False)) if enabled is None else enabled
+    if not enabled:
+        return None
+    cascade = CascadeIsolationForest.calibrate(
+        ArrayIsolationForest.from_sklearn(model),
+        features,
+        first_trees=model_config.get("cascade_trees", 10),
+        max_miss=model_config.get("cascade_max_miss", 0.01),
+    )
+    log_event(
+        logger,
+        "model.cascade",
+        first_trees=cascade.first_trees,
+        margin=round(cascade.margin, 4),
+        cleared=round(cascade.calibration["cleared_fraction"], 3),
+    )
+    return cascade
+
+
+def _producer_columns(config, csv_path, feature_columns):
+    """
+    Columns the producers send: all numeric columns, or with
+    ``streaming.producer_columns: model`` only the model's feature columns
+    and the ones the reasoning engine identifies hosts by.
+    """
+    if (config.get("streaming") or {}).get("producer_columns", "all") != "model":
+        return None
+    chunks = iter_clean_chunks(csv_path)
+    try:
+        streamed = next(chunks).feature_columns
+    finally:
+        chunks.close()
+    return list(feature_columns) + [col for col in host_columns(streamed) if col not in feature_columns]
+
+
+def _cache_dir(config):
+    return (config.get("dataset") or {}).get("cache_dir")
+
+
+def _contamination(config):
+    return (config.get("model") or {}).get("contamination", 0.20)
+
+
+def _scorer(config):
+    return (config.get("model") or {}).get("scorer", "array")
+
+
+def _fuse_scaler(config):
+    return bool((config.get("model") or {}).get("fuse_scaler", False))
+
+
+def _load_model(config, logger, csv_path=None):
+    """
+    Load the latest model artifact from ``model.artifact_dir``, or train one
+    from the dataset when no artifact has been saved yet.
+    """
+    artifact_dir = (config.get("model") or {}).get("artifact_dir")
+    if artifact_dir:
+        try:
+            artifact = load_artifact(artifact_dir, scorer=_scorer(config))
+        except FileNotFoundError:
+            logger.warning(f"No model artifact in {artifact_dir}; training now (save one with `rapids train`)")
+        else:
+            log_event(logger, "model.load", version=artifact.version, schema=artifact.schema_hash)
+            csv_path = csv_path or config["dataset"]["path"]
+            if os.path.exists(csv_path):
+                artifact.check_columns(pd.read_csv(csv_path, nrows=0).columns)
+            return artifact.model, artifact.scaler, artifact.feature_columns
+    model, scaler, feature_columns, features = _train(config, logger)
+    if _scorer(config) == "array":
+        cascade = _cascade(config, logger, model, features)
+        model = ArrayIsolationForest.from_sklearn(model)
+        if _fuse_scaler(config):
+            model, scaler = model.fuse_scaler(scaler), None
+        if cascade is not None:
+            model = CascadeIsolationForest(model, **cascade.params)
+    return model, scaler, feature_columns
+
+
+def train(output=None, fuse_scaler=None, sample_size=None, cascade=None):
+    """
+    Train the scaler and model on the dataset and save them as a new artifact.
+
+    Args:
+        output: Artifact root; defaults to ``model.artifact_dir``.
+        fuse_scaler: Fold the scaler into the saved array scorer; defaults
+            to ``model.fuse_scaler``.
+        sample_size: Train on a reservoir sample of this many flows streamed
+            from the dataset; defaults to ``model.train_sample_size``.
+        cascade: Calibrate a first-stage filter on the training rows and
+            save it with the model; defaults to ``model.cascade``.
+
+    Returns:
+        Path of the saved artifact version.
+    """
+    config = load_config()
+    logger = setup_logger(config)
+    model, scaler, feature_columns, features = _train(config, logger, sample_size)
+    cascade = _cascade(config, logger, model, features, cascade)
+    output = output or (config.get("model") or {}).get("artifact_dir") or "artifacts/models"
+    fuse_scaler = _fuse_scaler(config) if fuse_scaler is None else fuse_scaler
+    path = save_artifact(
+        output,
+        model,
+        scaler,
+        feature_columns,
+        metadata={"dataset": config["dataset"]["path"], "contamination": _contamination(config)},
+        fuse_scaler=fuse_scaler,
+        cascade=cascade.params if cascade is not None else None,
+    )
+    log_event(logger, "model.save", path=str(path), features=len(feature_columns))
+    return path
+
+
+def main(consumers=None, use_asyncio=False, load_profile=None):
+    """
+    Load the latest model artifact (training one if there is none), then
+    stream the dataset through Redis to the consumers.
+
+    With ``load_profile`` (a YAML profile file, see ``rapids.streaming.loadgen``)
+    the producer is replaced by an open-loop load generator following that
+    profile, and its achieved versus target rate is reported at the end.
+    """
+    config = load_config()
+    logger = setup_logger(config)
+    if load_profile and use_asyncio:
+        raise ValueError("A load profile runs with the threaded consumers, not --asyncio")
+    profile = read_load_profile(load_profile) if load_profile else None
+
+    dataset_path = config["dataset"]["path"]
+    model, scaler, feature_columns = _load_model(config, logger)
+
+    if use_asyncio:
+        try:
+            asyncio.run(
+                _run_asyncio(
+                    config, dataset_path, model, scaler, feature_columns, _reasoning_engine(config)
+                )
+            )
+        except KeyboardInterrupt:
+            print("\n[*] Ctrl+C detected. Stopping...")
+        print("[*] Streaming IDS stopped.")
+        return
+
+    streaming = config["streaming"]
+    # The load generator is a single process writing to the main stream
+    producers = 1 if profile is not None else streaming.get("producer_processes", 1)
+    partitioned = producers > 1 and streaming.get("partition_streams", False)
+    consumers = consumers or streaming.get("consumers", 1)
+    if partitioned:
+        # One consumer process per partition stream, each read without a group
+        stop_event = multiprocessing.Event()
+        workers = []
+        for i in range(producers):
+            name = f"partition-{i}"
+            kwargs = _consumer_kwargs(config, consumer_name=name, index=i)
+            kwargs["stream_name"] = f"{streaming['stream_name']}-{i}"
+            if kwargs["checkpoint_path"]:
+                # Each partition keeps its own offset; without a path the default follows the stream name
+                kwargs["checkpoint_path"] = f"{kwargs['checkpoint_path']}-{i}"
+            workers.append(
+                multiprocessing.Process(
+                    target=run_consumer,
+                    args=(model, scaler, feature_columns, stop_event, _reasoning_engine(config, name)),
+                    kwargs=kwargs,
+                    name=f"rapids-consumer-{i}",
+                )
+            )
+        log_event(logger, "consumers.start", count=producers, partitioned=True)
+    elif consumers > 1:
+        # One process per consumer, sharing the stream through a consumer group.
+        # Each process keeps its own attack graph for the flows it receives.
+        group_name = config["streaming"].get("consumer_group", "rapids")
+        stop_event = multiprocessing.Event()
+        workers = [
+            multiprocessing.Process(
+                target=run_consumer,
+                args=(model, scaler, feature_columns, stop_event, _reasoning_engine(config, f"{group_name}-{i}")),
+                kwargs=_consumer_kwargs(config, group_name, f"{group_name}-{i}", i),
+                name=f"rapids-consumer-{i}",
+            )
+            for i in range(consumers)
+        ]
+        log_event(logger, "consumers.start", count=consumers, group=group_name)
+    else:
+        stop_event = threading.Event()
+        workers = [
+            threading.Thread(
+                target=run_consumer,
+                args=(model, scaler, feature_columns, stop_event, _reasoning_engine(config)),
+                kwargs=_consumer_kwargs(config),
+            )
+        ]
+
+    for worker in workers:
+        worker.start()
+
+    producer_kwargs = dict(
+        stream_name=streaming["stream_name"],
+        max_rows=streaming["max_rows"],
+        target_fps=streaming["target_fps"],
+        batch_size=streaming.get("producer_batch_size"),
+        flush_interval_sec=streaming.get("producer_flush_interval_sec", 0.05),
+        wire_format=streaming.get("wire_format", "json"),
+        wire_dtype=streaming.get("wire_dtype", "float64"),
+        chunk_rows=streaming.get("producer_chunk_rows", 100000),
+        redis_host=config["redis"]["host"],
+        redis_port=config["redis"]["port"],
+        connect_retries=config["redis"]["connect_retries"],
+        retry_delay_sec=config["redis"]["retry_delay_sec"],
+        cache_dir=_cache_dir(config),
+        columns=_producer_columns(config, dataset_path, feature_columns),
+    )
+    try:
+        if profile is not None:
+            loadgen = config.get("loadgen") or {}
+            log_event(logger, "loadgen.start", profile=load_profile)
+            report = run_load(
+                dataset_path,
+                profile,
+                stream_name=streaming["stream_name"],
+                redis_host=config["redis"]["host"],
+                redis_port=config["redis"]["port"],
+                connect_retries=config["redis"]["connect_retries"],
+                retry_delay_sec=config["redis"]["retry_delay_sec"],
+                wire_format=streaming.get("wire_format", "json"),
+                wire_dtype=streaming.get("wire_dtype", "float64"),
+                chunk_rows=streaming.get("producer_chunk_rows", 100000),
+                tick_sec=loadgen.get("tick_sec", 0.01),
+                max_batch=loadgen.get("max_batch", 5000),
+                report_interval_sec=loadgen.get("report_interval_sec", 1.0),
+                loop=loadgen.get("loop", True),
+                cache_dir=_cache_dir(config),
+                columns=producer_kwargs["columns"],
+            )
+            log_event(
+                logger,
+                "loadgen.complete",
+                sent=report.sent,
+                target=report.target,
+                achieved_fps=round(report.achieved_fps, 1),
+                target_fps=round(report.target_fps, 1),
+                max_behind=report.max_behind,
+            )
+        elif producers > 1:
+            log_event(logger, "producers.start", count=producers, partitioned=partitioned)
+            run_producers(dataset_path, producers, partitioned=partitioned, **producer_kwargs)
+        else:
+            run_producer(dataset_path, **producer_kwargs)
     except KeyboardInterrupt:
         print("\n[*] Ctrl+C detected. Stopping...")
 
     stop_event.set()
-    consumer_thread.join()
+    for worker in workers:
+        worker.join()
 
     print("[*] Streaming IDS stopped.")
 
+
+def replay(csv_path=None, transport="file", alerts_path=None, max_rows=None, wire_format="json"):
+    """
+    Backfill: run a whole CSV through detection and reasoning without Redis.
+
+    The model is loaded (or trained) as for ``main``; flows are replayed unthrottled and,
+    with ``alerts_path``, every alert is written there as JSON lines. The attack graph
+    starts empty and is never journaled, so the live consumer's journal is left alone.
+    """
+    config = load_config()
+    logger = setup_logger(config)
+    csv_path = csv_path or config["dataset"]["path"]
+    model, scaler, feature_columns = _load_model(config, logger, csv_path)
+
+    if alerts_path:
+        alert_sink = AlertSink(
+            [JsonlAlertWriter(alerts_path)],
+            window_sec=config.get("alerts", {}).get("coalesce_window_sec", 5.0),
+        )
+    else:
+        # Only built here: a configured sink that --alerts replaces would
+        # be built but never started or closed
+        alert_sink = _alert_sink(config)
+
+    log_event(logger, "replay.start", path=csv_path, transport=transport)
+    stats = run_replay(
+        csv_path,
+        model,
+        scaler,
+        feature_columns,
+        # A backfill must not restore from or write to the live consumer's journal
+        _reasoning_engine(config, journaled=False),
+        transport=transport,
+        batch_size=config["streaming"]["batch_size"],
+        max_rows=max_rows,
+        wire_format=wire_format,
+        pipeline_depth=config["streaming"].get("pipeline_depth", 0),
+        alert_sink=alert_sink,
+        cache_dir=_cache_dir(config),
+        columns=_producer_columns(config, csv_path, feature_columns),
+    )
+    log_event(
+        logger,
+        "replay.complete",
+        flows=stats.flow_count,
+        alerts=stats.alert_count,
+        errors=stats.errors_count,
+        fps=round(stats.throughput(), 1),
+    )
+    return stats
+
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,273 @@
+"""Transports that feed the consumer loop, with or without Redis.
+
+``consume`` (see ``rapids.streaming.consumer``) reads from any object with
+the ``StreamReader`` interface: ``read()``, ``ack(entry_ids)``,
+``save_checkpoint()``, mutable ``batch_size`` and ``block_ms``, and an
+``exhausted`` flag that ends the loop. Three transports provide it:
+
+* ``redis``: ``StreamReader`` on a Redis stream, as in the live IDS;
+* ``memory``: :class:`MemoryTransport`, a bounded in-process queue fed by a
+  producer thread with the same JSON or binary entries Redis would carry;
+* ``file``: :class:`FileReplayTransport`, which reads a CSV straight into
+  packed batches with no producer, queue or serialization round trip.
+
+:func:`run_replay` pushes a whole CSV through the memory or file transport
+as fast as the consumer can go, for backfills and Redis-free benchmarks.
+"""
+import logging
+import queue
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from rapids.streaming.alerts import AlertSink
+from rapids.streaming.consumer import ConsumerStats, consume
+from rapids.streaming.producer import flow_encoder, iter_flows
+from rapids.streaming.wire import SchemaRegistry, encode_batch, schema_id
+
+logger = logging.getLogger(__name__)
+
+TRANSPORTS = ("redis", "memory", "file")
+
+_END = object()
+
+
+class LocalSchemaRegistry(SchemaRegistry):
+    """SchemaRegistry kept in process, for transports without Redis."""
+
+    def __init__(self) -> None:
+        super().__init__(None, "local")
+
+    def register(self, columns: Sequence[str]) -> str:
+        schema = schema_id(columns)
+        self._columns[schema] = list(columns)
+        return schema
+
+    def columns(self, schema: str) -> Optional[List[str]]:
+        return self._columns.get(schema)
+
+
+class _LocalIds:
+    """Entry ids shaped like Redis stream ids ("<ms>-<seq>"), so latency tracking works unchanged."""
+
+    def __init__(self) -> None:
+        self._seq = 0
+
+    def next_id(self) -> str:
+        self._seq += 1
+        return f"{int(time.time() * 1000)}-{self._seq}"
+
+
+class MemoryTransport(_LocalIds):
+    """
+    Bounded in-process queue of stream entries.
+
+    A producer calls :meth:`publish` with the same fields it would XADD and
+    :meth:`close` at the end; ``publish`` blocks while ``maxsize`` entries are
+    waiting, so a fast producer cannot outrun the consumer's memory. Entries
+    are gone once read, so ``ack`` and ``save_checkpoint`` do nothing.
+    """
+
+    def __init__(self, batch_size: int = 200, block_ms: int = 200, maxsize: int = 10000) -> None:
+        super().__init__()
+        self.batch_size = batch_size
+        self.block_ms = block_ms
+        self.schemas = LocalSchemaRegistry()
+        self.exhausted = False
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=maxsize)
+
+    def publish(self, fields: Dict[str, Any]) -> str:
+        entry_id = self.next_id()
+        self._queue.put((entry_id, fields))
+        return entry_id
+
+    def close(self) -> None:
+        """Mark the end of input; the consumer stops after draining the queue."""
+        self._queue.put(_END)
+
+    def read(self) -> List[Tuple[Any, dict]]:
+        """Wait up to ``block_ms`` for an entry, then take up to ``batch_size`` without waiting."""
+        try:
+            item = self._queue.get(timeout=self.block_ms / 1000.0)
+        except queue.Empty:
+            return []
+
+        messages: List[Tuple[Any, dict]] = []
+        while True:
+            if item is _END:
+                self.exhausted = True
+                break
+            messages.append(item)
+            if len(messages) >= self.batch_size:
+                break
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+        return messages
+
+    def ack(self, entry_ids: Sequence[Any]) -> None:
+        pass
+
+    def save_checkpoint(self) -> None:
+        pass
+
+
+class FileReplayTransport(_LocalIds):
+    """
+    Read a flow CSV directly as packed batch entries.
+
+    The CSV is read ``chunk_rows`` at a time (see ``iter_flows``) and every
+    read returns one binary entry holding the next ``batch_size`` rows, so
+    decoding is a buffer copy and memory stays bounded by one chunk. With
+    ``cache_dir`` the rows come from the dataset cache instead, and with
+    ``columns`` only those columns are read.
+    """
+
+    def __init__(
+        self,
+        csv_path: str,
+        batch_size: int = 200,
+        max_rows: Optional[int] = None,
+        chunk_rows: int = 100000,
+        wire_dtype: str = "float64",
+        cache_dir: Optional[str] = None,
+        columns: Optional[List[str]] = None,
+    ) -> None:
+        super().__init__()
+        self.batch_size = batch_size
+        self.block_ms = 0
+        self.wire_dtype = wire_dtype
+        self.schemas = LocalSchemaRegistry()
+        self.exhausted = False
+        self._chunks = iter_flows(csv_path, chunk_rows, max_rows, cache_dir=cache_dir, columns=columns)
+        self._values: Optional[np.ndarray] = None
+        self._schema: Optional[str] = None
+        self._offset = 0
+
+    def read(self) -> List[Tuple[Any, dict]]:
+        if self._values is None or self._offset >= len(self._values):
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                self.exhausted = True
+                return []
+            self._schema = self.schemas.register(chunk.columns.tolist())
+            self._values = chunk.to_numpy(dtype=np.float64)
+            self._offset = 0
+
+        rows = self._values[self._offset : self._offset + self.batch_size]
+        self._offset += len(rows)
+        return [(self.next_id(), encode_batch(rows, self._schema, self.wire_dtype))]
+
+    def ack(self, entry_ids: Sequence[Any]) -> None:
+        pass
+
+    def save_checkpoint(self) -> None:
+        pass
+
+
+def _produce(
+    transport: MemoryTransport,
+    csv_path: str,
+    max_rows: Optional[int],
+    chunk_rows: int,
+    wire_format: str,
+    batch_size: int,
+    cache_dir: Optional[str],
+    columns: Optional[List[str]],
+) -> None:
+    try:
+        for chunk in iter_flows(csv_path, chunk_rows, max_rows, cache_dir=cache_dir, columns=columns):
+            schema = transport.schemas.register(chunk.columns.tolist()) if wire_format == "binary" else None
+            encode = flow_encoder(wire_format, "float64", schema)
+            for offset in range(0, len(chunk), batch_size):
+                for fields in encode(chunk.iloc[offset : offset + batch_size]):
+                    transport.publish(fields)
+    except Exception as e:
+        logger.error(f"Replay producer failed: {e}")
+    finally:
+        transport.close()
+
+
+def run_replay(
+    csv_path: str,
+    model,
+    scaler,
+    feature_columns: List[str],
+    reasoning_engine,
+    transport: str = "file",
+    batch_size: int = 200,
+    max_rows: Optional[int] = None,
+    chunk_rows: int = 100000,
+    wire_format: str = "json",
+    pipeline_depth: int = 0,
+    alert_sink: Optional[AlertSink] = None,
+    stop_event=None,
+    cache_dir: Optional[str] = None,
+    columns: Optional[List[str]] = None,
+) -> ConsumerStats:
+    """
+    Run every flow of a CSV through the consumer logic without pacing.
+
+    Args:
+        csv_path: Flow CSV to replay.
+        model: Trained anomaly detection model.
+        scaler: Fitted feature scaler.
+        feature_columns: List of feature column names.
+        reasoning_engine: ReasoningEngine instance.
+        transport: "file" (direct reads) or "memory" (producer thread + queue).
+        batch_size: Flows per consumer batch.
+        max_rows: Stop after this many clean rows; None replays the whole file.
+        chunk_rows: CSV rows read into memory at a time.
+        wire_format: Entry encoding for the memory transport ("json" or "binary").
+        pipeline_depth: As for ``run_consumer``; 0 runs the stages inline.
+        alert_sink: AlertSink receiving every anomaly.
+        stop_event: Optional event to end the replay early.
+        cache_dir: Dataset cache directory; flows are read from the cache
+            entry for ``csv_path`` instead of parsing the CSV.
+        columns: Replay only these columns of each flow; they must include
+            ``feature_columns``.
+
+    Returns:
+        The final consumer statistics.
+
+    Raises:
+        ValueError: If ``transport`` is not "file" or "memory".
+    """
+    stop_event = stop_event or threading.Event()
+    if transport == "file":
+        reader = FileReplayTransport(
+            csv_path,
+            batch_size=batch_size,
+            max_rows=max_rows,
+            chunk_rows=chunk_rows,
+            cache_dir=cache_dir,
+            columns=columns,
+        )
+    elif transport == "memory":
+        # Binary entries already hold batch_size flows each, so read one at a time
+        reader = MemoryTransport(batch_size=1 if wire_format == "binary" else batch_size)
+        producer = threading.Thread(
+            target=_produce,
+            args=(reader, csv_path, max_rows, chunk_rows, wire_format, batch_size, cache_dir, columns),
+            name="rapids-replay-producer",
+            daemon=True,
+        )
+        producer.start()
+    else:
+        raise ValueError(f"Replay transport must be 'file' or 'memory', got {transport!r}")
+
+    logger.info(f"[*] Replaying '{csv_path}' through the {transport} transport...")
+    return consume(
+        reader,
+        model,
+        scaler,
+        feature_columns,
+        stop_event,
+        reasoning_engine,
+        pipeline_depth=pipeline_depth,
+        schemas=reader.schemas,
+        alert_sink=alert_sink,
+    )
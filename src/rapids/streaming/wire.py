@@ -0,0 +1,160 @@
+"""Binary batch wire format for flows on a Redis stream.
+
+A binary entry carries a whole batch of flows as one packed row-major matrix
+instead of one JSON object per flow::
+
+    {"schema": <schema id>, "dtype": "<f4" | "<f8", "rows": n, "cols": m, "batch": <bytes>}
+
+The column names behind a schema id are stored once in the Redis hash
+``<stream>:schemas`` so that entries stay small and the consumer can resolve
+the column order once per schema.
+"""
+import json
+import logging
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import redis
+
+from rapids.core.schema import schema_id
+
+logger = logging.getLogger(__name__)
+
+WIRE_FORMATS = ("json", "binary")
+DTYPES = {"float32": "<f4", "float64": "<f8"}
+
+
+def stream_field(data: dict, name: str):
+    """Read a stream field from a decoded (str keys) or raw (bytes keys) response."""
+    value = data.get(name)
+    if value is None:
+        value = data.get(name.encode("ascii"))
+    return value
+
+
+def as_text(value) -> str:
+    """Return a stream id or field value as str."""
+    return value.decode("utf-8") if isinstance(value, bytes) else str(value)
+
+
+def entry_ms(entry_id) -> int:
+    """Return the millisecond timestamp part of a stream entry id."""
+    return int(as_text(entry_id).split("-", 1)[0])
+
+
+def is_binary_entry(data: dict) -> bool:
+    """Return True if a stream entry holds a binary batch."""
+    return stream_field(data, "batch") is not None
+
+
+def encode_batch(values: np.ndarray, schema: str, dtype: str = "float64") -> Dict[str, object]:
+    """
+    Pack a 2-D feature matrix into stream entry fields.
+
+    Args:
+        values: Array of shape (n_rows, n_cols).
+        schema: Schema id of the column order of ``values``.
+        dtype: "float32" or "float64".
+
+    Returns:
+        Fields for XADD.
+    """
+    if dtype not in DTYPES:
+        raise ValueError(f"Unsupported wire dtype: {dtype}")
+    wire_dtype = DTYPES[dtype]
+    matrix = np.ascontiguousarray(values, dtype=wire_dtype)
+    rows, cols = matrix.shape
+    return {
+        "schema": schema,
+        "dtype": wire_dtype,
+        "rows": rows,
+        "cols": cols,
+        "batch": matrix.tobytes(),
+    }
+
+
+def decode_batch(data: dict) -> Tuple[str, np.ndarray]:
+    """
+    Unpack a binary stream entry without copying the payload.
+
+    Args:
+        data: Stream entry fields as returned by a client with
+            ``decode_responses=False``.
+
+    Returns:
+        Tuple of (schema id, read-only array of shape (rows, cols)).
+
+    Raises:
+        ValueError: If the entry is malformed.
+    """
+    try:
+        wire_dtype = as_text(stream_field(data, "dtype"))
+        rows = int(stream_field(data, "rows"))
+        cols = int(stream_field(data, "cols"))
+        payload = stream_field(data, "batch")
+        schema = as_text(stream_field(data, "schema"))
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Malformed binary batch header: {e}") from e
+
+    if wire_dtype not in DTYPES.values():
+        raise ValueError(f"Unsupported wire dtype: {wire_dtype}")
+    if not isinstance(payload, (bytes, bytearray, memoryview)):
+        raise ValueError("Binary batch payload is not bytes; use a client with decode_responses=False")
+
+    values = np.frombuffer(payload, dtype=wire_dtype)
+    if values.size != rows * cols:
+        raise ValueError(f"Binary batch has {values.size} values, expected {rows}x{cols}")
+    return schema, values.reshape(rows, cols)
+
+
+class SchemaRegistry:
+    """Schema id -> column names, stored in the Redis hash ``<stream>:schemas``."""
+
+    def __init__(self, r: redis.Redis, stream_name: str) -> None:
+        self.r = r
+        self.key = f"{stream_name}:schemas"
+        self._columns: Dict[str, List[str]] = {}
+        self._indices: Dict[Tuple[str, Tuple[str, ...]], Optional[np.ndarray]] = {}
+
+    def register(self, columns: Sequence[str]) -> str:
+        """Publish a column order and return its schema id."""
+        schema = schema_id(columns)
+        self.r.hset(self.key, schema, json.dumps(list(columns)))
+        self._columns[schema] = list(columns)
+        return schema
+
+    def columns(self, schema: str) -> Optional[List[str]]:
+        """Return the column names of a schema id, or None if unknown."""
+        if schema not in self._columns:
+            raw = self.r.hget(self.key, schema)
+            if raw is None:
+                return None
+            self._columns[schema] = json.loads(as_text(raw))
+        return self._columns[schema]
+
+    def column_index(self, schema: str, feature_columns: Sequence[str]) -> Optional[np.ndarray]:
+        """
+        Positions of ``feature_columns`` within a schema, resolved once per schema.
+
+        Returns:
+            Integer index array, or None if the schema is unknown or lacks a
+            required feature.
+        """
+        key = (schema, tuple(feature_columns))
+        if key in self._indices:
+            return self._indices[key]
+
+        columns = self.columns(schema)
+        if columns is None:
+            # Unknown schemas are not cached; the producer may register them later
+            return None
+
+        positions = {col: i for i, col in enumerate(columns)}
+        missing = [col for col in feature_columns if col not in positions]
+        index = None
+        if missing:
+            logger.warning(f"Schema {schema} lacks features {missing[:3]}")
+        else:
+            index = np.array([positions[col] for col in feature_columns], dtype=np.intp)
+        self._indices[key] = index
+        return index
@@ -1,8 +1,10 @@
 import os
 import sys
+import time
 from pathlib import Path
 import pytest
 import numpy as np
+import pandas as pd
 
 
 ROOT = Path(__file__).resolve().parents[1]
@@ -36,3 +38,94 @@ def sample_anomaly_data():
     features = np.vstack([normal, anomaly])
     labels = np.array(["BENIGN"] * 500 + ["ATTACK"] * 50)
     return features, labels
+
+
+class IdentityScaler:
+    def transform(self, features):
+        return features
+
+
+class ThresholdModel:
+    """Flags flows whose first feature exceeds a threshold."""
+
+    def __init__(self, threshold):
+        self.threshold = threshold
+
+    def predict(self, features):
+        return np.where(features[:, 0] > self.threshold, -1, 1)
+
+
+@pytest.fixture
+def identity_scaler():
+    """Return a scaler that passes features through unchanged."""
+    return IdentityScaler()
+
+
+@pytest.fixture
+def threshold_model():
+    """Return a factory for models flagging flows whose first feature exceeds ``threshold``."""
+
+    def make(threshold=100):
+        return ThresholdModel(threshold)
+
+    return make
+
+
+class RecordingPipeline:
+    def __init__(self, owner):
+        self.owner = owner
+        self.pending = []
+
+    def xadd(self, name, fields):
+        self.pending.append((name, fields))
+
+    def execute(self):
+        time.sleep(self.owner.execute_sec)
+        self.owner.round_trips += 1
+        self.owner.entries.extend(self.pending)
+        self.pending = []
+
+
+class RecordingRedis:
+    """Records stream entries and counts round trips; pipelines take ``execute_sec`` to execute."""
+
+    def __init__(self, execute_sec=0.0):
+        self.entries = []
+        self.round_trips = 0
+        self.execute_sec = execute_sec
+        self.hashes = {}
+
+    def hset(self, key, field, value):
+        self.hashes.setdefault(key, {})[field] = value
+
+    def xadd(self, name, fields):
+        self.round_trips += 1
+        self.entries.append((name, fields))
+
+    def pipeline(self, transaction=True):
+        return RecordingPipeline(self)
+
+
+@pytest.fixture
+def recording_redis():
+    """Return a factory for fake Redis clients that record what is sent."""
+    return RecordingRedis
+
+
+@pytest.fixture
+def write_flows_csv(tmp_path):
+    """Return a factory writing a small benign flow CSV, optionally with a timestamp column."""
+
+    def write(rows=10, timestamps=None):
+        data = {
+            " Destination Port": [80 + i for i in range(rows)],
+            " Flow Duration": [1.5 * i for i in range(rows)],
+            " Label": ["BENIGN"] * rows,
+        }
+        if timestamps is not None:
+            data[" Timestamp"] = timestamps
+        path = tmp_path / "flows.csv"
+        pd.DataFrame(data).to_csv(path, index=False)
+        return path
+
+    return write
@@ -0,0 +1,96 @@
+"""Test suite for adaptive batch sizing."""
+import time
+
+import pytest
+
+from rapids.streaming.adaptive import BatchController, entry_age_ms
+
+
+class FakeReader:
+    def __init__(self, batch_size=200, block_ms=200):
+        self.batch_size = batch_size
+        self.block_ms = block_ms
+
+
+def _ids(count, age_ms=0):
+    stamp = int(time.time() * 1000 - age_ms)
+    return [f"{stamp}-{i}" for i in range(count)]
+
+
+def test_entry_age_from_stream_id():
+    assert entry_age_ms("1000-5", 1250.0) == 250.0
+    assert entry_age_ms(b"1000-0", 1000.0) == 0.0
+
+
+def test_slow_batches_shrink_batch_size():
+    reader = FakeReader(batch_size=400)
+    controller = BatchController(reader, latency_target_ms=100, interval=5)
+    for _ in range(5):
+        controller.observe(_ids(400), processing_sec=0.08)
+
+    assert reader.batch_size == 200
+    assert controller.decisions[-1].reason.startswith("processing p99")
+
+
+def test_backlog_with_headroom_grows_batch_size():
+    reader = FakeReader(batch_size=200)
+    controller = BatchController(reader, latency_target_ms=100, max_batch_size=250, interval=5)
+    for _ in range(5):
+        controller.observe(_ids(200, age_ms=150), processing_sec=0.005)
+    assert reader.batch_size == 250
+
+    # Capped at max_batch_size
+    for _ in range(5):
+        controller.observe(_ids(250, age_ms=150), processing_sec=0.005)
+    assert reader.batch_size == 250
+
+
+def test_light_traffic_keeps_batch_size_and_bounds_block():
+    reader = FakeReader(batch_size=200, block_ms=500)
+    controller = BatchController(reader, latency_target_ms=100, interval=5)
+    for _ in range(5):
+        controller.observe(_ids(3), processing_sec=0.01)
+
+    assert reader.batch_size == 200
+    assert reader.block_ms == 90
+    # Within tolerance of the current setting: no new decision
+    for _ in range(5):
+        controller.observe(_ids(3), processing_sec=0.012)
+    assert len(controller.decisions) == 1
+
+
+def test_never_shrinks_below_min():
+    reader = FakeReader(batch_size=30)
+    controller = BatchController(reader, latency_target_ms=10, min_batch_size=20, interval=1)
+    for _ in range(5):
+        controller.observe(_ids(30), processing_sec=1.0)
+    assert reader.batch_size == 20
+
+
+def test_rejects_bad_limits():
+    with pytest.raises(ValueError):
+        BatchController(FakeReader(), latency_target_ms=0)
+    with pytest.raises(ValueError):
+        BatchController(FakeReader(), latency_target_ms=100, min_batch_size=50, max_batch_size=10)
+
+
+def test_latency_over_target_adjusts_batch_size_without_full_reads():
+    # Entries wait in the stream although reads are not full and processing is fast
+    reader = FakeReader(batch_size=200)
+    controller = BatchController(reader, latency_target_ms=100, interval=5)
+    for _ in range(5):
+        controller.observe(_ids(50, age_ms=300), processing_sec=0.005)
+    assert reader.batch_size == 300
+    assert controller.decisions[-1].reason.startswith("100.0ms target exceeded")
+    assert controller.decisions[-1].latency_p99_ms > 100
+
+    # Processing takes a large share of the budget: smaller batches cut the wait
+    for _ in range(5):
+        controller.observe(_ids(50, age_ms=300), processing_sec=0.04)
+    assert reader.batch_size == 150
+    assert controller.decisions[-1].reason.startswith("latency p99")
+
+    # Within the target and not backlogged: batch size holds
+    for _ in range(5):
+        controller.observe(_ids(50), processing_sec=0.005)
+    assert reader.batch_size == 150
@@ -0,0 +1,120 @@
+"""Test suite for the batched alert sink."""
+import json
+
+import numpy as np
+
+from rapids.reasoning.engine import ReasoningEngine
+from rapids.streaming.alerts import AlertSink, JsonlAlertWriter
+from rapids.streaming.consumer import ConsumerStats, reason
+
+
+class RecordingWriter:
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+        self.closed = False
+
+    def open(self):
+        pass
+
+    def write(self, records):
+        if self.fail:
+            raise OSError("disk full")
+        self.batches.append(list(records))
+
+    def close(self):
+        self.closed = True
+
+
+PATHS = [{"path": ["10.0.0.1", "10.0.0.9"], "risk": 0.4}]
+RECS = [{"action": "Block TCP 3306 from 10.0.0.1 to 10.0.0.9", "risk_reduction": 0.3}]
+
+
+def _sink(writer, **kwargs):
+    sink = AlertSink([writer], flush_interval_sec=60, **kwargs)
+    sink.start()
+    return sink
+
+
+def test_first_alert_written_and_repeats_coalesced():
+    writer = RecordingWriter()
+    sink = _sink(writer, window_sec=5.0)
+    for i in range(1000):
+        sink.emit(f"{i}-0", "10.0.0.1", "10.0.0.9", PATHS, RECS, now=100.0 + i * 0.001)
+
+    assert sink.flush(now=101.0) == 1
+    assert writer.batches[0][0]["count"] == 1
+    assert writer.batches[0][0]["action"] == RECS[0]["action"]
+
+    # Window closes: one summary carrying the repeat count
+    assert sink.flush(now=106.0) == 1
+    summary = writer.batches[1][0]
+    assert summary["count"] == 1000
+    assert summary["first_seen"] == 100.0
+    assert summary["id"] == "999-0"
+    sink.close()
+    assert writer.closed
+
+
+def test_distinct_actions_are_separate_alerts():
+    writer = RecordingWriter()
+    sink = _sink(writer)
+    sink.emit("1-0", "10.0.0.1", "10.0.0.9", PATHS, RECS, now=1.0)
+    sink.emit("2-0", "10.0.0.1", "10.0.0.9", PATHS, [], now=1.0)
+    sink.emit("3-0", "10.0.0.2", "10.0.0.9", PATHS, RECS, now=1.0)
+    sink.close()
+
+    assert [record["id"] for record in writer.batches[0]] == ["1-0", "2-0", "3-0"]
+
+
+def test_expired_window_reopens_and_keeps_summary():
+    writer = RecordingWriter()
+    sink = _sink(writer, window_sec=1.0)
+    sink.emit("1-0", "a", "b", PATHS, RECS, now=10.0)
+    sink.emit("2-0", "a", "b", PATHS, RECS, now=10.5)
+    sink.emit("3-0", "a", "b", PATHS, RECS, now=12.0)
+    sink.close()
+
+    assert [(r["id"], r["count"]) for r in writer.batches[0]] == [("1-0", 1), ("2-0", 2), ("3-0", 1)]
+
+
+def test_overflow_drops_oldest():
+    writer = RecordingWriter()
+    sink = _sink(writer, max_pending=2)
+    for i in range(5):
+        sink.emit(f"{i}-0", f"10.0.0.{i}", "x", PATHS, RECS, now=1.0)
+
+    assert sink.flush(now=1.0) == 2
+    assert sink.dropped == 3
+    assert [r["id"] for r in writer.batches[0]] == ["3-0", "4-0"]
+    sink.close()
+
+
+def test_failing_writer_does_not_block_others():
+    good, bad = RecordingWriter(), RecordingWriter(fail=True)
+    sink = AlertSink([bad, good], flush_interval_sec=60)
+    sink.start()
+    sink.emit("1-0", "a", "b", PATHS, RECS, now=1.0)
+    sink.close()
+
+    assert len(good.batches) == 1
+
+
+def test_jsonl_writer(tmp_path):
+    sink = AlertSink([JsonlAlertWriter(str(tmp_path / "out" / "alerts.jsonl"))], flush_interval_sec=60)
+    sink.start()
+    sink.emit("1-0", "a", "b", PATHS, RECS, now=1.0)
+    sink.close()
+
+    lines = (tmp_path / "out" / "alerts.jsonl").read_text().splitlines()
+    assert json.loads(lines[0])["path"] == PATHS[0]["path"]
+
+
+def test_reason_emits_every_anomaly():
+    writer = RecordingWriter()
+    sink = _sink(writer, window_sec=0.0)
+    flows = [{"Destination Port": 3306, "Source IP": f"10.0.0.{i}"} for i in range(3)]
+    reason(["1-0", "2-0", "3-0"], flows, np.array([-1, 1, -1]), ReasoningEngine(), ConsumerStats(), alert_sink=sink)
+    sink.close()
+
+    assert [record["id"] for record in writer.batches[0]] == ["1-0", "3-0"]
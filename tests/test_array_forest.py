@@ -0,0 +1,138 @@
+"""Test suite for the flat-array IsolationForest scorer."""
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import IsolationForest
+from sklearn.preprocessing import StandardScaler
+
+from rapids.detection.anomaly_model import train_isolation_forest
+from rapids.detection.array_forest import ArrayIsolationForest
+from rapids.detection.artifact import load_artifact, save_artifact
+from rapids.evaluation.benchmarking import compare_scorers
+
+COLUMNS = ["Destination Port", "Flow Duration", "Total Fwd Packets", "Total Backward Packets"]
+
+
+@pytest.fixture
+def flows():
+    rng = np.random.default_rng(0)
+    train = rng.normal(size=(500, len(COLUMNS)))
+    test = np.vstack([rng.normal(size=(300, len(COLUMNS))), rng.normal(4.0, 2.0, size=(50, len(COLUMNS)))])
+    return train, test
+
+
+def _assert_equivalent(model, scorer, X):
+    assert np.allclose(scorer.score_samples(X), model.score_samples(X), rtol=0, atol=1e-12)
+    assert np.allclose(scorer.decision_function(X), model.decision_function(X), rtol=0, atol=1e-12)
+    assert np.array_equal(scorer.predict(X), model.predict(X))
+
+
+def test_matches_sklearn(flows):
+    train, test = flows
+    model = train_isolation_forest(train, contamination=0.1)
+    scorer = ArrayIsolationForest.from_sklearn(model, chunk_rows=64)
+
+    _assert_equivalent(model, scorer, test)
+    assert (scorer.predict(test) == -1).sum() > 0
+    assert scorer.n_trees == len(model.estimators_)
+
+
+@pytest.mark.parametrize("params", [{"max_features": 0.5}, {"max_samples": 64, "bootstrap": True}])
+def test_matches_sklearn_with_subsampling(flows, params):
+    train, test = flows
+    model = IsolationForest(n_estimators=30, random_state=1, **params).fit(train)
+    _assert_equivalent(model, ArrayIsolationForest.from_sklearn(model), test)
+
+
+def test_missing_values_follow_sklearn(flows):
+    train, test = flows
+    train = train.copy()
+    train[::7, 1] = np.nan
+    model = IsolationForest(n_estimators=30, random_state=2).fit(train)
+    test = test.copy()
+    test[::5, 1] = np.nan
+
+    _assert_equivalent(model, ArrayIsolationForest.from_sklearn(model), test)
+
+
+def test_rejects_wrong_width(flows):
+    train, test = flows
+    scorer = ArrayIsolationForest.from_sklearn(train_isolation_forest(train))
+    with pytest.raises(ValueError, match="4 columns"):
+        scorer.predict(test[:, :3])
+
+
+def test_artifact_maps_forest_arrays(tmp_path, flows):
+    train, test = flows
+    scaler = StandardScaler().fit(train)
+    model = train_isolation_forest(scaler.transform(train), contamination=0.1)
+    save_artifact(tmp_path, model, scaler, COLUMNS)
+
+    scorer = load_artifact(tmp_path).model
+    assert isinstance(scorer, ArrayIsolationForest)
+    assert isinstance(scorer.threshold, np.memmap)
+    assert not isinstance(load_artifact(tmp_path, scorer="sklearn").model, ArrayIsolationForest)
+    with pytest.raises(ValueError, match="scorer"):
+        load_artifact(tmp_path, scorer="numba")
+
+    # Mapped scorers pickle as their path and map the same files again
+    payload = pickle.dumps(scorer)
+    assert len(payload) < 1000
+    clone = pickle.loads(payload)
+    assert isinstance(clone.value, np.memmap)
+    X = scaler.transform(test)
+    assert np.array_equal(clone.decision_function(X), scorer.decision_function(X))
+    _assert_equivalent(model, clone, X)
+
+
+def test_fused_scaler_scores_raw_features_identically(flows):
+    train, test = flows
+    raw_train, raw_test = np.exp(train * 2.0) * 1000.0, np.exp(test * 2.0) * 1000.0
+    raw_train[:, 2] = 6.0
+    scaler = StandardScaler().fit(raw_train)
+    model = IsolationForest(n_estimators=30, max_features=0.75, random_state=3).fit(scaler.transform(raw_train))
+    scorer = ArrayIsolationForest.from_sklearn(model)
+    fused = scorer.fuse_scaler(scaler)
+
+    assert fused.raw_input and not scorer.raw_input
+    expected = model.decision_function(scaler.transform(raw_test))
+    assert np.allclose(fused.decision_function(raw_test), expected, rtol=0, atol=1e-12)
+
+    # Features exactly on a fused threshold, and one float above it, route as scaling would
+    nodes = np.flatnonzero(np.isfinite(fused.threshold))
+    edge = np.repeat(raw_test[:1], 2 * len(nodes), axis=0)
+    edge[np.arange(len(nodes)), fused.feature[nodes]] = fused.threshold[nodes]
+    edge[len(nodes) + np.arange(len(nodes)), fused.feature[nodes]] = np.nextafter(fused.threshold[nodes], np.inf)
+    assert np.array_equal(fused.predict(edge), model.predict(scaler.transform(edge)))
+    assert np.allclose(fused.decision_function(edge), model.decision_function(scaler.transform(edge)), rtol=0, atol=1e-12)
+
+    with pytest.raises(ValueError, match="already fused"):
+        fused.fuse_scaler(scaler)
+
+
+def test_fused_artifact_loads_without_scaler(tmp_path, flows):
+    train, test = flows
+    scaler = StandardScaler().fit(train)
+    model = train_isolation_forest(scaler.transform(train), contamination=0.1)
+    save_artifact(tmp_path, model, scaler, COLUMNS, fuse_scaler=True)
+
+    artifact = load_artifact(tmp_path)
+    assert artifact.scaler is None and artifact.model.raw_input
+    assert artifact.manifest["fused_scaler"] is True
+    assert np.array_equal(artifact.model.predict(test), model.predict(scaler.transform(test)))
+    assert load_artifact(tmp_path, scorer="sklearn").scaler is not None
+
+
+def test_compare_scorers_reports_speedup_and_agreement(flows):
+    train, test = flows
+    scaler = StandardScaler().fit(train)
+    model = train_isolation_forest(scaler.transform(train), contamination=0.1)
+
+    report = compare_scorers(model, scaler, pd.DataFrame(test, columns=COLUMNS), batch_size=100)
+    for name in ("array", "fused"):
+        assert report[f"{name}_label_agreement"] == 1.0
+        assert report[f"{name}_max_score_diff"] < 1e-12
+        assert report[f"{name}_speedup"] > 0
+        assert report[name]["total_flows"] == len(test)
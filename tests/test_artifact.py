@@ -0,0 +1,75 @@
+"""Test suite for versioned model artifacts."""
+import json
+
+import numpy as np
+import pytest
+from sklearn.preprocessing import StandardScaler
+
+from rapids.detection.anomaly_model import train_isolation_forest
+from rapids.detection.artifact import LATEST, MANIFEST, load_artifact, save_artifact
+from rapids.core.schema import schema_id
+
+COLUMNS = ["Destination Port", "Flow Duration", "Total Fwd Packets"]
+
+
+@pytest.fixture
+def fitted():
+    rng = np.random.default_rng(0)
+    raw = rng.normal(size=(300, len(COLUMNS)))
+    scaler = StandardScaler().fit(raw)
+    model = train_isolation_forest(scaler.transform(raw), contamination=0.1)
+    return model, scaler, raw
+
+
+def test_saved_artifact_scores_like_the_original(tmp_path, fitted):
+    model, scaler, raw = fitted
+    path = save_artifact(tmp_path, model, scaler, COLUMNS, metadata={"dataset": "flows.csv"})
+
+    artifact = load_artifact(tmp_path, scorer="sklearn")
+    assert artifact.path == path
+    assert artifact.feature_columns == COLUMNS
+    assert artifact.schema_hash == schema_id(COLUMNS)
+    assert artifact.manifest["metadata"] == {"dataset": "flows.csv"}
+    assert isinstance(artifact.scaler.mean_, np.memmap)
+
+    expected = model.decision_function(scaler.transform(raw))
+    assert np.array_equal(artifact.model.decision_function(artifact.scaler.transform(raw)), expected)
+
+
+def test_latest_points_at_newest_version(tmp_path, fitted):
+    model, scaler, _ = fitted
+    first = save_artifact(tmp_path, model, scaler, COLUMNS)
+    second = save_artifact(tmp_path, model, scaler, COLUMNS[:2])
+
+    assert first != second
+    assert (tmp_path / LATEST).read_text().strip() == second.name
+    assert load_artifact(tmp_path).feature_columns == COLUMNS[:2]
+    assert load_artifact(first).feature_columns == COLUMNS
+    assert not list(tmp_path.glob(".*.tmp"))
+
+
+def test_check_columns_reports_missing(tmp_path, fitted):
+    model, scaler, _ = fitted
+    artifact = load_artifact(save_artifact(tmp_path, model, scaler, COLUMNS))
+
+    artifact.check_columns(COLUMNS + [" Label"])
+    with pytest.raises(ValueError, match="Total Fwd Packets"):
+        artifact.check_columns(COLUMNS[:2])
+
+
+def test_load_rejects_missing_or_tampered_artifacts(tmp_path, fitted):
+    model, scaler, _ = fitted
+    with pytest.raises(FileNotFoundError):
+        load_artifact(tmp_path / "none")
+
+    path = save_artifact(tmp_path, model, scaler, COLUMNS)
+    manifest = json.loads((path / MANIFEST).read_text())
+    manifest["feature_columns"] = list(reversed(COLUMNS))
+    (path / MANIFEST).write_text(json.dumps(manifest))
+    with pytest.raises(ValueError, match="schema hash"):
+        load_artifact(path)
+
+    manifest["format"] = 99
+    (path / MANIFEST).write_text(json.dumps(manifest))
+    with pytest.raises(ValueError, match="format"):
+        load_artifact(path)
@@ -0,0 +1,60 @@
+"""Test suite for the asyncio stream consumer."""
+import asyncio
+import json
+
+from rapids.reasoning.engine import ReasoningEngine
+from rapids.streaming import async_stream
+
+
+class FakeAsyncRedis:
+    """Serves one XREAD batch, then stops the consumer on the next read."""
+
+    def __init__(self, messages, stop_event):
+        self.messages = messages
+        self.stop_event = stop_event
+        self.reads = []
+        self.acked = []
+        self.closed = False
+
+    async def xread(self, streams, count=None, block=None):
+        self.reads.append(dict(streams))
+        if self.messages:
+            batch, self.messages = self.messages, []
+            return [("flows", batch)]
+        self.stop_event.set()
+        return []
+
+    async def xack(self, name, group, *ids):
+        self.acked.extend(ids)
+
+    async def aclose(self):
+        self.closed = True
+
+
+def test_async_consumer_processes_batch_and_stops(monkeypatch, threshold_model, identity_scaler):
+    async def scenario():
+        stop = asyncio.Event()
+        messages = [
+            ("1-0", {"flow": json.dumps({"Destination Port": 80})}),
+            ("2-0", {"flow": json.dumps({"Destination Port": 3306})}),
+            ("3-0", {"flow": "{broken"}),
+        ]
+        fake = FakeAsyncRedis(messages, stop)
+
+        async def connect(*args, **kwargs):
+            return fake
+
+        monkeypatch.setattr(async_stream, "connect_redis_async", connect)
+        stats = await async_stream.run_consumer_async(
+            threshold_model(), identity_scaler, ["Destination Port"], stop, ReasoningEngine(), stream_name="flows"
+        )
+        return fake, stats
+
+    fake, stats = asyncio.run(scenario())
+
+    assert stats.flow_count == 2
+    assert stats.alert_count == 1
+    assert stats.errors_count == 1
+    assert fake.reads == [{"flows": "0-0"}, {"flows": "3-0"}]
+    assert fake.acked == []
+    assert fake.closed
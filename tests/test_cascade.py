@@ -0,0 +1,99 @@
+"""Test suite for the cascaded first-stage detector."""
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.preprocessing import StandardScaler
+
+from rapids.detection.anomaly_model import train_isolation_forest
+from rapids.detection.array_forest import ArrayIsolationForest
+from rapids.detection.artifact import load_artifact, save_artifact
+from rapids.detection.cascade import CascadeIsolationForest
+from rapids.evaluation.benchmarking import compare_cascade
+from rapids.streaming.retrain import fit_detector
+
+COLUMNS = ["a", "b", "c", "d", "e"]
+
+
+@pytest.fixture
+def flows():
+    rng = np.random.default_rng(0)
+    raw = np.vstack([rng.lognormal(3, 1, size=(1800, 5)), rng.lognormal(5, 1.5, size=(200, 5))])
+    labels = np.array(["BENIGN"] * 1800 + ["DDoS"] * 200, dtype=object)
+    scaler = StandardScaler().fit(raw)
+    model = train_isolation_forest(scaler.transform(raw), contamination=0.1)
+    return raw, labels, scaler, model
+
+
+def test_uncleared_flows_get_exact_full_scores(flows):
+    raw, _, scaler, model = flows
+    X = scaler.transform(raw)
+    forest = ArrayIsolationForest.from_sklearn(model)
+    cascade = CascadeIsolationForest.calibrate(forest, X, first_trees=10, max_miss=0.02)
+
+    scores = cascade.decision_function(X)
+    full = forest.decision_function(X)
+    _, estimate = cascade.first_stage(X)
+    cleared = estimate > cascade.margin
+    assert cascade.margin >= 0 and 0.5 < cleared.mean() < 1.0
+    np.testing.assert_allclose(scores[~cleared], full[~cleared], rtol=0, atol=1e-12)
+    assert (scores[cleared] > 0).all()
+
+    flagged = full < 0
+    missed = (cascade.predict(X) == 1) & flagged
+    assert missed.sum() <= 0.02 * flagged.sum() + 1
+    assert cascade.calibration["missed_fraction"] == pytest.approx(missed.sum() / flagged.sum())
+
+
+def test_cascade_over_fused_forest_matches(flows):
+    raw, _, scaler, model = flows
+    forest = ArrayIsolationForest.from_sklearn(model)
+    cascade = CascadeIsolationForest.calibrate(forest, scaler.transform(raw))
+    fused = CascadeIsolationForest(forest.fuse_scaler(scaler), **cascade.params)
+
+    assert fused.raw_input
+    assert np.array_equal(fused.predict(raw), cascade.predict(scaler.transform(raw)))
+
+
+def test_artifact_loads_cascade(tmp_path, flows):
+    raw, _, scaler, model = flows
+    cascade = CascadeIsolationForest.calibrate(ArrayIsolationForest.from_sklearn(model), scaler.transform(raw))
+    save_artifact(tmp_path, model, scaler, COLUMNS, cascade=cascade.params)
+
+    loaded = load_artifact(tmp_path).model
+    assert isinstance(loaded, CascadeIsolationForest) and loaded.margin == cascade.margin
+    clone = pickle.loads(pickle.dumps(loaded))
+    assert isinstance(clone.forest.value, np.memmap)
+    X = scaler.transform(raw)
+    assert np.array_equal(clone.predict(X), cascade.predict(X))
+    assert not isinstance(load_artifact(tmp_path, scorer="sklearn").model, CascadeIsolationForest)
+
+
+def test_retrained_detector_keeps_cascade(flows):
+    raw, _, _, _ = flows
+    model, scaler = fit_detector(raw, contamination=0.1, fuse_scaler=True, cascade_trees=5)
+    assert isinstance(model, CascadeIsolationForest) and model.raw_input and scaler is None
+    assert model.first_trees == 5
+
+
+def test_benchmark_reports_recall_loss_and_speedup(flows):
+    raw, labels, scaler, model = flows
+    report = compare_cascade(model, scaler, pd.DataFrame(raw, columns=COLUMNS), labels, batch_size=100)
+
+    assert report["holdout_rows"] == 600 and report["cleared_fraction"] > 0.5
+    assert report["recall_loss"] == pytest.approx(report["recall_full"] - report["recall_cascade"])
+    assert report["recall_loss"] <= 0.05
+    assert report["benign"]["cascade"]["total_flows"] < report["all"]["cascade"]["total_flows"]
+    assert report["all_speedup"] > 0 and report["benign_speedup"] > 0
+
+
+def test_rejects_bad_settings(flows):
+    _, _, _, model = flows
+    forest = ArrayIsolationForest.from_sklearn(model)
+    with pytest.raises(ValueError, match="first_trees"):
+        CascadeIsolationForest(forest, first_trees=forest.n_trees)
+    with pytest.raises(ValueError, match="margin"):
+        CascadeIsolationForest(forest, margin=-0.1)
+    with pytest.raises(ValueError, match="max_miss"):
+        CascadeIsolationForest.calibrate(forest, np.zeros((10, 5)), max_miss=1.0)
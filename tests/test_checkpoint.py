@@ -0,0 +1,61 @@
+"""Test suite for stream offset checkpointing."""
+import pytest
+
+from rapids.streaming.checkpoint import FileCheckpoint, RedisCheckpoint, open_checkpoint
+from rapids.streaming.consumer import StreamReader
+
+
+class StubRedis:
+    def __init__(self, newest=None):
+        self.values = {}
+        self.newest = newest
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value):
+        self.values[key] = value
+
+    def xrevrange(self, name, count=None):
+        return [(self.newest, {})] if self.newest else []
+
+
+def test_file_checkpoint_round_trip(tmp_path):
+    checkpoint = FileCheckpoint(str(tmp_path / "state" / "flows.checkpoint"))
+    assert checkpoint.load() is None
+    checkpoint.save("42-0")
+    assert FileCheckpoint(str(tmp_path / "state" / "flows.checkpoint")).load() == "42-0"
+
+
+def test_open_checkpoint_defaults():
+    r = StubRedis()
+    assert open_checkpoint("none", r, "flows") is None
+    assert isinstance(open_checkpoint("redis", r, "flows"), RedisCheckpoint)
+    with pytest.raises(ValueError):
+        open_checkpoint("s3", r, "flows")
+
+
+def test_reader_resumes_from_checkpoint():
+    r = StubRedis(newest="99-0")
+    checkpoint = RedisCheckpoint(r, "flows:checkpoint")
+    checkpoint.save("7-0")
+
+    reader = StreamReader(r, "flows", checkpoint=checkpoint, start_from="latest")
+    assert reader.last_id == "7-0"
+
+
+def test_reader_starts_at_latest_without_checkpoint():
+    reader = StreamReader(StubRedis(newest="99-0"), "flows", start_from="latest")
+    assert reader.last_id == "99-0"
+
+
+def test_reader_saves_checkpoint_on_interval():
+    r = StubRedis()
+    checkpoint = RedisCheckpoint(r, "flows:checkpoint")
+    reader = StreamReader(r, "flows", checkpoint=checkpoint, checkpoint_interval_sec=3600)
+
+    reader.ack(["1-0", "2-0"])
+    assert checkpoint.load() is None
+
+    reader.save_checkpoint()
+    assert checkpoint.load() == "2-0"
@@ -0,0 +1,70 @@
+"""Test suite for the stream consumer."""
+import json
+import pytest
+import redis
+
+from rapids.reasoning.engine import ReasoningEngine
+from rapids.streaming.consumer import ConsumerStats, ensure_consumer_group, process_messages
+from rapids.streaming.decoder import FlowDecoder
+
+
+FEATURES = ["Destination Port", "Flow Duration"]
+
+
+def _message(msg_id, flow):
+    return msg_id, {"flow": json.dumps(flow)}
+
+
+def test_process_messages_counts_flows_and_alerts(threshold_model, identity_scaler):
+    stats = ConsumerStats()
+    messages = [
+        _message("1-0", {"Destination Port": 80, "Flow Duration": 10}),
+        _message("2-0", {"Destination Port": 3306, "Flow Duration": 20}),
+    ]
+    process_messages(messages, threshold_model(), identity_scaler, FlowDecoder(FEATURES), ReasoningEngine(), stats)
+
+    assert stats.flow_count == 2
+    assert stats.alert_count == 1
+    assert stats.errors_count == 0
+
+
+def test_process_messages_counts_malformed_rows(threshold_model, identity_scaler):
+    stats = ConsumerStats()
+    messages = [
+        ("1-0", {"other": "x"}),
+        ("2-0", {"flow": "{not json"}),
+        _message("3-0", {"Destination Port": 80}),
+        _message("4-0", {"Destination Port": 80, "Flow Duration": 10}),
+    ]
+    process_messages(messages, threshold_model(), identity_scaler, FlowDecoder(FEATURES), ReasoningEngine(), stats)
+
+    assert stats.flow_count == 1
+    assert stats.errors_count == 3
+
+
+class GroupRecorder:
+    def __init__(self, error=None):
+        self.error = error
+        self.calls = []
+
+    def xgroup_create(self, name, groupname, id="$", mkstream=False):
+        self.calls.append((name, groupname, id, mkstream))
+        if self.error:
+            raise self.error
+
+
+def test_ensure_consumer_group_creates_stream():
+    r = GroupRecorder()
+    ensure_consumer_group(r, "flows", "rapids")
+    assert r.calls == [("flows", "rapids", "0", True)]
+
+
+def test_ensure_consumer_group_ignores_existing_group():
+    r = GroupRecorder(redis.ResponseError("BUSYGROUP Consumer Group name already exists"))
+    ensure_consumer_group(r, "flows", "rapids")
+
+
+def test_ensure_consumer_group_raises_other_errors():
+    r = GroupRecorder(redis.ResponseError("WRONGTYPE"))
+    with pytest.raises(redis.ResponseError):
+        ensure_consumer_group(r, "flows", "rapids")
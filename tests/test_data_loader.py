@@ -0,0 +1,87 @@
+"""Test suite for the chunked flow data loader."""
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.preprocessing import StandardScaler
+
+from rapids.detection.data_loader import load_and_preprocess, load_features
+
+
+@pytest.fixture
+def flows_csv(tmp_path):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(
+        {
+            " Destination Port": rng.integers(1, 65535, size=50),
+            " Flow Duration": rng.lognormal(8, 2, size=50),
+            "Flow Bytes/s": rng.lognormal(5, 3, size=50),
+            " Label": np.where(rng.random(50) < 0.3, "DDoS", "BENIGN"),
+        }
+    )
+    df.loc[[3, 17], "Flow Bytes/s"] = np.inf
+    df.loc[[8, 30], " Flow Duration"] = np.nan
+    df.loc[41, " Label"] = None
+    path = tmp_path / "flows.csv"
+    df.to_csv(path, index=False)
+    return path
+
+
+def _reference(path):
+    df = pd.read_csv(path).replace([np.inf, -np.inf], np.nan).dropna()
+    raw = df.drop(columns=[" Label"]).to_numpy(dtype=np.float32)
+    return raw, df[" Label"].to_numpy()
+
+
+@pytest.mark.parametrize("chunk_rows", [7, 50, 1000])
+def test_matches_whole_frame_preprocessing(flows_csv, chunk_rows):
+    raw, expected_labels = _reference(flows_csv)
+
+    features, labels, scaler, columns = load_features(flows_csv, chunk_rows=chunk_rows)
+
+    assert columns == [" Destination Port", " Flow Duration", "Flow Bytes/s"]
+    assert features.dtype == np.float32 and features.shape == (45, 3)
+    assert list(labels) == list(expected_labels)
+    reference = StandardScaler().fit(raw.astype(np.float64))
+    np.testing.assert_allclose(scaler.mean_, reference.mean_, rtol=1e-6)
+    np.testing.assert_allclose(scaler.scale_, reference.scale_, rtol=1e-6)
+    np.testing.assert_allclose(features, reference.transform(raw), atol=1e-5)
+
+
+def test_unscaled_features_and_shared_label_strings(flows_csv):
+    raw, _ = _reference(flows_csv)
+    features, labels, _, _ = load_features(flows_csv, chunk_rows=10, scale=False)
+
+    np.testing.assert_array_equal(features, raw)
+    assert len({id(label) for label in labels}) == 2
+
+
+def test_stray_text_in_later_chunk_drops_row(tmp_path):
+    path = tmp_path / "flows.csv"
+    path.write_text("a,b\n" + "".join(f"{i},{i * 2}\n" for i in range(10)) + "x,1\n")
+
+    features, labels, _, columns = load_features(path, chunk_rows=4, scale=False)
+
+    assert labels is None and columns == ["a", "b"]
+    np.testing.assert_array_equal(features[:, 0], np.arange(10))
+
+
+def test_load_and_preprocess_returns_scaled_features_and_labels(flows_csv):
+    features, labels = load_and_preprocess(flows_csv)
+    assert features.shape == (45, 3)
+    np.testing.assert_allclose(features.mean(axis=0), 0.0, atol=1e-5)
+    assert set(labels) == {"BENIGN", "DDoS"}
+
+
+def test_rejects_missing_or_unusable_files(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        load_features(tmp_path / "missing.csv")
+
+    text = tmp_path / "text.csv"
+    text.write_text("host,Label\na,BENIGN\n")
+    with pytest.raises(ValueError, match="numeric"):
+        load_features(text)
+
+    empty = tmp_path / "empty.csv"
+    empty.write_text("a,b\ninf,1\n")
+    with pytest.raises(ValueError, match="No valid data"):
+        load_features(empty)
@@ -0,0 +1,113 @@
+"""Test suite for the shared dataset cache."""
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from rapids.detection.data_loader import load_features
+from rapids.detection.dataset_cache import CachedDataset, open_dataset
+from rapids.evaluation.benchmarking import load_dataset
+from rapids.streaming import producer
+
+
+@pytest.fixture
+def flows_csv(tmp_path):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(
+        {
+            " Destination Port": rng.integers(1, 65535, size=60),
+            " Flow Duration": rng.lognormal(8, 2, size=60),
+            "Flow Bytes/s": rng.lognormal(5, 3, size=60),
+            " Label": np.where(rng.random(60) < 0.3, "DDoS", "BENIGN"),
+        }
+    )
+    df.loc[[3, 17], "Flow Bytes/s"] = np.inf
+    df.loc[[8, 30], " Flow Duration"] = np.nan
+    path = tmp_path / "flows.csv"
+    df.to_csv(path, index=False)
+    return path
+
+
+@pytest.fixture
+def no_csv_parsing(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("CSV parsed despite a cache entry")
+
+    return lambda: monkeypatch.setattr(pd, "read_csv", fail)
+
+
+def test_load_features_matches_csv_and_reuses_entry(flows_csv, tmp_path, no_csv_parsing):
+    cache_dir = tmp_path / "cache"
+    expected = load_features(flows_csv, chunk_rows=7)
+    first = load_features(flows_csv, chunk_rows=7, cache_dir=cache_dir)
+
+    no_csv_parsing()
+    for features, labels, scaler, columns in (first, load_features(flows_csv, cache_dir=cache_dir)):
+        assert features.dtype == np.float32 and columns == expected[3]
+        np.testing.assert_allclose(features, expected[0], atol=1e-5)
+        assert list(labels) == list(expected[1])
+        np.testing.assert_allclose(scaler.mean_, expected[2].mean_, rtol=1e-6)
+        np.testing.assert_allclose(scaler.scale_, expected[2].scale_, rtol=1e-6)
+    assert len([p for p in cache_dir.iterdir() if p.is_dir()]) == 1
+
+
+def test_entry_follows_content_not_timestamps(flows_csv, tmp_path):
+    cache_dir = tmp_path / "cache"
+    dataset = open_dataset(flows_csv, cache_dir)
+    assert len(dataset) == 56 and isinstance(dataset.features, np.memmap)
+
+    os.utime(flows_csv, ns=(0, 0))
+    assert open_dataset(flows_csv, cache_dir).path == dataset.path
+
+    with open(flows_csv, "a") as f:
+        f.write("80,1.0,2.0,BENIGN\n")
+    edited = open_dataset(flows_csv, cache_dir)
+    assert edited.path != dataset.path and len(edited) == 57
+
+
+def test_producer_reads_cache_like_csv(flows_csv, tmp_path, no_csv_parsing):
+    cache_dir = tmp_path / "cache"
+    expected = producer.load_flows(flows_csv)
+    open_dataset(flows_csv, cache_dir)
+    no_csv_parsing()
+
+    chunks = list(producer.iter_flows(flows_csv, chunk_rows=10, cache_dir=cache_dir))
+    assert [len(c) for c in chunks] == [10, 10, 10, 10, 10, 6]
+    cached = pd.concat(chunks, ignore_index=True)
+    pd.testing.assert_frame_equal(cached, expected.reset_index(drop=True))
+    assert cached[" Destination Port"].dtype == np.int64
+
+    shards = [pd.concat(producer.iter_flows(flows_csv, 7, shard=i, shards=3, cache_dir=cache_dir)) for i in range(3)]
+    pd.testing.assert_frame_equal(pd.concat(shards, ignore_index=True), cached)
+    assert len(producer.load_flows(flows_csv, max_rows=5, cache_dir=cache_dir)) == 5
+
+
+def test_benchmark_dataset_from_cache(flows_csv, tmp_path):
+    expected, expected_labels = load_dataset(flows_csv)
+    df, labels = load_dataset(flows_csv, cache_dir=tmp_path / "cache")
+
+    pd.testing.assert_frame_equal(df, expected, check_dtype=False)
+    assert list(labels) == list(expected_labels)
+    assert len(load_dataset(flows_csv, max_rows=20, cache_dir=tmp_path / "cache")[0]) == 20
+
+
+def test_dataset_pickles_as_its_path(flows_csv, tmp_path):
+    dataset = open_dataset(flows_csv, tmp_path / "cache")
+    payload = pickle.dumps(dataset)
+    assert len(payload) < 1000
+    clone = pickle.loads(payload)
+    assert isinstance(clone, CachedDataset)
+    np.testing.assert_array_equal(clone.features, dataset.features)
+
+
+def test_rejects_missing_or_unusable_files(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        open_dataset(tmp_path / "missing.csv", tmp_path / "cache")
+
+    empty = tmp_path / "empty.csv"
+    empty.write_text("a,b\ninf,1\n")
+    with pytest.raises(ValueError, match="No valid data"):
+        open_dataset(empty, tmp_path / "cache")
+    assert not [p for p in (tmp_path / "cache").iterdir() if p.is_dir()]
@@ -0,0 +1,72 @@
+"""Test suite for the schema-compiled flow decoder."""
+import json
+import numpy as np
+from sklearn.preprocessing import MinMaxScaler, StandardScaler
+
+from rapids.streaming.consumer import ConsumerStats
+from rapids.streaming.decoder import FlowDecoder, scale_in_place
+
+
+def _messages(flows):
+    return [(f"{i}-0", {"flow": json.dumps(flow)}) for i, flow in enumerate(flows)]
+
+
+def test_decoder_writes_features_in_column_order():
+    decoder = FlowDecoder(["b", "a"], capacity=4)
+    stats = ConsumerStats()
+    ids, flows, features = decoder.decode(_messages([{"a": 1, "b": 2}, {"a": 3, "b": 4, "c": 5}]), stats)
+
+    assert ids == ["0-0", "1-0"]
+    assert flows[1]["c"] == 5
+    np.testing.assert_array_equal(features, [[2.0, 1.0], [4.0, 3.0]])
+
+
+def test_decoder_reuses_buffer_between_batches():
+    decoder = FlowDecoder(["a"], capacity=4)
+    stats = ConsumerStats()
+    _, _, first = decoder.decode(_messages([{"a": 1}, {"a": 2}]), stats)
+    _, _, second = decoder.decode(_messages([{"a": 3}]), stats)
+
+    assert np.shares_memory(first, second)
+    assert decoder.capacity == 4
+
+
+def test_decoder_counts_malformed_rows():
+    decoder = FlowDecoder(["a", "b"], capacity=2)
+    stats = ConsumerStats()
+    messages = [
+        ("1-0", {"other": "x"}),
+        ("2-0", {"flow": "{broken"}),
+        ("3-0", {"flow": json.dumps({"a": 1})}),
+        ("4-0", {"flow": json.dumps({"a": "x", "b": 2})}),
+        ("5-0", {"flow": json.dumps({"a": 1, "b": 2})}),
+    ]
+    ids, _, features = decoder.decode(messages, stats)
+
+    assert ids == ["5-0"]
+    np.testing.assert_array_equal(features, [[1.0, 2.0]])
+    assert stats.errors_count == 4
+
+
+def test_scale_in_place_matches_standard_scaler():
+    data = np.random.RandomState(0).normal(size=(50, 3)) * [1.0, 10.0, 0.0]
+    scaler = StandardScaler().fit(data)
+    batch = data[:10].copy()
+    expected = scaler.transform(batch)
+
+    result = scale_in_place(scaler, batch)
+
+    assert result is batch
+    np.testing.assert_allclose(result, expected)
+
+
+def test_scale_in_place_falls_back_for_other_scalers():
+    data = np.arange(12, dtype=float).reshape(4, 3)
+    scaler = MinMaxScaler().fit(data)
+    np.testing.assert_allclose(scale_in_place(scaler, data.copy()), scaler.transform(data))
+
+
+def test_scale_in_place_passes_raw_features_without_scaler():
+    data = np.arange(12, dtype=float).reshape(4, 3)
+    assert scale_in_place(None, data) is data
+    np.testing.assert_array_equal(data, np.arange(12, dtype=float).reshape(4, 3))
@@ -0,0 +1,98 @@
+"""Test suite for deploying a reduced feature set."""
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.preprocessing import StandardScaler
+
+from rapids.detection.artifact import load_artifact
+from rapids.evaluation.feature_analysis import (
+    feature_impact_experiment,
+    save_reduced_model,
+    select_feature_subset,
+    subset_scaler,
+)
+from rapids.reasoning.engine import ReasoningEngine
+from rapids.streaming import producer
+from rapids.streaming.transport import run_replay
+
+
+@pytest.fixture
+def flows_csv(tmp_path):
+    rng = np.random.default_rng(0)
+    attack = rng.random(600) < 0.2
+    df = pd.DataFrame({f"Noise {i}": rng.normal(size=600) for i in range(6)})
+    df.insert(0, " Destination Port", rng.choice([80, 443, 3306], size=600))
+    df["Flow Bytes/s"] = np.where(attack, rng.lognormal(9, 0.5, size=600), rng.lognormal(3, 0.5, size=600))
+    df["Flow Packets/s"] = np.where(attack, rng.lognormal(8, 0.5, size=600), rng.lognormal(2, 0.5, size=600))
+    df[" Label"] = np.where(attack, "DDoS", "BENIGN")
+    path = tmp_path / "flows.csv"
+    df.to_csv(path, index=False)
+    return path
+
+
+def _result(count, f1):
+    return {"feature_count": count, "f1_score": f1, "feature_indices": list(range(count))}
+
+
+def test_selects_smallest_subset_within_tolerance():
+    results = [_result(2, 0.80), _result(4, 0.895), _result(8, 0.90), _result(9, 0.91)]
+
+    assert select_feature_subset(results, tolerance=0.02)["feature_count"] == 4
+    assert select_feature_subset(results, tolerance=0.2)["feature_count"] == 2
+    assert select_feature_subset(results, tolerance=0.0)["feature_count"] == 9
+    with pytest.raises(ValueError, match="No feature impact"):
+        select_feature_subset([])
+    with pytest.raises(ValueError, match="tolerance"):
+        select_feature_subset(results, tolerance=-0.1)
+
+
+def test_reduced_artifact_scores_only_the_subset(flows_csv, tmp_path):
+    df = pd.read_csv(flows_csv)
+    labels = df.pop(" Label").to_numpy()
+    columns = df.columns.tolist()
+    scaler = StandardScaler().fit(df.to_numpy())
+    features = scaler.transform(df.to_numpy())
+
+    results = feature_impact_experiment(features, labels, [2, 4, 100])
+    assert [r["feature_count"] for r in results] == [2, 4, 9]
+    selected = select_feature_subset(results, tolerance=0.05)
+    assert selected["feature_count"] < 9
+    assert {columns[i] for i in selected["feature_indices"][:2]} == {"Flow Bytes/s", "Flow Packets/s"}
+
+    path = save_reduced_model(tmp_path / "models", features, scaler, columns, selected, contamination=0.2)
+    artifact = load_artifact(tmp_path / "models")
+    subset = [columns[i] for i in selected["feature_indices"]]
+    assert artifact.path == path and artifact.feature_columns == subset
+    assert artifact.manifest["metadata"]["feature_selection"]["of_features"] == 9
+
+    np.testing.assert_allclose(
+        artifact.scaler.transform(df[subset].to_numpy()), features[:, selected["feature_indices"]]
+    )
+    preds = artifact.model.predict(artifact.scaler.transform(df[subset].to_numpy()))
+    recall = ((preds == -1) & (labels != "BENIGN")).sum() / (labels != "BENIGN").sum()
+    assert recall > 0.9
+
+
+def test_subset_scaler_matches_full_scaler_columns():
+    raw = np.random.default_rng(1).lognormal(size=(50, 5))
+    scaler = StandardScaler().fit(raw)
+    subset = subset_scaler(scaler, [3, 0])
+    np.testing.assert_allclose(subset.transform(raw[:, [3, 0]]), scaler.transform(raw)[:, [3, 0]])
+
+
+def test_producers_send_only_requested_columns(flows_csv, tmp_path, threshold_model, identity_scaler):
+    columns = ["Flow Bytes/s", " Destination Port"]
+    expected = producer.load_flows(flows_csv)[columns].reset_index(drop=True)
+
+    for cache_dir in (None, tmp_path / "cache"):
+        chunks = list(producer.iter_flows(flows_csv, chunk_rows=250, cache_dir=cache_dir, columns=columns))
+        pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), expected)
+        assert producer.load_flows(flows_csv, cache_dir=cache_dir, columns=columns).columns.tolist() == columns
+    with pytest.raises(KeyError):
+        producer.load_flows(flows_csv, cache_dir=tmp_path / "cache", columns=["Missing"])
+
+    stats = run_replay(
+        str(flows_csv), threshold_model(1000), identity_scaler, columns[:1], ReasoningEngine(), columns=columns
+    )
+    assert stats.flow_count == 600 and stats.errors_count == 0
+    assert stats.alert_count == int((expected["Flow Bytes/s"] > 1000).sum())
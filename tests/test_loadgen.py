@@ -0,0 +1,99 @@
+"""Test suite for the load generator."""
+import json
+import time
+
+import pytest
+
+from rapids.streaming import loadgen
+from rapids.streaming.loadgen import (
+    BurstPhase,
+    DiurnalPhase,
+    RampPhase,
+    RateProfile,
+    ReplayProfile,
+    StepPhase,
+    parse_profile,
+    run_load,
+)
+
+
+def test_phase_counts_integrate_rates():
+    assert RampPhase(100, 300, 10).count(10) == pytest.approx(2000)
+    assert StepPhase([100, 200, 400], 2).count(5) == pytest.approx(200 + 400 + 400)
+    burst = BurstPhase(base_fps=100, burst_fps=1000, period_sec=10, burst_sec=1, duration_sec=30)
+    assert burst.count(10) == pytest.approx(1900)
+    assert burst.count(10.5) == pytest.approx(2400)
+    diurnal = DiurnalPhase(mean_fps=500, amplitude_fps=400, period_sec=60, duration_sec=60)
+    assert diurnal.rate(0) == pytest.approx(100)
+    assert diurnal.rate(30) == pytest.approx(900)
+    assert diurnal.count(60) == pytest.approx(30000)
+
+
+def test_profile_plays_phases_back_to_back():
+    profile = parse_profile(
+        [
+            {"type": "constant", "fps": 100, "duration_sec": 5},
+            {"type": "ramp", "start_fps": 100, "end_fps": 200, "duration_sec": 10},
+        ]
+    )
+    assert isinstance(profile, RateProfile)
+    assert profile.duration_sec == 15
+    assert profile.rate(6) == pytest.approx(110)
+    assert profile.count(15) == pytest.approx(500 + 1500)
+    assert profile.count(100) == profile.count(15)
+
+
+def test_parse_profile_rejects_bad_specs():
+    with pytest.raises(ValueError, match="Unknown load phase"):
+        parse_profile({"type": "sawtooth"})
+    with pytest.raises(ValueError, match="Bad parameters"):
+        parse_profile({"type": "ramp", "start_fps": 1})
+    with pytest.raises(ValueError, match="cannot be combined"):
+        parse_profile([{"type": "replay"}, {"type": "constant", "fps": 1, "duration_sec": 1}])
+    assert isinstance(parse_profile({"type": "replay", "speed": 60}), ReplayProfile)
+
+
+def test_constant_load_loops_the_file_and_reports(monkeypatch, write_flows_csv, recording_redis):
+    path = write_flows_csv()
+    r = recording_redis()
+    monkeypatch.setattr(loadgen, "connect_redis", lambda *args: r)
+
+    profile = parse_profile({"type": "constant", "fps": 200, "duration_sec": 0.5})
+    report = run_load(path, profile, stream_name="s", report_interval_sec=0.1)
+
+    assert report.target == 100
+    assert report.sent == 100
+    assert len(r.entries) == 100
+    ports = [json.loads(f["flow"])[" Destination Port"] for _, f in r.entries]
+    assert ports[:20] == list(range(80, 90)) * 2
+    assert len(report.samples) >= 4
+    assert report.achieved_fps == pytest.approx(200, rel=0.05)
+
+
+def test_load_is_open_loop_when_sends_are_slow(monkeypatch, write_flows_csv, recording_redis):
+    path = write_flows_csv()
+    r = recording_redis(execute_sec=0.05)
+    monkeypatch.setattr(loadgen, "connect_redis", lambda *args: r)
+
+    profile = parse_profile({"type": "constant", "fps": 2000, "duration_sec": 0.3})
+    report = run_load(path, profile, stream_name="s")
+
+    # Each slow round trip carries everything that fell due meanwhile
+    assert report.sent == report.target == 600
+    assert r.round_trips < 15
+    assert report.max_behind >= 50
+
+
+def test_replay_follows_capture_times(monkeypatch, write_flows_csv, recording_redis):
+    path = write_flows_csv(rows=5, timestamps=[1000.0, 1000.0, 1001.0, 1000.5, 1002.0])
+    r = recording_redis()
+    monkeypatch.setattr(loadgen, "connect_redis", lambda *args: r)
+
+    start = time.perf_counter()
+    report = run_load(path, parse_profile({"type": "replay", "speed": 10}), stream_name="s", chunk_rows=2)
+
+    assert report.sent == 5
+    assert time.perf_counter() - start >= 0.2
+    flows = [json.loads(f["flow"]) for _, f in r.entries]
+    assert [flow[" Destination Port"] for flow in flows] == [80, 81, 82, 83, 84]
+    assert " Timestamp" not in flows[0]
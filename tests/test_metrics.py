@@ -0,0 +1,107 @@
+"""Test suite for consumer metrics and the Prometheus endpoint."""
+import json
+import logging
+import urllib.request
+
+from rapids.reasoning.engine import ReasoningEngine
+from rapids.streaming.consumer import ConsumerStats, process_messages
+from rapids.streaming.decoder import FlowDecoder
+from rapids.streaming.metrics import Histogram, MetricsServer, render_metrics, stream_lag
+
+
+class XinfoRedis:
+    def xinfo_stream(self, name):
+        return {"length": 40, "last-generated-id": "5000-0"}
+
+    def xinfo_groups(self, name):
+        return [{"name": "rapids", "pending": 3, "lag": 12, "last-delivered-id": "2000-1"}]
+
+
+class FakeReader:
+    def __init__(self, group_name=None):
+        self.r = XinfoRedis()
+        self.stream_name = "flows"
+        self.group_name = group_name
+        self.last_id = "4500-0"
+
+
+def _messages(ports, start=1):
+    return [
+        (f"{start + i}-0", {"flow": json.dumps({"Destination Port": port, "Flow Duration": 1})})
+        for i, port in enumerate(ports)
+    ]
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram(buckets=(0.01, 0.1))
+    for value in (0.005, 0.01, 0.05, 2.0):
+        histogram.observe(value)
+
+    assert histogram.cumulative() == [2, 3, 4]
+    assert histogram.count == 4
+    assert abs(histogram.sum - 2.065) < 1e-9
+
+
+def test_stages_are_recorded_once_per_batch(threshold_model, identity_scaler):
+    stats = ConsumerStats()
+    process_messages(
+        _messages([80, 3306, 443]),
+        threshold_model(),
+        identity_scaler,
+        FlowDecoder(["Destination Port", "Flow Duration"]),
+        ReasoningEngine(),
+        stats,
+    )
+
+    counts = {stage: h.count for stage, h in stats.stages.histograms.items()}
+    assert counts == {"decode": 1, "scale": 1, "predict": 1, "observe_flow": 1, "handle_anomaly": 1}
+
+
+def test_stats_line_logged_when_batch_crosses_multiple_of_500(caplog, threshold_model, identity_scaler):
+    stats = ConsumerStats()
+    decoder = FlowDecoder(["Destination Port", "Flow Duration"])
+    engine = ReasoningEngine()
+    with caplog.at_level(logging.INFO, logger="rapids.streaming.consumer"):
+        for batch in range(3):
+            messages = _messages([80] * 200, start=batch * 200 + 1)
+            process_messages(messages, threshold_model(), identity_scaler, decoder, engine, stats)
+
+    assert stats.flow_count == 600
+    assert sum("[STATS]" in record.message for record in caplog.records) == 1
+
+
+def test_stream_lag_for_reader_and_group():
+    assert stream_lag(FakeReader()) == {"length": 40, "seconds": 0.5}
+    assert stream_lag(FakeReader("rapids")) == {"length": 40, "pending": 3, "entries": 12, "seconds": 3.0}
+
+
+def test_render_metrics_prometheus_text():
+    stats = ConsumerStats()
+    stats.flow_count = 7
+    stats.stages.observe("decode", 0.002)
+    text = render_metrics(stats, FakeReader("rapids"), lambda: {"detect": 1, "reason": 0})
+
+    assert "rapids_flows_total 7" in text
+    assert 'rapids_stage_seconds_bucket{stage="decode",le="0.0025"} 1' in text
+    assert 'rapids_stage_seconds_bucket{stage="decode",le="+Inf"} 1' in text
+    assert 'rapids_stage_seconds_count{stage="predict"} 0' in text
+    assert 'rapids_queue_depth{stage="detect"} 1' in text
+    assert 'rapids_stream_lag_entries{stream="flows"} 12' in text
+    assert "rapids_overload_level 0" in text
+    assert 'rapids_shed_total{mode="reasoning"} 0' in text
+
+
+def test_metrics_server_serves_endpoint():
+    stats = ConsumerStats()
+    stats.alert_count = 2
+    server = MetricsServer(stats, port=0)
+    server.start()
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{server.port}/metrics", timeout=5) as response:
+            body = response.read().decode()
+            content_type = response.headers["Content-Type"]
+    finally:
+        server.stop()
+
+    assert content_type.startswith("text/plain; version=0.0.4")
+    assert "rapids_alerts_total 2" in body
@@ -0,0 +1,131 @@
+"""Test suite for lag-driven overload degradation."""
+import json
+import time
+
+import numpy as np
+import pytest
+
+from rapids.reasoning.engine import ReasoningEngine
+from rapids.streaming.consumer import ConsumerStats, process_messages, reason
+from rapids.streaming.decoder import FlowDecoder
+from rapids.streaming.overload import OverloadGuard
+
+FEATURES = ["Destination Port", "Flow Duration"]
+
+
+class ScoredModel:
+    """Scores flows by their first feature: above 100 is anomalous, above 1000 strongly so."""
+
+    def predict(self, features):
+        return np.where(self.decision_function(features) < 0, -1, 1)
+
+    def decision_function(self, features):
+        return np.where(features[:, 0] > 1000, -0.2, np.where(features[:, 0] > 100, -0.01, 0.1))
+
+
+class CountingEngine(ReasoningEngine):
+    def __init__(self):
+        super().__init__()
+        self.observed = 0
+        self.single = 0
+        self.grouped = []
+
+    def observe_flow(self, flow):
+        self.observed += 1
+        return super().observe_flow(flow)
+
+    def handle_anomaly(self, src, dst, flow, severity=0.15):
+        self.single += 1
+        return super().handle_anomaly(src, dst, flow, severity)
+
+    def handle_anomalies(self, anomalies, severity=0.15):
+        self.grouped.append(len(anomalies))
+        return super().handle_anomalies(anomalies, severity)
+
+
+def _id(age_sec, seq=0):
+    return f"{int(time.time() * 1000 - age_sec * 1000)}-{seq}"
+
+
+def _messages(ports, age_sec=0.0):
+    return [
+        (_id(age_sec, i), {"flow": json.dumps({"Destination Port": port, "Flow Duration": 1})})
+        for i, port in enumerate(ports)
+    ]
+
+
+def test_guard_steps_up_and_recovers_with_hysteresis():
+    guard = OverloadGuard(lag_sec=(1.0, 2.0, 4.0), patience=2)
+    levels = [guard.observe(_id(5.0)) for _ in range(6)]
+    assert levels == [0, 1, 1, 2, 2, 3]
+    assert guard.observe(_id(5.0)) == 3
+
+    # Below the level-3 threshold but not below half of it: hold
+    assert [guard.observe(_id(2.5)) for _ in range(3)] == [3, 3, 3]
+    assert [guard.observe(_id(0.1)) for _ in range(6)] == [3, 2, 2, 1, 1, 0]
+    assert [t.level for t in guard.transitions] == [1, 2, 3, 2, 1, 0]
+
+
+def test_guard_rejects_bad_thresholds():
+    with pytest.raises(ValueError):
+        OverloadGuard(lag_sec=(5.0, 2.0, 8.0))
+    with pytest.raises(ValueError):
+        OverloadGuard(lag_sec=(1.0, 2.0))
+
+
+def test_level_one_skips_reasoning_for_weak_anomalies(identity_scaler):
+    guard = OverloadGuard(lag_sec=(1.0, 2.0, 4.0), patience=1)
+    guard.observe(_id(1.5))
+    engine = CountingEngine()
+    stats = ConsumerStats()
+
+    process_messages(
+        _messages([80, 443, 900, 5000], age_sec=1.5),
+        ScoredModel(),
+        identity_scaler,
+        FlowDecoder(FEATURES),
+        engine,
+        stats,
+        overload=guard,
+    )
+
+    assert stats.overload_level == 1
+    assert stats.alert_count == 3
+    assert stats.shed == {"reasoning": 2, "paths": 0, "observe": 0}
+    assert engine.single == 1
+    assert engine.observed == 4
+
+
+def test_top_level_shares_paths_and_samples_benign_flows():
+    guard = OverloadGuard(lag_sec=(1.0, 2.0, 4.0), patience=1, benign_sample_every=4)
+    for _ in range(3):
+        guard.observe(_id(10.0))
+    engine = CountingEngine()
+    stats = ConsumerStats()
+    ports = [80] * 8 + [5000, 6000, 7000]
+    ids = [_id(10.0, i) for i in range(len(ports))]
+    flows = [{"Destination Port": port, "Flow Duration": 1} for port in ports]
+    preds = np.array([1] * 8 + [-1] * 3)
+    scores = np.array([0.1] * 8 + [-0.2] * 3)
+
+    reason(ids, flows, preds, engine, stats, overload=guard, scores=scores)
+
+    assert stats.overload_level == 3
+    assert stats.shed == {"reasoning": 0, "paths": 3, "observe": 6}
+    assert engine.grouped == [3]
+    assert engine.single == 0
+    assert engine.observed == 2 + 3
+
+
+def test_consumer_recovers_full_reasoning_once_lag_drains(identity_scaler):
+    guard = OverloadGuard(lag_sec=(1.0, 2.0, 4.0), patience=1)
+    engine = CountingEngine()
+    stats = ConsumerStats()
+    decoder = FlowDecoder(FEATURES)
+
+    for age in (1.5, 1.5, 0.0):
+        process_messages(
+            _messages([5000], age_sec=age), ScoredModel(), identity_scaler, decoder, engine, stats, overload=guard
+        )
+    assert stats.overload_level == 0
+    assert engine.single == 3
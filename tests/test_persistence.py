@@ -0,0 +1,114 @@
+"""Test suite for attack graph snapshots and the write-ahead journal."""
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from rapids.reasoning.attack_graph import AttackGraph
+from rapids.reasoning.engine import ReasoningEngine
+from rapids.reasoning.persistence import GraphJournal, copy_graph, load_snapshot, save_snapshot
+
+T0 = datetime(2026, 1, 1, 12, 0, 0)
+
+
+def build_graph(graph, start=T0):
+    graph.record_flow("10.0.0.1", "10.0.0.2", now=start)
+    graph.record_flow("10.0.0.2", "10.0.0.3", now=start)
+    graph.set_role("10.0.0.1", "workstation")
+    graph.set_role("10.0.0.3", "database")
+    graph.add_anomaly("10.0.0.1", "10.0.0.2", severity=0.4, now=start + timedelta(minutes=5))
+    graph.add_anomaly("10.0.0.1", "10.0.0.2", severity=0.2, now=start + timedelta(minutes=6))
+    graph.propagate_risk()
+
+
+def assert_same_graph(a, b):
+    assert a.adj == b.adj
+    assert a.node_risk == b.node_risk
+    assert a.node_risk_timestamp == b.node_risk_timestamp
+    assert a.roles == b.roles
+    assert a.edge_risk == b.edge_risk
+    assert a.anomaly_evidence == b.anomaly_evidence
+
+
+def test_snapshot_round_trip(tmp_path):
+    graph = AttackGraph()
+    build_graph(graph)
+
+    save_snapshot(graph, str(tmp_path / "graph.npz"))
+    assert_same_graph(load_snapshot(str(tmp_path / "graph.npz")), graph)
+
+
+def test_empty_snapshot_round_trip(tmp_path):
+    save_snapshot(AttackGraph(), str(tmp_path / "graph.npz"))
+    assert_same_graph(load_snapshot(str(tmp_path / "graph.npz")), AttackGraph())
+
+
+def test_copy_graph_is_independent():
+    graph = AttackGraph()
+    build_graph(graph)
+    copy = copy_graph(graph)
+    graph.add_anomaly("10.0.0.1", "10.0.0.2", severity=0.1, now=T0 + timedelta(hours=1))
+    graph.record_flow("10.0.0.1", "10.0.0.7", now=T0)
+
+    assert "10.0.0.7" not in copy.adj["10.0.0.1"]
+    assert len(copy.anomaly_evidence[("10.0.0.1", "10.0.0.2")]) == 2
+
+
+def test_journal_replay_matches_live_graph(tmp_path):
+    live = AttackGraph()
+    journal = GraphJournal(str(tmp_path))
+    journal.attach(live)
+    build_graph(live)
+    journal.close()
+
+    restored = GraphJournal(str(tmp_path)).restore(AttackGraph())
+    assert_same_graph(restored, live)
+
+
+def test_restore_from_snapshot_plus_tail(tmp_path):
+    live = AttackGraph()
+    journal = GraphJournal(str(tmp_path))
+    journal.attach(live)
+    build_graph(live)
+    journal.snapshot(live, wait=True)
+    live.record_flow("10.0.0.3", "10.0.0.4", now=T0 + timedelta(hours=2))
+    live.add_anomaly("10.0.0.3", "10.0.0.4", severity=0.3, now=T0 + timedelta(hours=2))
+    journal.close()
+
+    # Only the new snapshot and the segment after it are kept
+    assert len(list(tmp_path.glob("snapshot-*.npz"))) == 1
+    assert len(list(tmp_path.glob("wal-*.log"))) == 1
+
+    restored = GraphJournal(str(tmp_path)).restore(AttackGraph())
+    assert_same_graph(restored, live)
+
+
+def test_restore_skips_truncated_line(tmp_path):
+    live = AttackGraph()
+    journal = GraphJournal(str(tmp_path))
+    journal.attach(live)
+    build_graph(live)
+    journal.close()
+    with open(next(tmp_path.glob("wal-*.log")), "a") as f:
+        f.write('["a","10.0.0.1"')
+
+    assert_same_graph(GraphJournal(str(tmp_path)).restore(AttackGraph()), live)
+
+
+def test_reasoning_engine_restores_journal(tmp_path):
+    engine = ReasoningEngine(journal=GraphJournal(str(tmp_path)))
+    build_graph(engine.graph)
+    engine.close()
+
+    restarted = ReasoningEngine(journal=GraphJournal(str(tmp_path)))
+    assert_same_graph(restarted.graph, engine.graph)
+    # The restarted engine appends to a fresh segment
+    restarted.graph.record_flow("10.0.0.5", "10.0.0.6", now=T0)
+    restarted.close()
+    assert len(list(tmp_path.glob("wal-*.log"))) == 2
+
+
+def test_load_snapshot_rejects_unknown_version(tmp_path):
+    np.savez(tmp_path / "bad.npz", version=np.array([99]))
+    with pytest.raises(ValueError):
+        load_snapshot(str(tmp_path / "bad.npz"))
@@ -0,0 +1,70 @@
+"""Test suite for the staged consumer pipeline."""
+import json
+import threading
+import time
+
+from rapids.streaming.consumer import ConsumerStats
+from rapids.streaming.pipeline import StagedPipeline
+
+
+class ListReader:
+    """Serves pre-built batches, then sets the stop event once acked."""
+
+    exhausted = False
+
+    def __init__(self, batches, stop_event):
+        self.batches = list(batches)
+        self.batch_size = 8
+        self.stop_event = stop_event
+        self.acked = []
+        self.expected = sum(len(b) for b in self.batches)
+
+    def read(self):
+        if self.batches:
+            return self.batches.pop(0)
+        time.sleep(0.001)
+        return []
+
+    def ack(self, entry_ids):
+        self.acked.extend(entry_ids)
+        if len(self.acked) >= self.expected:
+            self.stop_event.set()
+
+
+class SlowEngine:
+    def __init__(self):
+        self.flows = []
+
+    def observe_flow(self, flow):
+        time.sleep(0.001)
+        self.flows.append(flow["a"])
+        return "h1", "h2"
+
+    def handle_anomaly(self, src, dst, flow):
+        return [], []
+
+
+def _batch(start, size):
+    return [(f"{i}-0", {"flow": json.dumps({"a": i})}) for i in range(start, start + size)]
+
+
+def test_pipeline_processes_batches_in_order_and_acks(threshold_model, identity_scaler):
+    stop = threading.Event()
+    batches = [_batch(i * 8, 8) for i in range(20)]
+    batches.append([("bad-0", {"nope": 1})])
+    reader = ListReader(batches, stop)
+    engine = SlowEngine()
+    stats = ConsumerStats()
+
+    pipeline = StagedPipeline(reader, threshold_model(), identity_scaler, ["a"], engine, stats, depth=2)
+    runner = threading.Thread(target=pipeline.run, args=(stop,))
+    runner.start()
+    runner.join(timeout=10)
+
+    assert not runner.is_alive()
+    assert engine.flows == list(range(160))
+    assert stats.flow_count == 160
+    assert stats.alert_count == 59
+    assert stats.errors_count == 1
+    assert len(reader.acked) == 161
+    assert pipeline.queue_depths() == {"detect": 0, "reason": 0}
@@ -0,0 +1,111 @@
+"""Test suite for the stream producer."""
+import json
+import pandas as pd
+
+from rapids.streaming import producer
+from rapids.streaming.wire import schema_id
+
+
+def test_batched_producer_matches_per_row_payloads(monkeypatch, write_flows_csv, recording_redis):
+    path = write_flows_csv()
+
+    single = recording_redis()
+    monkeypatch.setattr(producer, "connect_redis", lambda *args: single)
+    producer.run_producer(path, stream_name="s", delay=0)
+
+    batched = recording_redis()
+    monkeypatch.setattr(producer, "connect_redis", lambda *args: batched)
+    producer.run_producer(path, stream_name="s", delay=0, batch_size=4)
+
+    assert [json.loads(f["flow"]) for _, f in batched.entries] == [json.loads(f["flow"]) for _, f in single.entries]
+    assert single.round_trips == 10
+    assert batched.round_trips == 3
+
+
+def test_batched_producer_caps_batch_by_flush_interval(monkeypatch, write_flows_csv, recording_redis):
+    path = write_flows_csv()
+    r = recording_redis()
+    monkeypatch.setattr(producer, "connect_redis", lambda *args: r)
+    producer.run_producer(path, target_fps=1000, batch_size=100, flush_interval_sec=0.002)
+
+    assert len(r.entries) == 10
+    assert r.round_trips == 5
+
+
+def test_binary_producer_sends_one_entry_per_batch(monkeypatch, write_flows_csv, recording_redis):
+    path = write_flows_csv()
+    r = recording_redis()
+    monkeypatch.setattr(producer, "connect_redis", lambda *args: r)
+    producer.run_producer(path, stream_name="s", delay=0, batch_size=4, wire_format="binary", wire_dtype="float32")
+
+    schema = schema_id([" Destination Port", " Flow Duration"])
+    assert json.loads(r.hashes["s:schemas"][schema]) == [" Destination Port", " Flow Duration"]
+    assert [fields["rows"] for _, fields in r.entries] == [4, 4, 2]
+    assert all(fields["schema"] == schema and fields["dtype"] == "<f4" for _, fields in r.entries)
+
+
+def test_iter_flows_chunks_and_limits(write_flows_csv):
+    path = write_flows_csv(rows=10)
+
+    chunks = list(producer.iter_flows(path, chunk_rows=4, max_rows=7))
+    assert [len(chunk) for chunk in chunks] == [4, 3]
+    assert chunks[0].columns.tolist() == [" Destination Port", " Flow Duration"]
+
+
+def test_load_flows_reads_only_up_to_max_rows(monkeypatch, write_flows_csv):
+    path = write_flows_csv(rows=10)
+    expected = producer.load_flows(path).head(4)
+    clean_chunks = producer.iter_clean_chunks
+    read = []
+
+    def small_chunks(csv_path, dtype=None):
+        for chunk in clean_chunks(csv_path, 3, dtype=dtype):
+            read.append(len(chunk.features))
+            yield chunk
+
+    monkeypatch.setattr(producer, "iter_clean_chunks", small_chunks)
+    assert producer.load_flows(path, max_rows=4).equals(expected)
+    assert read == [3, 3]
+
+
+def test_shards_cover_every_row_once(write_flows_csv):
+    path = write_flows_csv(rows=101)
+    expected = producer.load_flows(path)
+
+    for shards in (2, 3, 8):
+        parts = [pd.concat(producer.iter_flows(path, chunk_rows=7, shard=i, shards=shards)) for i in range(shards)]
+        combined = pd.concat(parts).reset_index(drop=True)
+        assert combined.equals(expected.reset_index(drop=True))
+
+
+def test_more_shards_than_rows(write_flows_csv):
+    path = write_flows_csv(rows=2)
+    sizes = [sum(len(c) for c in producer.iter_flows(path, shard=i, shards=5)) for i in range(5)]
+    assert sum(sizes) == 2
+
+
+def test_chunked_producer_sends_across_chunks(monkeypatch, write_flows_csv, recording_redis):
+    path = write_flows_csv()
+    r = recording_redis()
+    monkeypatch.setattr(producer, "connect_redis", lambda *args: r)
+    sent = producer.run_producer(path, stream_name="s", delay=0, batch_size=4, chunk_rows=3)
+
+    assert sent == 10
+    assert [json.loads(f["flow"])[" Destination Port"] for _, f in r.entries] == list(range(80, 90))
+
+
+def test_stray_text_keeps_the_file_columns(tmp_path):
+    path = tmp_path / "flows.csv"
+    values = [str(i) for i in range(10)]
+    values[7] = "oops"
+    pd.DataFrame({"a": range(10), "b": values, "Label": "BENIGN"}).to_csv(path, index=False)
+
+    chunks = list(producer.iter_flows(path, chunk_rows=5))
+    assert [chunk.columns.tolist() for chunk in chunks] == [["a", "b"], ["a", "b"]]
+    assert [len(chunk) for chunk in chunks] == [5, 4]
+    assert 7 not in pd.concat(chunks)["a"].tolist()
+
+    for shard in range(3):
+        for chunk in producer.iter_flows(path, chunk_rows=2, shard=shard, shards=3):
+            assert chunk.columns.tolist() == ["a", "b"]
+    assert sum(len(c) for i in range(3) for c in producer.iter_flows(path, chunk_rows=2, shard=i, shards=3)) == 9
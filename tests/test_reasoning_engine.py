@@ -50,6 +50,18 @@ def test_handle_anomaly_returns_paths(reasoning_engine, sample_flow):
     assert isinstance(recommendations, list)
 
 
+def test_handle_anomalies_shares_one_path_search(reasoning_engine, sample_flow):
+    """Test handling several anomalies together."""
+    other = dict(sample_flow, dst_ip="192.168.1.30", destination_port=3306)
+    anomalies = [(*reasoning_engine.observe_flow(flow), flow) for flow in (sample_flow, other)]
+    results = reasoning_engine.handle_anomalies(anomalies)
+
+    assert len(results) == 2
+    assert results[0][0] is results[1][0]
+    for src, dst, _ in anomalies:
+        assert reasoning_engine.graph.node_risk.get(dst, 0.0) > 0
+
+
 def test_anomaly_propagates_risk(reasoning_engine, sample_flow):
     """Test that anomalies propagate risk."""
     src, dst = reasoning_engine.observe_flow(sample_flow)
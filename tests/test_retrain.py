@@ -0,0 +1,163 @@
+"""Test suite for background retraining and model hot-swap."""
+import json
+import threading
+
+import numpy as np
+import pytest
+from sklearn.preprocessing import StandardScaler
+
+from rapids.detection.array_forest import ArrayIsolationForest
+from rapids.streaming.consumer import ConsumerStats, consume
+from rapids.streaming.metrics import render_metrics
+from rapids.streaming.retrain import BackgroundRetrainer, FlowReservoir, fit_detector
+
+FEATURES = ["Destination Port", "Flow Duration"]
+
+
+class FlagAll:
+    """Startup model that flags every flow and records the batches it scored."""
+
+    def __init__(self):
+        self.batches = 0
+
+    def predict(self, features):
+        self.batches += 1
+        return -np.ones(len(features), dtype=int)
+
+
+class WaitingReader:
+    """Serves batches; before batch ``wait_before`` it lets the retrainer finish its job."""
+
+    exhausted = False
+
+    def __init__(self, batches, retrainer, wait_before):
+        self.batches = list(batches)
+        self.batch_size = len(self.batches[0])
+        self.retrainer = retrainer
+        self.wait_before = wait_before
+        self.reads = 0
+
+    def read(self):
+        if self.reads == self.wait_before:
+            assert self.retrainer.wait(timeout=30)
+        self.reads += 1
+        if len(self.batches) == 1:
+            self.exhausted = True
+        return self.batches.pop(0)
+
+    def ack(self, entry_ids):
+        pass
+
+    def save_checkpoint(self):
+        pass
+
+
+class QuietEngine:
+    def observe_flow(self, flow):
+        return "h1", "h2"
+
+    def handle_anomaly(self, src, dst, flow):
+        return [], []
+
+
+def _batches(count, size, seed=0):
+    rng = np.random.default_rng(seed)
+    batches = []
+    for b in range(count):
+        rows = rng.normal([1000.0, 50.0], [100.0, 5.0], size=(size, 2))
+        batches.append(
+            [
+                (f"{b * size + i + 1}-0", {"flow": json.dumps(dict(zip(FEATURES, map(float, row))))})
+                for i, row in enumerate(rows)
+            ]
+        )
+    return batches
+
+
+def test_reservoir_fills_then_samples_and_rewinds_in_order():
+    reservoir = FlowReservoir(100, seed=0)
+    reservoir.add(np.arange(60, dtype=float).reshape(30, 2))
+    assert reservoir.size == 30
+    np.testing.assert_array_equal(reservoir.snapshot()[:, 0], np.arange(0, 60, 2))
+
+    reservoir.add(np.full((10000, 2), 7.0))
+    assert reservoir.size == 100 and reservoir.seen == 10030
+    # Almost every original row has been replaced by the later, much larger stream
+    assert (reservoir.snapshot()[:, 0] == 7.0).sum() > 95
+
+    reservoir.rewind()
+    reservoir.add(np.full((40, 2), -1.0))
+    sample = reservoir.snapshot()
+    assert len(sample) == 100
+    np.testing.assert_array_equal(sample[:40, 0], -1.0)
+
+
+def test_fit_detector_drops_invalid_rows_and_fuses():
+    rng = np.random.default_rng(1)
+    features = rng.normal(size=(500, 3)) * [1.0, 100.0, 10.0]
+    features[:5, 1] = np.inf
+    features[5:10, 2] = np.nan
+
+    model, scaler = fit_detector(features, contamination=0.1, fuse_scaler=True)
+    assert scaler is None and isinstance(model, ArrayIsolationForest) and model.raw_input
+    unfused, scaler = fit_detector(features, contamination=0.1, scorer="sklearn")
+    assert isinstance(scaler, StandardScaler) and scaler.n_samples_seen_ == 490
+    clean = features[10:]
+    assert np.array_equal(model.predict(clean), unfused.predict(scaler.transform(clean)))
+
+
+def test_trigger_trains_in_background_and_swaps_on_poll():
+    retrainer = BackgroundRetrainer(reservoir_size=2000, min_samples=500, interval_sec=3600, executor="thread")
+    stats = ConsumerStats()
+    startup = FlagAll()
+    retrainer.sample(np.random.default_rng(2).normal(size=(400, 2)))
+
+    retrainer.trigger()
+    assert retrainer.poll(startup, None, stats) == (startup, None)
+    assert not retrainer.training  # not enough samples yet
+
+    retrainer.sample(np.random.default_rng(3).normal(size=(400, 2)))
+    retrainer.poll(startup, None, stats)
+    assert retrainer.training
+    assert retrainer.wait(timeout=30)
+
+    model, scaler = retrainer.poll(startup, None, stats)
+    assert isinstance(model, ArrayIsolationForest) and isinstance(scaler, StandardScaler)
+    assert stats.model_swaps == 1 and stats.model_version == retrainer.version
+    assert retrainer.swaps[-1].flows == 800
+    assert f'rapids_model_info{{version="{retrainer.version}"}} 1' in render_metrics(stats)
+    assert "rapids_model_swaps_total 1" in render_metrics(stats)
+    retrainer.close()
+
+
+def test_drift_triggers_retrain():
+    retrainer = BackgroundRetrainer(
+        reservoir_size=100, min_samples=10, contamination=0.1, drift_ratio=2.0, drift_window=100, executor="thread"
+    )
+    retrainer.record(np.array([-1] * 10 + [1] * 90))
+    assert not retrainer._triggered
+    retrainer.record(np.array([-1] * 30 + [1] * 70))
+    assert retrainer._triggered
+
+
+def test_rejects_bad_settings():
+    with pytest.raises(ValueError):
+        BackgroundRetrainer(executor="gpu")
+    with pytest.raises(ValueError):
+        BackgroundRetrainer(reservoir_size=10, min_samples=20)
+
+
+def test_consumer_swaps_model_between_batches_without_stopping():
+    retrainer = BackgroundRetrainer(reservoir_size=1000, min_samples=300, executor="thread")
+    retrainer.trigger()
+    startup = FlagAll()
+    reader = WaitingReader(_batches(8, 100), retrainer, wait_before=4)
+
+    stats = consume(reader, startup, None, FEATURES, threading.Event(), QuietEngine(), retrainer=retrainer)
+
+    # Training started before batch 4 (the first poll with 300 samples) and
+    # was swapped in before batch 5; the retrained model flags ~20%, not all
+    assert startup.batches == 4
+    assert stats.flow_count == 800
+    assert stats.model_swaps == 1
+    assert 400 < stats.alert_count < 600
@@ -0,0 +1,66 @@
+"""Test suite for reservoir-sampled out-of-core training."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from rapids.detection.sampled_training import TrainingSampler, train_sampled
+from rapids.evaluation.benchmarking import compare_sampled_training
+
+
+@pytest.fixture
+def flows_csv(tmp_path):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(rng.lognormal(3, 1, size=(3000, 4)), columns=["a", "b", "c", "d"])
+    df["Label"] = np.where(rng.random(3000) < 0.1, "DDoS", "BENIGN")
+    df.loc[[5, 50], "b"] = np.inf
+    path = tmp_path / "flows.csv"
+    df.to_csv(path, index=False)
+    return path, df.drop(index=[5, 50])
+
+
+def test_trains_on_sample_with_full_data_scaler(flows_csv, tmp_path):
+    path, clean = flows_csv
+    sampled = train_sampled(path, sample_size=500, chunk_rows=128)
+
+    assert sampled.rows_seen == 2998 and sampled.sample_rows == 500
+    assert sampled.feature_columns == ["a", "b", "c", "d"]
+    raw = clean[["a", "b", "c", "d"]].to_numpy()
+    np.testing.assert_allclose(sampled.scaler.mean_, raw.mean(axis=0))
+    np.testing.assert_allclose(sampled.scaler.scale_, raw.std(axis=0))
+    assert sampled.model.max_samples_ == 256
+
+    cached = train_sampled(path, sample_size=500, chunk_rows=128, cache_dir=tmp_path / "cache")
+    X = sampled.scaler.transform(raw)
+    assert np.array_equal(cached.model.decision_function(X), sampled.model.decision_function(X))
+
+
+def test_stratified_sample_keeps_label_mix():
+    sampler = TrainingSampler(sample_size=100, stratify=True, seed=0)
+    for label, rows in (("BENIGN", 9000), ("DDoS", 900), ("PortScan", 100)):
+        # Sorted by label, the worst case for a chunked stream
+        for start in range(0, rows, 250):
+            count = min(250, rows - start)
+            sampler.add(np.full((count, 2), float(len(label))), np.array([label] * count, dtype=object))
+
+    sample = sampler.sample()
+    counts = {int(value): int(n) for value, n in zip(*np.unique(sample[:, 0], return_counts=True))}
+    assert counts == {6: 90, 4: 9, 8: 1}
+    assert sampler.label_counts == {"BENIGN": 9000, "DDoS": 900, "PortScan": 100}
+
+    with pytest.raises(ValueError, match="labels"):
+        sampler.add(np.zeros((1, 2)))
+
+
+def test_holdout_report_compares_with_full_data_model():
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame(rng.lognormal(3, 1, size=(2000, 4)), columns=["a", "b", "c", "d"])
+    labels = np.where(rng.random(2000) < 0.2, "DDoS", "BENIGN")
+
+    report = compare_sampled_training(df, labels, sample_size=300, stratify=True)
+
+    assert report["train_rows"] == 1400 and report["holdout_rows"] == 600
+    assert report["sample_rows"] == 300 and report["stratified"]
+    for name in ("sample", "seed_reference"):
+        assert report[name]["label_agreement"] > 0.9
+        assert report[name]["score_correlation"] > 0.8
+        assert 0 <= report[name]["mean_abs_score_diff"] <= report[name]["max_abs_score_diff"]
@@ -0,0 +1,71 @@
+"""Test suite for the parallel experiment sweep executor."""
+import pickle
+from multiprocessing import shared_memory
+
+import numpy as np
+import pytest
+
+from rapids.detection.anomaly_model import contamination_experiment, train_test_evaluation
+from rapids.evaluation.feature_analysis import feature_impact_experiment, rank_features
+from rapids.evaluation.sweep import SharedArray, contamination_tasks, feature_tasks, run_sweep
+
+
+@pytest.fixture
+def flows():
+    rng = np.random.default_rng(0)
+    attack = rng.random(800) < 0.2
+    features = rng.normal(size=(800, 6)).astype(np.float32)
+    features[attack, :2] += 4
+    labels = np.where(attack, "DDoS", "BENIGN").astype(object)
+    return features, labels
+
+
+def test_parallel_sweep_matches_serial_evaluation(flows):
+    features, labels = flows
+    ranked = rank_features(features, labels)
+    tasks = feature_tasks(ranked, [1, 3, 10]) + contamination_tasks([0.1, 0.3])
+
+    results = run_sweep(features, labels, tasks, workers=3, threads_per_worker=1)
+
+    assert [r.get("feature_count") for r in results] == [1, 3, 6, None, None]
+    for count, result in zip([1, 3, 6], results):
+        expected = train_test_evaluation(features[:, ranked[:count]], labels)
+        assert {k: result[k] for k in expected} == expected
+    for level, result in zip([0.1, 0.3], results[3:]):
+        expected = train_test_evaluation(features, labels, contamination=level)
+        assert result == {**expected, "contamination": level}
+
+
+def test_experiments_agree_across_worker_counts(flows):
+    features, labels = flows
+    assert feature_impact_experiment(features, labels, [2, 6], workers=2) == feature_impact_experiment(
+        features, labels, [2, 6]
+    )
+    assert contamination_experiment(features, labels, [0.1, 0.2], workers=2) == contamination_experiment(
+        features, labels, [0.1, 0.2]
+    )
+
+
+def test_shared_array_pickles_as_its_name():
+    shared = SharedArray.copy_of(np.arange(12, dtype=np.float32).reshape(3, 4))
+    payload = pickle.dumps(shared)
+    assert len(payload) < 200
+
+    clone = pickle.loads(payload)
+    clone.array[0, 0] = -1
+    assert shared.array[0, 0] == -1 and clone.array.shape == (3, 4)
+    clone.close()
+    shared.close()
+    shared.unlink()
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=shared.name)
+
+
+def test_rejects_bad_worker_settings(flows):
+    features, labels = flows
+    tasks = contamination_tasks([0.1])
+    assert run_sweep(features, labels, []) == []
+    with pytest.raises(ValueError, match="workers"):
+        run_sweep(features, labels, tasks, workers=0)
+    with pytest.raises(ValueError, match="threads_per_worker"):
+        run_sweep(features, labels, tasks, threads_per_worker=0)
@@ -0,0 +1,92 @@
+"""Test suite for the in-process replay transports."""
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from rapids.reasoning.engine import ReasoningEngine
+from rapids.streaming.alerts import AlertSink, JsonlAlertWriter
+from rapids.streaming.transport import FileReplayTransport, MemoryTransport, run_replay
+
+
+FEATURES = ["Destination Port", "Flow Duration"]
+
+
+@pytest.fixture
+def flows_csv(tmp_path):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(
+        {
+            "Destination Port": rng.choice([80, 443, 3306, 5432], size=1000),
+            "Flow Duration": rng.integers(1, 10000, size=1000).astype(float),
+            "Label": "BENIGN",
+        }
+    )
+    df.loc[5, "Flow Duration"] = np.inf
+    path = tmp_path / "flows.csv"
+    df.to_csv(path, index=False)
+    return str(path)
+
+
+def test_memory_transport_batches_and_exhausts():
+    transport = MemoryTransport(batch_size=3, block_ms=10)
+    for i in range(5):
+        transport.publish({"flow": json.dumps({"i": i})})
+    transport.close()
+
+    assert len(transport.read()) == 3
+    assert len(transport.read()) == 2
+    assert transport.exhausted
+
+
+def test_memory_transport_read_times_out_empty():
+    assert MemoryTransport(block_ms=1).read() == []
+
+
+def test_file_transport_reads_across_chunks(flows_csv):
+    transport = FileReplayTransport(flows_csv, batch_size=128, chunk_rows=300)
+    rows = 0
+    while not transport.exhausted:
+        for _, fields in transport.read():
+            assert fields["rows"] <= 128
+            rows += fields["rows"]
+    assert rows == 999
+
+
+@pytest.mark.parametrize(
+    "transport,wire_format", [("file", "json"), ("memory", "json"), ("memory", "binary")]
+)
+def test_replay_transports_agree(flows_csv, transport, wire_format, threshold_model, identity_scaler):
+    stats = run_replay(
+        flows_csv,
+        threshold_model(1000),
+        identity_scaler,
+        FEATURES,
+        ReasoningEngine(),
+        transport=transport,
+        batch_size=64,
+        chunk_rows=250,
+        wire_format=wire_format,
+    )
+
+    expected = pd.read_csv(flows_csv).replace([np.inf], np.nan).dropna()
+    assert stats.flow_count == 999
+    assert stats.alert_count == int((expected["Destination Port"] > 1000).sum())
+    assert stats.errors_count == 0
+
+
+def test_replay_writes_all_alerts(flows_csv, tmp_path, threshold_model, identity_scaler):
+    sink = AlertSink([JsonlAlertWriter(str(tmp_path / "alerts.jsonl"))], window_sec=0.0)
+    stats = run_replay(
+        flows_csv, threshold_model(1000), identity_scaler, FEATURES, ReasoningEngine(), max_rows=200, alert_sink=sink
+    )
+
+    lines = (tmp_path / "alerts.jsonl").read_text().splitlines()
+    assert stats.flow_count == 200
+    assert len(lines) == stats.alert_count
+
+
+def test_replay_rejects_unknown_transport(flows_csv, threshold_model, identity_scaler):
+    with pytest.raises(ValueError):
+        run_replay(flows_csv, threshold_model(1000), identity_scaler, FEATURES, ReasoningEngine(), transport="redis")
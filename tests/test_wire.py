@@ -0,0 +1,72 @@
+"""Test suite for the binary batch wire format."""
+import numpy as np
+import pytest
+
+from rapids.streaming.consumer import ConsumerStats
+from rapids.streaming.decoder import FlowDecoder
+from rapids.streaming.wire import SchemaRegistry, decode_batch, encode_batch, schema_id
+
+
+class HashStore:
+    """Minimal stand-in for the Redis hash commands used by SchemaRegistry."""
+
+    def __init__(self):
+        self.hashes = {}
+
+    def hset(self, key, field, value):
+        self.hashes.setdefault(key, {})[field] = value.encode("utf-8")
+
+    def hget(self, key, field):
+        return self.hashes.get(key, {}).get(field)
+
+
+def _raw(fields):
+    """Mimic a decode_responses=False reply."""
+    return {k.encode("ascii"): v if isinstance(v, bytes) else str(v).encode("ascii") for k, v in fields.items()}
+
+
+@pytest.mark.parametrize("dtype", ["float32", "float64"])
+def test_encode_decode_round_trip(dtype):
+    values = np.arange(12, dtype=float).reshape(4, 3) / 7.0
+    schema, decoded = decode_batch(_raw(encode_batch(values, "abc", dtype)))
+
+    assert schema == "abc"
+    assert decoded.shape == (4, 3)
+    np.testing.assert_allclose(decoded, values, rtol=1e-6)
+
+
+def test_decode_rejects_truncated_payload():
+    fields = _raw(encode_batch(np.ones((2, 3)), "abc"))
+    fields[b"batch"] = fields[b"batch"][:-8]
+    with pytest.raises(ValueError):
+        decode_batch(fields)
+
+
+def test_schema_id_depends_on_order():
+    assert schema_id(["a", "b"]) != schema_id(["b", "a"])
+
+
+def test_decoder_reorders_binary_batch_columns():
+    store = HashStore()
+    producer_schemas = SchemaRegistry(store, "flows")
+    schema = producer_schemas.register(["b", "a", "c"])
+    values = np.array([[2.0, 1.0, 3.0], [20.0, 10.0, 30.0]])
+
+    stats = ConsumerStats()
+    decoder = FlowDecoder(["a", "b"], schemas=SchemaRegistry(store, "flows"))
+    ids, flows, features = decoder.decode([(b"1-0", _raw(encode_batch(values, schema)))], stats)
+
+    assert ids == ["1-0#0", "1-0#1"]
+    assert flows[1] == {"b": 20.0, "a": 10.0, "c": 30.0}
+    np.testing.assert_array_equal(features, [[1.0, 2.0], [10.0, 20.0]])
+    assert stats.errors_count == 0
+
+
+def test_decoder_counts_unknown_schema_rows():
+    stats = ConsumerStats()
+    decoder = FlowDecoder(["a", "b"], schemas=SchemaRegistry(HashStore(), "flows"))
+    ids, _, features = decoder.decode([(b"1-0", _raw(encode_batch(np.ones((5, 2)), "missing")))], stats)
+
+    assert ids == []
+    assert features.shape == (0, 2)
+    assert stats.errors_count == 5